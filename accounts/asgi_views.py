@@ -0,0 +1,87 @@
+"""
+Async versions of the accounts JSON APIs, routed only when SERVER_MODE is
+'asgi' (see rithm/asgi_urls.py).
+
+Under WSGI the sync views in views.py are used: each async view costs an
+event loop hop per request there. The views here share the parsing and
+database helpers with views.py, and run each transactional write as a
+single sync_to_async call because Django 4.2 cannot run atomic() in async
+code.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from rithm import async_views
+from .bootstrap import build_bootstrap
+from .models import GameStats
+from .views import (
+    GAMES, _apply_sync_batch, _bootstrap_response, _clean_sync_batch, _stats_response,
+    _stats_values, _sync_response,
+)
+
+
+async def _read_stats(request, user, game):
+    if not user.is_authenticated:
+        return JsonResponse({'authenticated': False})
+    
+    stats = await GameStats.objects.filter(user=user, game=game).afirst()
+    return _stats_response(request, user, game, stats)
+
+
+async def _update_stats(request, user, game):
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+    
+    try:
+        stats = await sync_to_async(GameStats.objects.record)(user, game, **_stats_values(request))
+        
+        return JsonResponse({
+            'success': True,
+            'stats': stats.as_dict()
+        })
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@async_views.require_POST
+async def sync_stats(request):
+    """Async version of ``views.sync_stats``."""
+    user = await async_views.auser(request)
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+    
+    try:
+        batch, error = _clean_sync_batch(request)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        
+        client_id, seq, changes = batch
+        applied, stats = await sync_to_async(_apply_sync_batch)(user, client_id, seq, changes)
+        return _sync_response(seq, applied, stats)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@async_views.require_GET
+async def bootstrap(request):
+    """Async version of ``views.bootstrap``."""
+    user = await async_views.auser(request)
+    return _bootstrap_response(request, await sync_to_async(build_bootstrap)(user))
+
+
+@async_views.require_http_methods(['GET', 'POST'])
+async def game_stats(request, game):
+    """Async version of ``views.game_stats``."""
+    if game not in GAMES:
+        return JsonResponse({'success': False, 'error': 'Invalid game'}, status=404)
+    
+    user = await async_views.auser(request)
+    if request.method == 'POST':
+        return await _update_stats(request, user, game)
+    return await _read_stats(request, user, game)
+
+
+@async_views.require_POST
+async def update_game_stats(request, game):
+    """Async version of ``views.update_game_stats``."""
+    return await game_stats(request, game)
@@ -0,0 +1,48 @@
+"""
+Everything a game page needs to know about the current user, in one payload.
+
+``build_bootstrap()`` gathers every game's stats, the user's current
+all-time and weekly ranks and this week's progress in three queries,
+however many boards the user is on: ranks are counted in a subquery of the
+aggregate rows (see ranking.with_ranks()). It backs the
+``/accounts/api/bootstrap/`` endpoint and the ``{% stats_bootstrap %}``
+tag that embeds the same data in game pages.
+"""
+from leaderboard import ranking
+from leaderboard.models import AllTimeScore, WeeklyScore
+from leaderboard.views import get_week_start
+
+from .models import GameStats
+
+
+def build_bootstrap(user):
+    if not user.is_authenticated:
+        return {'authenticated': False}
+
+    week_start = get_week_start()
+    stats = GameStats.for_user(user)
+    ranks = {game: {} for game in stats}
+    weekly = {game: {} for game in stats}
+
+    for row in ranking.with_ranks(AllTimeScore.objects.filter(user=user).order_by()):
+        ranks[row.game][row.difficulty] = {'alltime': row.rank, 'weekly': None}
+
+    for row in ranking.with_ranks(WeeklyScore.objects.filter(user=user, week_start=week_start).order_by()):
+        board = ranks[row.game].setdefault(row.difficulty, {'alltime': None})
+        board['weekly'] = row.rank
+        weekly[row.game][row.difficulty] = {
+            'correct': row.total_correct,
+            'total': row.total_attempts,
+            'accuracy': row.accuracy,
+            'bestStreak': row.best_streak,
+            'sessions': row.sessions_played,
+        }
+
+    return {
+        'authenticated': True,
+        'username': user.username,
+        'weekStart': week_start.isoformat(),
+        'stats': {game: game_stats.as_dict() for game, game_stats in stats.items()},
+        'ranks': ranks,
+        'weekly': weekly,
+    }
@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import EmailVerification
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete accounts that never verified their email before the token '
+        'expired, along with expired tokens of accounts activated another '
+        'way. Deletes in bounded batches; safe to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows deleted per statement.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would be deleted without deleting anything.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        expired = EmailVerification.objects.expired()
+        # Users still inactive never verified; deleting them cascades to the token
+        stale_users = expired.filter(user__is_active=False)
+        # Active users whose token lingered (e.g. activated when mail failed)
+        stale_tokens = expired.filter(user__is_active=True)
+
+        if options['dry_run']:
+            self.stdout.write(f'Would delete {stale_users.count()} unverified users')
+            self.stdout.write(f'Would delete {stale_tokens.count()} expired tokens of active users')
+            return
+
+        users = self._delete_in_batches(stale_users, 'user_id', User, batch_size)
+        tokens = self._delete_in_batches(stale_tokens, 'pk', EmailVerification, batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {users} unverified users and {tokens} expired tokens.'
+        ))
+
+    def _delete_in_batches(self, queryset, field, model, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('pk').values_list(field, flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            model.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts import outbox
+from accounts.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Send email queued in the outbox, a batch per SMTP connection. Runs '
+        'once by default; use --loop to keep polling as a worker process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new email.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds to wait between polls with --loop.',
+        )
+        parser.add_argument(
+            '--purge-days', type=int,
+            help='Also delete sent email older than this many days.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        while True:
+            sent, failed = outbox.send_pending(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed')
+
+            if options['purge_days'] is not None:
+                cutoff = timezone.now() - timedelta(days=options['purge_days'])
+                deleted, _ = OutgoingEmail.objects.filter(
+                    status=OutgoingEmail.SENT, sent_at__lt=cutoff
+                ).delete()
+                if deleted:
+                    self.stdout.write(f'Purged {deleted} sent email(s)')
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,149 @@
+# Generated by Django 4.2.28 on 2026-10-18 03:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# (game, has_current_streak_and_difficulty) for the old UserProfile column groups
+LEGACY_GAMES = [('note', True), ('interval', True), ('chord', True), ('pitch', False)]
+
+
+def copy_profile_stats(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    GameStats = apps.get_model('accounts', 'GameStats')
+    rows = []
+    for profile in UserProfile.objects.iterator():
+        for game, full in LEGACY_GAMES:
+            stats = GameStats(
+                user_id=profile.user_id,
+                game=game,
+                total_correct=getattr(profile, f'{game}_total_correct'),
+                total_attempts=getattr(profile, f'{game}_total_attempts'),
+                best_streak=getattr(profile, f'{game}_best_streak'),
+            )
+            if full:
+                stats.current_streak = getattr(profile, f'{game}_current_streak')
+                stats.difficulty = getattr(profile, f'{game}_difficulty')
+            # Games never played don't need a row
+            if stats.total_attempts or stats.best_streak or stats.current_streak or stats.difficulty != 'beginner':
+                rows.append(stats)
+    GameStats.objects.bulk_create(rows, batch_size=500)
+
+
+def copy_game_stats_back(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    GameStats = apps.get_model('accounts', 'GameStats')
+    full = dict(LEGACY_GAMES)
+    for stats in GameStats.objects.iterator():
+        fields = {
+            f'{stats.game}_total_correct': stats.total_correct,
+            f'{stats.game}_total_attempts': stats.total_attempts,
+            f'{stats.game}_best_streak': stats.best_streak,
+        }
+        if full[stats.game]:
+            fields[f'{stats.game}_current_streak'] = stats.current_streak
+            fields[f'{stats.game}_difficulty'] = stats.difficulty
+        UserProfile.objects.filter(user_id=stats.user_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0004_userprofile_chord_best_streak_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.CharField(choices=[('note', 'Note Reading'), ('interval', 'Interval Training'), ('chord', 'Chord Identification'), ('pitch', 'Pitch Identification')], max_length=20)),
+                ('difficulty', models.CharField(default='beginner', max_length=20)),
+                ('total_correct', models.IntegerField(default=0)),
+                ('total_attempts', models.IntegerField(default=0)),
+                ('best_streak', models.IntegerField(default=0)),
+                ('current_streak', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'game stats',
+                'unique_together': {('user', 'game')},
+            },
+        ),
+        migrations.RunPython(copy_profile_stats, copy_game_stats_back),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='chord_best_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='chord_current_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='chord_difficulty',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='chord_total_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='chord_total_correct',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='interval_best_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='interval_current_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='interval_difficulty',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='interval_total_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='interval_total_correct',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='note_best_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='note_current_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='note_difficulty',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='note_total_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='note_total_correct',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='pitch_best_streak',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='pitch_total_attempts',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='pitch_total_correct',
+        ),
+    ]
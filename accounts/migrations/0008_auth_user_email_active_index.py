@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index auth_user (email, is_active) for resend_verification's lookup.
+
+    auth_user belongs to django.contrib.auth, so the index is created with
+    raw SQL here rather than declared on the model.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('accounts', '0007_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS accounts_user_email_active_idx ON auth_user (email, is_active);',
+            'DROP INDEX IF EXISTS accounts_user_email_active_idx;',
+        ),
+    ]
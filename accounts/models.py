@@ -1,22 +1,38 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from datetime import timedelta
 import uuid
 
+from rithm.db import upsert
+
+
+class EmailVerificationQuerySet(models.QuerySet):
+    def expired(self, now=None):
+        """Unused tokens past their expiry."""
+        cutoff = (now or timezone.now()) - EmailVerification.EXPIRY
+        return self.filter(verified_at__isnull=True, created_at__lt=cutoff)
+
 
 class EmailVerification(models.Model):
     """Store email verification tokens for new users."""
+    
+    EXPIRY = timedelta(hours=24)
+    
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='email_verification')
     token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     verified_at = models.DateTimeField(null=True, blank=True)
     
+    objects = EmailVerificationQuerySet.as_manager()
+    
     def is_expired(self):
         """Token expires after 24 hours."""
-        expiry = self.created_at + timezone.timedelta(hours=24)
-        return timezone.now() > expiry
+        return timezone.now() > self.created_at + self.EXPIRY
     
     def verify(self):
         """Mark email as verified."""
@@ -30,36 +46,43 @@ class EmailVerification(models.Model):
         return f"Verification for {self.user.email}"
 
 
+class OutgoingEmail(models.Model):
+    """An email waiting in the outbox. Sent by accounts.outbox, not in the request."""
+    
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+    
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Not picked up before this time; pushed back on each failed attempt
+    send_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {self.to} ({self.status})"
+
+
 class UserProfile(models.Model):
-    """Extended user profile for storing game progress and preferences."""
+    """Extended user profile. Per-game progress lives in GameStats."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     
-    # Note Identification Stats
-    note_total_correct = models.IntegerField(default=0)
-    note_total_attempts = models.IntegerField(default=0)
-    note_best_streak = models.IntegerField(default=0)
-    note_current_streak = models.IntegerField(default=0)
-    note_difficulty = models.CharField(max_length=20, default='beginner')
-    
-    # Pitch Identification Stats
-    pitch_total_correct = models.IntegerField(default=0)
-    pitch_total_attempts = models.IntegerField(default=0)
-    pitch_best_streak = models.IntegerField(default=0)
-    
-    # Interval Training Stats
-    interval_total_correct = models.IntegerField(default=0)
-    interval_total_attempts = models.IntegerField(default=0)
-    interval_best_streak = models.IntegerField(default=0)
-    interval_current_streak = models.IntegerField(default=0)
-    interval_difficulty = models.CharField(max_length=20, default='beginner')
-
-    # Chord Identification Stats
-    chord_total_correct = models.IntegerField(default=0)
-    chord_total_attempts = models.IntegerField(default=0)
-    chord_best_streak = models.IntegerField(default=0)
-    chord_current_streak = models.IntegerField(default=0)
-    chord_difficulty = models.CharField(max_length=20, default='beginner')
-
     # General
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -67,38 +90,170 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
-    @property
-    def note_accuracy(self):
-        if self.note_total_attempts == 0:
-            return 0
-        return round((self.note_total_correct / self.note_total_attempts) * 100)
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's profile, creating it if it is missing.
+        
+        Users inserted without signals (fixtures, bulk_create) have no
+        profile until they first need one.
+        """
+        try:
+            return user.profile
+        except cls.DoesNotExist:
+            profile, _ = cls.objects.get_or_create(user=user)
+            user.profile = profile
+            return profile
+
+
+class GameStatsManager(models.Manager):
+    """Manager that writes a user's stats for one game in one statement.
     
-    @property
-    def pitch_accuracy(self):
-        if self.pitch_total_attempts == 0:
-            return 0
-        return round((self.pitch_total_correct / self.pitch_total_attempts) * 100)
+    ``record()`` issues a single ``INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING`` on (user, game), so creating the row, updating it and
+    reading the new values back is one round trip, and ``best_streak`` is
+    maxed in the database rather than in Python.
+    """
     
-    @property
-    def interval_accuracy(self):
-        if self.interval_total_attempts == 0:
-            return 0
-        return round((self.interval_total_correct / self.interval_total_attempts) * 100)
+    STATS_FIELDS = ['total_correct', 'total_attempts', 'best_streak', 'current_streak', 'difficulty']
+    
+    # The answer counts a game reset clears
+    COUNT_FIELDS = ['total_correct', 'total_attempts']
+    
+    def record(self, user, game, increments=None, reset=False, **values):
+        """Write stats for ``game`` and return the updated row.
+        
+        ``values`` are stored as given, except ``best_streak`` which only
+        ever grows. ``increments`` maps fields to amounts added to the
+        stored value; with ``reset`` the answer counts start again from
+        zero first.
+        """
+        increments = increments or {}
+        if reset:
+            # Zero then add is the same as storing the increment itself
+            values = dict(values, **{name: increments.get(name, 0) for name in self.COUNT_FIELDS})
+            increments = {name: amount for name, amount in increments.items() if name not in self.COUNT_FIELDS}
+        if upsert.can_upsert(self.model):
+            return self._upsert(user, game, increments, values)
+        return self._locked_record(user, game, increments, values)
+    
+    def _upsert(self, user, game, increments, values):
+        row = {'user': user.pk, 'game': game}
+        row.update(values)
+        row.update(increments)
+        for name in self.STATS_FIELDS:
+            row.setdefault(name, self.model._meta.get_field(name).get_default())
+        
+        updates = {name: upsert.MAX if name == 'best_streak' else upsert.SET for name in values}
+        updates.update(dict.fromkeys(increments, upsert.ADD))
+        stored = upsert.upsert(self.model, row, updates, returning=['id'] + self.STATS_FIELDS)
+        if stored is None:
+            return self.get(user=user, game=game)
+        return self.model(user=user, game=game, **stored)
+    
+    def _locked_record(self, user, game, increments, values):
+        # Fallback for backends without ON CONFLICT
+        with transaction.atomic(using=self.db):
+            self.get_or_create(user=user, game=game)
+            updates = dict(values, updated_at=timezone.now())
+            if 'best_streak' in values:
+                updates['best_streak'] = Greatest('best_streak', values['best_streak'])
+            for name, amount in increments.items():
+                updates[name] = F(name) + amount
+            self.filter(user=user, game=game).update(**updates)
+            return self.get(user=user, game=game)
 
+
+class GameStats(models.Model):
+    """A user's running totals for one game, one row per (user, game)."""
+    
+    GAME_CHOICES = [
+        ('note', 'Note Reading'),
+        ('interval', 'Interval Training'),
+        ('chord', 'Chord Identification'),
+        ('pitch', 'Pitch Identification'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='game_stats')
+    game = models.CharField(max_length=20, choices=GAME_CHOICES)
+    # Last difficulty the user picked, restored when they come back
+    difficulty = models.CharField(max_length=20, default='beginner')
+    total_correct = models.IntegerField(default=0)
+    total_attempts = models.IntegerField(default=0)
+    best_streak = models.IntegerField(default=0)
+    current_streak = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = GameStatsManager()
+    
+    class Meta:
+        unique_together = ['user', 'game']
+        verbose_name_plural = 'game stats'
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.game}"
+    
     @property
-    def chord_accuracy(self):
-        if self.chord_total_attempts == 0:
+    def accuracy(self):
+        if self.total_attempts == 0:
             return 0
-        return round((self.chord_total_correct / self.chord_total_attempts) * 100)
+        return round((self.total_correct / self.total_attempts) * 100)
+    
+    def as_dict(self):
+        """Serialize in the shape the game pages expect."""
+        return {
+            'correct': self.total_correct,
+            'total': self.total_attempts,
+            'streak': self.current_streak,
+            'bestStreak': self.best_streak,
+            'accuracy': self.accuracy,
+            'difficulty': self.difficulty,
+        }
+    
+    @classmethod
+    def for_user(cls, user):
+        """Every game's stats for a user, with unsaved defaults for unplayed games."""
+        existing = {stats.game: stats for stats in cls.objects.filter(user=user)}
+        return {
+            game: existing.get(game) or cls(user=user, game=game)
+            for game, _ in cls.GAME_CHOICES
+        }
 
 
-# Auto-create profile when user is created
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
+class StatsSyncClientManager(models.Manager):
+    def advance(self, user, client_id, seq):
+        """Record that ``seq`` from this client was applied.
+        
+        Returns False if it (or a later batch) was already applied, so the
+        caller can skip it and resends are idempotent.
+        """
+        updated = self.filter(user=user, client_id=client_id, last_seq__lt=seq).update(
+            last_seq=seq, updated_at=timezone.now()
+        )
+        if updated:
+            return True
+        _, created = self.get_or_create(user=user, client_id=client_id, defaults={'last_seq': seq})
+        return created
+
+
+class StatsSyncClient(models.Model):
+    """Last stats batch applied from one browser, for de-duplicating resends."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stats_sync_clients')
+    client_id = models.CharField(max_length=64)
+    last_seq = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = StatsSyncClientManager()
+    
+    class Meta:
+        unique_together = ['user', 'client_id']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.client_id} @ {self.last_seq}"
 
 
+# Create the profile once, when the user is created. Users saved later
+# (e.g. last_login on every login) don't touch it.
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserProfile.objects.create(user=instance)
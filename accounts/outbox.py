@@ -0,0 +1,162 @@
+"""
+Database-backed email outbox.
+
+Views call ``enqueue()``, which only inserts an OutgoingEmail row, so a slow
+SMTP server never holds up a request. ``send_pending()`` delivers due mail
+in batches over a single backend connection and reschedules failures with
+exponential backoff. It is run either by the ``send_queued_email`` worker
+command or, when ``EMAIL_OUTBOX_MODE`` is ``'thread'`` (the default, for
+single-dyno deployments), by a background thread kicked after each enqueue.
+After each run the thread sets a timer for the earliest email still
+pending, so failed mail is retried when its backoff ends without waiting
+for the next enqueue.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+# First retry after a minute, then 2, 4, 8...
+BACKOFF_SECONDS = 60
+# How long a claimed batch is hidden from other senders while it is sent
+CLAIM_SECONDS = 300
+
+_executor = None
+_executor_lock = threading.Lock()
+# Wakes the sender when the next pending email falls due, and when that is
+_timer = None
+_timer_due = None
+
+
+def enqueue(subject, body, to, html_body=''):
+    """Queue an email for delivery and return its OutgoingEmail row."""
+    email = OutgoingEmail.objects.create(to=to, subject=subject, body=body, html_body=html_body)
+    if getattr(settings, 'EMAIL_OUTBOX_MODE', 'thread') == 'thread':
+        # Only once the row is committed, or the sender thread can't see it
+        transaction.on_commit(_wake_sender)
+    return email
+
+
+def _wake_sender():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+    _executor.submit(_send_in_thread)
+
+
+def _schedule_next():
+    """Wake the sender again when the earliest pending email is due."""
+    global _timer, _timer_due
+    due = OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING).order_by('send_after').values_list(
+        'send_after', flat=True
+    ).first()
+    if due is None:
+        return
+    with _executor_lock:
+        if _timer is not None and _timer.is_alive() and _timer_due <= due:
+            return
+        if _timer is not None:
+            _timer.cancel()
+        _timer = threading.Timer(max((due - timezone.now()).total_seconds(), 0), _wake_sender)
+        # Mail left pending at shutdown is picked up by the next process's first enqueue
+        _timer.daemon = True
+        _timer.start()
+        _timer_due = due
+
+
+def _send_in_thread():
+    try:
+        send_pending()
+    except Exception:
+        logger.exception('Sending queued email failed')
+    try:
+        _schedule_next()
+    except Exception:
+        logger.exception('Scheduling the next email retry failed')
+    finally:
+        # This thread has its own connection; don't leave it open
+        connection.close()
+
+
+def _claim(batch_size):
+    """Mark up to ``batch_size`` due emails as taken and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING, send_after__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.order_by('send_after').values_list('pk', flat=True)[:batch_size])
+        OutgoingEmail.objects.filter(pk__in=ids).update(send_after=now + timedelta(seconds=CLAIM_SECONDS))
+    return list(OutgoingEmail.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def _message(email, backend):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to],
+        connection=backend,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+        logger.error('Giving up on email %s to %s: %s', email.pk, email.to, error)
+    else:
+        email.send_after = timezone.now() + timedelta(seconds=BACKOFF_SECONDS * 2 ** (email.attempts - 1))
+    email.save(update_fields=['attempts', 'last_error', 'status', 'send_after'])
+
+
+def send_pending(batch_size=BATCH_SIZE):
+    """Send every due email, a batch per connection. Returns ``(sent, failed)``."""
+    sent = failed = 0
+    while True:
+        batch = _claim(batch_size)
+        if not batch:
+            return sent, failed
+
+        backend = get_connection(fail_silently=False)
+        try:
+            backend.open()
+        except Exception as e:
+            # Can't reach the server at all: retry the whole batch later
+            for email in batch:
+                _failed(email, e)
+            return sent, failed + len(batch)
+
+        delivered = []
+        try:
+            for email in batch:
+                try:
+                    _message(email, backend).send()
+                except Exception as e:
+                    _failed(email, e)
+                    failed += 1
+                else:
+                    delivered.append(email.pk)
+        finally:
+            backend.close()
+            OutgoingEmail.objects.filter(pk__in=delivered).update(
+                status=OutgoingEmail.SENT, sent_at=timezone.now(), attempts=F('attempts') + 1
+            )
+        sent += len(delivered)
@@ -0,0 +1,211 @@
+// Buffers stats changes and sends them to /accounts/api/stats/sync/ in
+// batches, instead of a request per answer.
+//
+// Answers add to per-game deltas; resetting a game marks its delta with
+// reset so the server zeroes the stored totals before adding what follows
+// in the same batch. A flush freezes the pending deltas into
+// an "in flight" batch with the next sequence number and keeps it (in
+// localStorage) until the server acknowledges it, so a batch that was
+// applied but whose response was lost is resent with the same number and
+// ignored by the server rather than counted twice.
+//
+// Every tab of a user shares that one store, client id and sequence. Each
+// change re-reads the store, applies itself and writes it back, under a
+// Web Lock where the browser has them, so one tab never overwrites another
+// tab's answers or reuses its sequence number. A batch any tab froze is
+// sent by whichever tab flushes next; sending it twice is harmless.
+window.StatsSync = (function () {
+  const FLUSH_INTERVAL = 15000;
+  const LOCK_NAME = 'rithm.statsSync';
+  let config = null;
+  let store = null;
+  let sending = false;
+  const snapshots = {};
+
+  function storageKey() {
+    return 'rithm.statsSync.' + config.userId;
+  }
+
+  function newClientId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+  }
+
+  function load() {
+    try {
+      store = JSON.parse(localStorage.getItem(storageKey()));
+    } catch (error) {
+      store = null;
+    }
+    if (!store || !store.client) {
+      store = { client: newClientId(), seq: 0, inflight: null, pending: {} };
+    }
+  }
+
+  function save() {
+    try {
+      localStorage.setItem(storageKey(), JSON.stringify(store));
+    } catch (error) {
+      // Private mode or full storage: keep buffering in memory
+    }
+  }
+
+  // Apply change(store) to the latest stored state and save it
+  function withStore(change) {
+    const run = function () {
+      load();
+      const result = change(store);
+      save();
+      return result;
+    };
+    if (navigator.locks) return navigator.locks.request(LOCK_NAME, run);
+    return Promise.resolve(run());
+  }
+
+  // Read the token at send time: logging in from another tab rotates it
+  function csrfToken() {
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : config.csrfToken;
+  }
+
+  function pendingFor(game) {
+    if (!store.pending[game]) store.pending[game] = { correct: 0, total: 0 };
+    return store.pending[game];
+  }
+
+  function hasPending() {
+    return Object.keys(store.pending).length > 0;
+  }
+
+  // Move pending deltas into a numbered batch unless one is already waiting
+  function nextBatch() {
+    if (!store.inflight && hasPending()) {
+      store.seq += 1;
+      store.inflight = { seq: store.seq, games: store.pending };
+      store.pending = {};
+    }
+    return store.inflight;
+  }
+
+  function payload(batch) {
+    return JSON.stringify({ client: store.client, seq: batch.seq, games: batch.games });
+  }
+
+  async function flush() {
+    if (!config || sending) return;
+    sending = true;
+    try {
+      const batch = await withStore(nextBatch);
+      if (!batch) return;
+      const response = await fetch(config.endpoint, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-CSRFToken': csrfToken()
+        },
+        body: payload(batch)
+      });
+      // 400 means the batch itself is invalid and will never be accepted.
+      // Anything else (a 403 after the CSRF token rotated, a 401 until the
+      // user logs back in, a 5xx) keeps it for the next flush.
+      if (response.ok || response.status === 400) {
+        await withStore(function () {
+          if (store.inflight && store.inflight.seq === batch.seq) store.inflight = null;
+        });
+      }
+    } catch (error) {
+      console.error('Failed to sync stats:', error);
+    } finally {
+      sending = false;
+    }
+  }
+
+  // Last chance to send when the page is hidden or closed
+  function beacon() {
+    if (!config || !navigator.sendBeacon) return;
+    // The page may be gone before a lock is granted, so this runs unlocked
+    load();
+    const batch = nextBatch();
+    save();
+    if (!batch) return;
+    // Beacons can't set headers, so the CSRF token goes in the form body
+    const form = new FormData();
+    form.append('csrfmiddlewaretoken', csrfToken());
+    form.append('payload', payload(batch));
+    navigator.sendBeacon(config.endpoint, form);
+    // The batch stays in flight; if it did arrive, the resend is a no-op
+  }
+
+  return {
+    init: function (options) {
+      if (config) return;
+      config = options;
+      load();
+      setInterval(flush, options.interval || FLUSH_INTERVAL);
+      document.addEventListener('visibilitychange', function () {
+        if (document.visibilityState === 'hidden') beacon();
+      });
+      window.addEventListener('pagehide', beacon);
+      // Resend anything left over from the previous page
+      flush();
+    },
+
+    // Remember the values loaded from the server so unchanged ones aren't resent
+    seed: function (game, stats) {
+      snapshots[game] = {
+        streak: stats.streak,
+        bestStreak: stats.bestStreak,
+        difficulty: stats.difficulty
+      };
+    },
+
+    answer: function (game, correct) {
+      if (!config) return;
+      withStore(function () {
+        const delta = pendingFor(game);
+        delta.total += 1;
+        if (correct) delta.correct += 1;
+      });
+    },
+
+    // Start the game's totals again from zero, here and on the server
+    reset: function (game) {
+      if (!config) return;
+      withStore(function () {
+        const delta = pendingFor(game);
+        delta.correct = 0;
+        delta.total = 0;
+        delta.reset = true;
+      });
+    },
+
+    update: function (game, values) {
+      if (!config) return;
+      const previous = snapshots[game] || {};
+      const changed = Object.keys(values).filter(function (key) {
+        return values[key] !== undefined && values[key] !== previous[key];
+      });
+      if (!changed.length) return;
+      snapshots[game] = Object.assign({}, previous, values);
+      withStore(function () {
+        const delta = pendingFor(game);
+        changed.forEach(function (key) {
+          delta[key] = key === 'bestStreak' ? Math.max(delta.bestStreak || 0, values[key]) : values[key];
+        });
+      });
+    },
+
+    flush: flush
+  };
+})();
+
+// The user's stats, ranks and weekly progress for every game. Embedded in
+// the page by the server; fetched from the API only if it's missing.
+async function loadBootstrap() {
+  const embedded = document.getElementById('stats-bootstrap');
+  if (embedded) {
+    return JSON.parse(embedded.textContent);
+  }
+  const response = await fetch('/accounts/api/bootstrap/');
+  return response.json();
+}
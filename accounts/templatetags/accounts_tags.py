@@ -0,0 +1,16 @@
+from django import template
+from django.utils.html import json_script
+
+from accounts.bootstrap import build_bootstrap
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def stats_bootstrap(context):
+    """Embed the user's bootstrap payload as ``<script id="stats-bootstrap">`` JSON."""
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return ''
+    return json_script(build_bootstrap(user), 'stats-bootstrap')
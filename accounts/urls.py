@@ -11,11 +11,18 @@ urlpatterns = [
     path('verify/<uuid:token>/', views.verify_email, name='verify-email'),
     path('resend-verification/', views.resend_verification, name='resend-verification'),
     
-    # API endpoints for game stats
-    path('api/note-stats/', views.get_note_stats, name='get-note-stats'),
-    path('api/note-stats/update/', views.update_note_stats, name='update-note-stats'),
-    path('api/interval-stats/', views.get_interval_stats, name='get-interval-stats'),
-    path('api/interval-stats/update/', views.update_interval_stats, name='update-interval-stats'),
-    path('api/chord-stats/', views.get_chord_stats, name='get-chord-stats'),
-    path('api/chord-stats/update/', views.update_chord_stats, name='update-chord-stats'),
+    # Everything a game page needs on load, in one request
+    path('api/bootstrap/', views.bootstrap, name='bootstrap'),
+    
+    # API endpoints for game stats: batched deltas, and GET/POST per game
+    path('api/stats/sync/', views.sync_stats, name='sync-stats'),
+    path('api/stats/<str:game>/', views.game_stats, name='game-stats'),
+    
+    # Old per-game URLs, still used by cached pages
+    path('api/note-stats/', views.game_stats, {'game': 'note'}, name='get-note-stats'),
+    path('api/note-stats/update/', views.update_game_stats, {'game': 'note'}, name='update-note-stats'),
+    path('api/interval-stats/', views.game_stats, {'game': 'interval'}, name='get-interval-stats'),
+    path('api/interval-stats/update/', views.update_game_stats, {'game': 'interval'}, name='update-interval-stats'),
+    path('api/chord-stats/', views.game_stats, {'game': 'chord'}, name='get-chord-stats'),
+    path('api/chord-stats/update/', views.update_game_stats, {'game': 'chord'}, name='update-chord-stats'),
 ]
@@ -1,22 +1,44 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from leaderboard import caching as leaderboard_cache
+from . import outbox
+from .bootstrap import build_bootstrap
 from .forms import RegistrationForm
-from .models import EmailVerification
+from .models import EmailVerification, GameStats, StatsSyncClient, UserProfile
+import hashlib
 import json
 
+GAMES = [game for game, _ in GameStats.GAME_CHOICES]
+
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+# Most answers one sync batch may carry for a game
+MAX_SYNC_ANSWERS = 10000
+
+# Stats API keys and the GameStats fields they map to
+STATS_API_FIELDS = {
+    'correct': 'total_correct',
+    'total': 'total_attempts',
+    'streak': 'current_streak',
+    'bestStreak': 'best_streak',
+    'difficulty': 'difficulty',
+}
+
 
 def send_verification_email(user, request):
-    """Send email verification link to user."""
+    """Queue an email verification link for the user."""
     # Create or get verification token
     verification, created = EmailVerification.objects.get_or_create(user=user)
     if not created:
@@ -35,19 +57,17 @@ def send_verification_email(user, request):
     })
     plain_message = strip_tags(html_message)
     
-    # Send email
+    # Queue the email; it is sent outside the request by accounts.outbox
     try:
-        send_mail(
+        outbox.enqueue(
             subject='Verify your R.I.T.H.M account',
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
+            body=plain_message,
+            to=user.email,
+            html_body=html_message,
         )
         return True
     except Exception as e:
-        print(f"Failed to send verification email: {e}")
+        print(f"Failed to queue verification email: {e}")
         return False
 
 
@@ -146,8 +166,8 @@ def login_view(request):
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
             username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
+            # The form already authenticated; don't hash the password twice
+            user = form.get_user()
             if user is not None:
                 login(request, user)
                 messages.success(request, f'Welcome back, {username}!')
@@ -172,182 +192,208 @@ def logout_view(request):
 def profile_view(request):
     """Display user profile with stats."""
     return render(request, 'accounts/profile.html', {
-        'profile': request.user.profile
+        'profile': UserProfile.for_user(request.user),
+        'stats': GameStats.for_user(request.user),
     })
 
 
-@require_POST
-def update_note_stats(request):
-    """API endpoint to update note identification stats."""
-    if not request.user.is_authenticated:
-        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+# Private per-user data: let the browser keep it but revalidate each time
+STATS_CACHE_CONTROL = {'private': True, 'no_cache': True}
+
+
+def _stats_etag(user, game, stats):
+    # Every write stamps updated_at, so all workers agree on the version
+    stamp = stats.updated_at.timestamp() if stats else 0
+    return quote_etag(f'{settings.DEPLOY_VERSION}:stats:{user.id}:{game}:{stamp}')
+
+
+def _stats_response(request, user, game, stats):
+    """The stats payload for ``stats`` (None if there's no row yet), or a 304."""
+    etag = _stats_etag(user, game, stats)
+    response = leaderboard_cache.not_modified(request, etag, **STATS_CACHE_CONTROL)
+    if response is not None:
+        return response
     
-    try:
-        data = json.loads(request.body)
-        profile = request.user.profile
-        
-        # Update stats
-        if 'correct' in data:
-            profile.note_total_correct = data['correct']
-        if 'total' in data:
-            profile.note_total_attempts = data['total']
-        if 'streak' in data:
-            profile.note_current_streak = data['streak']
-        if 'bestStreak' in data:
-            if data['bestStreak'] > profile.note_best_streak:
-                profile.note_best_streak = data['bestStreak']
-        if 'difficulty' in data:
-            profile.note_difficulty = data['difficulty']
-        
-        profile.save()
-        
-        return JsonResponse({
-            'success': True,
-            'stats': {
-                'correct': profile.note_total_correct,
-                'total': profile.note_total_attempts,
-                'streak': profile.note_current_streak,
-                'bestStreak': profile.note_best_streak,
-                'accuracy': profile.note_accuracy,
-                'difficulty': profile.note_difficulty
-            }
-        })
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if stats is None:
+        stats = GameStats(user=user, game=game)
+    response = JsonResponse({
+        'authenticated': True,
+        'stats': stats.as_dict()
+    })
+    return leaderboard_cache.set_validators(response, etag, **STATS_CACHE_CONTROL)
 
 
-def get_note_stats(request):
-    """API endpoint to get note identification stats."""
+def _stats_values(request):
+    """GameStats fields and values sent in a stats update body."""
+    data = json.loads(request.body)
+    return {field: data[key] for key, field in STATS_API_FIELDS.items() if key in data}
+
+
+def _read_stats(request, game):
     if not request.user.is_authenticated:
         return JsonResponse({'authenticated': False})
     
-    profile = request.user.profile
-    return JsonResponse({
-        'authenticated': True,
-        'stats': {
-            'correct': profile.note_total_correct,
-            'total': profile.note_total_attempts,
-            'streak': profile.note_current_streak,
-            'bestStreak': profile.note_best_streak,
-            'accuracy': profile.note_accuracy,
-            'difficulty': profile.note_difficulty
-        }
-    })
+    stats = GameStats.objects.filter(user=request.user, game=game).first()
+    return _stats_response(request, request.user, game, stats)
 
 
-@require_POST
-def update_interval_stats(request):
-    """API endpoint to update interval training stats."""
+def _update_stats(request, game):
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
     
     try:
-        data = json.loads(request.body)
-        profile = request.user.profile
-        
-        # Update stats
-        if 'correct' in data:
-            profile.interval_total_correct = data['correct']
-        if 'total' in data:
-            profile.interval_total_attempts = data['total']
-        if 'streak' in data:
-            profile.interval_current_streak = data['streak']
-        if 'bestStreak' in data:
-            if data['bestStreak'] > profile.interval_best_streak:
-                profile.interval_best_streak = data['bestStreak']
-        if 'difficulty' in data:
-            profile.interval_difficulty = data['difficulty']
-        
-        profile.save()
+        # One upsert: only the sent columns change and best streak is maxed in SQL
+        stats = GameStats.objects.record(request.user, game, **_stats_values(request))
         
         return JsonResponse({
             'success': True,
-            'stats': {
-                'correct': profile.interval_total_correct,
-                'total': profile.interval_total_attempts,
-                'streak': profile.interval_current_streak,
-                'bestStreak': profile.interval_best_streak,
-                'accuracy': profile.interval_accuracy,
-                'difficulty': profile.interval_difficulty
-            }
+            'stats': stats.as_dict()
         })
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
-def get_interval_stats(request):
-    """API endpoint to get interval training stats."""
-    if not request.user.is_authenticated:
-        return JsonResponse({'authenticated': False})
+def _clean_delta(game, delta):
+    """Validate one game's buffered changes from a sync batch.
+    
+    Returns ``(changes, None)`` as keyword arguments for
+    ``GameStats.objects.record()``, or ``(None, error)``.
+    """
+    if game not in GAMES:
+        return None, 'Invalid game'
+    if not isinstance(delta, dict):
+        return None, f'Invalid stats for {game}'
+    
+    counts = {key: delta.get(key, 0) for key in ('correct', 'total', 'streak', 'bestStreak')}
+    if not all(isinstance(value, int) and not isinstance(value, bool) and value >= 0 for value in counts.values()):
+        return None, f'Invalid stats for {game}'
+    if counts['correct'] > counts['total'] or counts['total'] > MAX_SYNC_ANSWERS:
+        return None, f'Invalid stats for {game}'
+    
+    values = {}
+    if 'streak' in delta:
+        values['current_streak'] = counts['streak']
+    if 'bestStreak' in delta:
+        values['best_streak'] = counts['bestStreak']
+    if 'difficulty' in delta:
+        if delta['difficulty'] not in DIFFICULTIES:
+            return None, 'Invalid difficulty'
+        values['difficulty'] = delta['difficulty']
+    
+    if 'reset' in delta:
+        if not isinstance(delta['reset'], bool):
+            return None, f'Invalid stats for {game}'
+        if delta['reset']:
+            values['reset'] = True
+    
+    increments = {}
+    if counts['total']:
+        increments = {'total_correct': counts['correct'], 'total_attempts': counts['total']}
+    return dict(values, increments=increments), None
+
 
-    profile = request.user.profile
+def _clean_sync_batch(request):
+    """Parse and validate a sync batch.
+    
+    Returns ``((client_id, seq, changes), None)``, or ``(None, error)``.
+    """
+    if request.content_type == 'application/json':
+        data = json.loads(request.body)
+    else:
+        # navigator.sendBeacon posts a form so the CSRF token can ride along
+        data = json.loads(request.POST.get('payload', ''))
+    
+    client_id = data.get('client')
+    seq = data.get('seq')
+    games = data.get('games')
+    if not isinstance(client_id, str) or not 0 < len(client_id) <= 64:
+        return None, 'Invalid client'
+    if not isinstance(seq, int) or isinstance(seq, bool) or seq < 1:
+        return None, 'Invalid sequence number'
+    if not isinstance(games, dict) or not games:
+        return None, 'No stats to sync'
+    
+    changes = {}
+    for game, delta in games.items():
+        cleaned, error = _clean_delta(game, delta)
+        if error:
+            return None, error
+        changes[game] = cleaned
+    return (client_id, seq, changes), None
+
+
+def _apply_sync_batch(user, client_id, seq, changes):
+    """Apply cleaned deltas unless the batch was seen already; returns ``(applied, stats)``."""
+    with transaction.atomic():
+        applied = StatsSyncClient.objects.advance(user, client_id, seq)
+        if applied:
+            stats = {
+                game: GameStats.objects.record(user, game, **cleaned)
+                for game, cleaned in changes.items()
+            }
+    if not applied:
+        stats = {s.game: s for s in GameStats.objects.filter(user=user, game__in=changes)}
+    return applied, stats
+
+
+def _sync_response(seq, applied, stats):
     return JsonResponse({
-        'authenticated': True,
-        'stats': {
-            'correct': profile.interval_total_correct,
-            'total': profile.interval_total_attempts,
-            'streak': profile.interval_current_streak,
-            'bestStreak': profile.interval_best_streak,
-            'accuracy': profile.interval_accuracy,
-            'difficulty': profile.interval_difficulty
-        }
+        'success': True,
+        'applied': applied,
+        'seq': seq,
+        'stats': {game: s.as_dict() for game, s in stats.items()}
     })
 
 
 @require_POST
-def update_chord_stats(request):
-    """API endpoint to update chord identification stats."""
+def sync_stats(request):
+    """API endpoint applying a batch of buffered stats deltas for several games.
+    
+    Body: ``{"client": id, "seq": n, "games": {game: {correct, total,
+    streak, bestStreak, difficulty, reset}}}`` where correct/total are added
+    to the stored totals, after zeroing them if ``reset`` is true. Batches are numbered per client and a batch that was
+    already applied is acknowledged without being applied again.
+    """
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
-
+    
     try:
-        data = json.loads(request.body)
-        profile = request.user.profile
-
-        # Update stats
-        if 'correct' in data:
-            profile.chord_total_correct = data['correct']
-        if 'total' in data:
-            profile.chord_total_attempts = data['total']
-        if 'streak' in data:
-            profile.chord_current_streak = data['streak']
-        if 'bestStreak' in data:
-            if data['bestStreak'] > profile.chord_best_streak:
-                profile.chord_best_streak = data['bestStreak']
-        if 'difficulty' in data:
-            profile.chord_difficulty = data['difficulty']
-
-        profile.save()
-
-        return JsonResponse({
-            'success': True,
-            'stats': {
-                'correct': profile.chord_total_correct,
-                'total': profile.chord_total_attempts,
-                'streak': profile.chord_current_streak,
-                'bestStreak': profile.chord_best_streak,
-                'accuracy': profile.chord_accuracy,
-                'difficulty': profile.chord_difficulty
-            }
-        })
+        batch, error = _clean_sync_batch(request)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        
+        client_id, seq, changes = batch
+        applied, stats = _apply_sync_batch(request.user, client_id, seq, changes)
+        return _sync_response(seq, applied, stats)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
-def get_chord_stats(request):
-    """API endpoint to get chord identification stats."""
-    if not request.user.is_authenticated:
-        return JsonResponse({'authenticated': False})
+def _bootstrap_response(request, payload):
+    response = JsonResponse(payload)
+    response['ETag'] = quote_etag(hashlib.md5(response.content).hexdigest())
+    patch_cache_control(response, **STATS_CACHE_CONTROL)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
 
-    profile = request.user.profile
-    return JsonResponse({
-        'authenticated': True,
-        'stats': {
-            'correct': profile.chord_total_correct,
-            'total': profile.chord_total_attempts,
-            'streak': profile.chord_current_streak,
-            'bestStreak': profile.chord_best_streak,
-            'accuracy': profile.chord_accuracy,
-            'difficulty': profile.chord_difficulty
-        }
-    })
+
+@require_GET
+def bootstrap(request):
+    """API endpoint returning every game's stats, ranks and weekly progress at once."""
+    return _bootstrap_response(request, build_bootstrap(request.user))
+
+
+@require_http_methods(['GET', 'POST'])
+def game_stats(request, game):
+    """API endpoint to get (GET) or update (POST) a user's stats for one game."""
+    if game not in GAMES:
+        return JsonResponse({'success': False, 'error': 'Invalid game'}, status=404)
+    
+    if request.method == 'POST':
+        return _update_stats(request, game)
+    return _read_stats(request, game)
+
+
+@require_POST
+def update_game_stats(request, game):
+    """POST-only alias of game_stats, kept for the old per-game update URLs."""
+    return game_stats(request, game)
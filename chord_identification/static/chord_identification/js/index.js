@@ -0,0 +1,396 @@
+// Game State
+let state = {
+  correct: 0,
+  total: 0,
+  streak: 0,
+  bestStreak: 0,
+  difficulty: 'beginner',
+  playStyle: 'harmonic',
+  currentChord: null,
+  currentRootNote: null,
+  isPlaying: false,
+  canAnswer: true
+};
+
+// Chord definitions (semitones from root)
+const chords = {
+  'major': [0, 4, 7],           // Root, Major 3rd, Perfect 5th
+  'minor': [0, 3, 7],           // Root, Minor 3rd, Perfect 5th
+  'diminished': [0, 3, 6],      // Root, Minor 3rd, Diminished 5th
+  'augmented': [0, 4, 8],       // Root, Major 3rd, Augmented 5th
+  'major7': [0, 4, 7, 11],      // Root, M3, P5, Major 7th
+  'minor7': [0, 3, 7, 10],      // Root, m3, P5, Minor 7th
+  'dominant7': [0, 4, 7, 10]    // Root, M3, P5, Minor 7th
+};
+
+// Chord names for display
+const chordNames = {
+  'major': 'Major',
+  'minor': 'Minor',
+  'diminished': 'Diminished',
+  'augmented': 'Augmented',
+  'major7': 'Major 7th',
+  'minor7': 'Minor 7th',
+  'dominant7': 'Dominant 7th'
+};
+
+// Chord sets by difficulty
+const chordSets = {
+  beginner: ['major', 'minor'],
+  intermediate: ['major', 'minor', 'diminished', 'augmented'],
+  advanced: ['major', 'minor', 'diminished', 'augmented', 'major7', 'minor7', 'dominant7']
+};
+
+// Audio context - created and resumed on first user gesture
+let audioCtx = null;
+
+function getAudioContext() {
+  if (!audioCtx) {
+    audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+  }
+  return audioCtx;
+}
+
+// Warm up AudioContext on first click (capture phase fires before button handlers)
+document.addEventListener('click', function initAudioOnGesture() {
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    ctx.resume();
+  }
+  document.removeEventListener('click', initAudioOnGesture, true);
+}, true);
+
+// Play a single note using Web Audio API
+function playNote(frequency, startTime, duration, volume = 0.25) {
+  const ctx = getAudioContext();
+
+  const oscillator = ctx.createOscillator();
+  const gainNode = ctx.createGain();
+
+  oscillator.type = 'sine';
+  oscillator.frequency.value = frequency;
+
+  gainNode.gain.setValueAtTime(0, startTime);
+  gainNode.gain.linearRampToValueAtTime(volume, startTime + 0.05);
+  gainNode.gain.setValueAtTime(volume, startTime + duration - 0.15);
+  gainNode.gain.linearRampToValueAtTime(0, startTime + duration);
+
+  oscillator.connect(gainNode);
+  gainNode.connect(ctx.destination);
+
+  oscillator.start(startTime);
+  oscillator.stop(startTime + duration);
+}
+
+// Convert MIDI note number to frequency
+function midiToFreq(midiNote) {
+  return 440 * Math.pow(2, (midiNote - 69) / 12);
+}
+
+// Get MIDI note number from note name
+function noteToMidi(note) {
+  const notes = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'];
+  const octave = parseInt(note.slice(-1));
+  const noteName = note.slice(0, -1);
+  const noteIndex = notes.indexOf(noteName);
+
+  return (octave + 1) * 12 + noteIndex;
+}
+
+// Load stats from server (if we have a chord stats API)
+async function loadStats() {
+  if (!isAuthenticated) return;
+
+  try {
+    const bootstrap = await loadBootstrap();
+    const data = { authenticated: bootstrap.authenticated, stats: bootstrap.stats && bootstrap.stats.chord };
+
+    if (data.authenticated && data.stats) {
+      StatsSync.seed('chord', data.stats);
+      state.correct = data.stats.correct || 0;
+      state.total = data.stats.total || 0;
+      state.streak = data.stats.streak || 0;
+      state.bestStreak = data.stats.bestStreak || 0;
+
+      if (data.stats.difficulty) {
+        state.difficulty = data.stats.difficulty;
+      }
+
+      updateStatsDisplay();
+    }
+  } catch (error) {
+    // API might not exist yet, that's okay
+    console.log('Chord stats API not available yet');
+  }
+}
+
+// Queue streak and difficulty changes; answers are queued in checkAnswer()
+// and StatsSync sends both to the server in periodic batches
+function saveStats() {
+  if (!isAuthenticated) return;
+
+  StatsSync.update('chord', {
+    streak: state.streak,
+    bestStreak: state.bestStreak,
+    difficulty: state.difficulty
+  });
+}
+
+// Set difficulty level
+function setDifficulty(level) {
+  state.difficulty = level;
+
+  document.querySelectorAll('.difficulty-btn').forEach(btn => {
+    btn.classList.toggle('active', btn.dataset.level === level);
+  });
+
+  // Show/hide appropriate chord buttons
+  document.querySelectorAll('.chord-buttons').forEach(group => {
+    group.style.display = 'none';
+  });
+  document.getElementById(level + '-chords').style.display = 'flex';
+
+  startNewRound();
+}
+
+// Set play style
+function setPlayStyle(style) {
+  state.playStyle = style;
+
+  document.querySelectorAll('[data-style]').forEach(btn => {
+    btn.classList.toggle('active', btn.dataset.style === style);
+  });
+}
+
+// Generate a new chord (state only, no UI changes)
+function generateNewChord() {
+  const availableChords = chordSets[state.difficulty];
+  state.currentChord = availableChords[Math.floor(Math.random() * availableChords.length)];
+
+  // Random root note (MIDI notes 48-60, C3-C4)
+  const rootNotes = ['C3', 'D3', 'E3', 'F3', 'G3', 'A3', 'B3', 'C4'];
+  state.currentRootNote = rootNotes[Math.floor(Math.random() * rootNotes.length)];
+}
+
+// Reset UI for the next round
+function resetRound() {
+  document.getElementById('feedback').textContent = 'What chord do you hear?';
+  document.getElementById('feedback').className = 'feedback-text';
+
+  state.canAnswer = true;
+}
+
+// Start a completely new round (generate chord + reset UI immediately)
+function startNewRound() {
+  generateNewChord();
+  resetRound();
+}
+
+// Play the current chord
+async function playCurrentChord() {
+  if (state.isPlaying) return;
+
+  // Resume audio context if suspended (must await before scheduling)
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    await ctx.resume();
+  }
+
+  state.isPlaying = true;
+
+  const playBtn = document.getElementById('play-chord');
+  const replayBtn = document.getElementById('replay-chord');
+  playBtn.disabled = true;
+  replayBtn.disabled = true;
+
+  const rootMidi = noteToMidi(state.currentRootNote);
+  const chordIntervals = chords[state.currentChord];
+  const now = ctx.currentTime;
+
+  if (state.playStyle === 'harmonic') {
+    // Play all notes together
+    const duration = 1.2;
+    chordIntervals.forEach(interval => {
+      const freq = midiToFreq(rootMidi + interval);
+      playNote(freq, now, duration, 0.2);
+    });
+
+    setTimeout(() => {
+      playBtn.disabled = false;
+      replayBtn.disabled = false;
+      state.isPlaying = false;
+    }, 1400);
+  } else {
+    // Arpeggio - play notes one by one
+    const noteDuration = 0.4;
+    const gap = 0.35;
+
+    chordIntervals.forEach((interval, i) => {
+      const freq = midiToFreq(rootMidi + interval);
+      playNote(freq, now + (i * gap), noteDuration, 0.25);
+    });
+
+    const totalDuration = (chordIntervals.length * gap + noteDuration) * 1000 + 200;
+    setTimeout(() => {
+      playBtn.disabled = false;
+      replayBtn.disabled = false;
+      state.isPlaying = false;
+    }, totalDuration);
+  }
+}
+
+// Check answer
+function checkAnswer(selectedChord) {
+  if (!state.canAnswer || state.isPlaying) return;
+
+  state.canAnswer = false;
+  const isCorrect = selectedChord === state.currentChord;
+
+  state.total++;
+  StatsSync.answer('chord', isCorrect);
+
+  const feedbackEl = document.getElementById('feedback');
+  const selectedBtn = document.querySelector(`#${state.difficulty}-chords [data-chord="${selectedChord}"]`);
+
+  if (isCorrect) {
+    state.correct++;
+    state.streak++;
+    if (state.streak > state.bestStreak) {
+      state.bestStreak = state.streak;
+    }
+
+    feedbackEl.innerHTML = '<i class="fas fa-check"></i> Correct!';
+    feedbackEl.className = 'feedback-text feedback-correct';
+
+    if (selectedBtn) {
+      selectedBtn.classList.add('correct');
+      setTimeout(() => selectedBtn.classList.remove('correct'), 500);
+    }
+
+    // Generate next chord immediately so replay always matches expected answer
+    generateNewChord();
+    setTimeout(resetRound, 800);
+  } else {
+    state.streak = 0;
+
+    const correctName = chordNames[state.currentChord];
+
+    feedbackEl.innerHTML = `<i class="fas fa-times"></i> It was ${correctName}`;
+    feedbackEl.className = 'feedback-text feedback-incorrect';
+
+    if (selectedBtn) {
+      selectedBtn.classList.add('incorrect');
+      setTimeout(() => selectedBtn.classList.remove('incorrect'), 500);
+    }
+
+    // Highlight the correct answer
+    const correctBtn = document.querySelector(`#${state.difficulty}-chords [data-chord="${state.currentChord}"]`);
+    if (correctBtn) {
+      correctBtn.classList.add('correct');
+      setTimeout(() => correctBtn.classList.remove('correct'), 1500);
+    }
+
+    // Generate next chord immediately so replay always matches expected answer
+    generateNewChord();
+    setTimeout(resetRound, 1500);
+  }
+
+  updateStatsDisplay();
+  saveStats();
+}
+
+// Update stats display
+function updateStatsDisplay() {
+  document.getElementById('score').textContent = state.correct;
+
+  const streakEl = document.getElementById('streak');
+  streakEl.innerHTML = state.streak + ' <i class="fas fa-fire" style="color: #f59e0b;"></i>';
+  streakEl.classList.toggle('streak-fire', state.streak >= 5);
+
+  document.getElementById('best-streak').textContent = state.bestStreak;
+
+  const accuracy = state.total > 0 ? Math.round((state.correct / state.total) * 100) : 0;
+  document.getElementById('accuracy').textContent = accuracy + '%';
+
+  // Show submit button when minimum attempts reached
+  const submitSection = document.getElementById('submit-section');
+  if (state.total >= 10 && isAuthenticated) {
+    submitSection.style.display = 'block';
+  }
+}
+
+// Submit score to leaderboard
+async function submitToLeaderboard() {
+  if (!isAuthenticated || state.total < 10) return;
+
+  const btn = document.getElementById('submit-score');
+  btn.disabled = true;
+  btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Submitting...';
+
+  try {
+    const response = await fetch('/leaderboard/api/submit/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': csrfToken
+      },
+      body: JSON.stringify({
+        game: 'chord',
+        difficulty: state.difficulty,
+        correct: state.correct,
+        total: state.total,
+        bestStreak: state.bestStreak
+      })
+    });
+
+    const data = await response.json();
+
+    if (data.success) {
+      btn.innerHTML = '<i class="fas fa-check"></i> Submitted! Rank #' + data.rank;
+      btn.classList.remove('btn-success');
+      btn.classList.add('btn-outline-success');
+
+      // Reset for new session
+      setTimeout(() => {
+        state.correct = 0;
+        state.total = 0;
+        state.streak = 0;
+        StatsSync.reset('chord');
+        updateStatsDisplay();
+        btn.innerHTML = '<i class="fas fa-trophy"></i> Submit to Leaderboard';
+        btn.classList.remove('btn-outline-success');
+        btn.classList.add('btn-success');
+        btn.disabled = false;
+        document.getElementById('submit-section').style.display = 'none';
+      }, 3000);
+    } else {
+      btn.innerHTML = '<i class="fas fa-times"></i> ' + (data.error || 'Error');
+      btn.disabled = false;
+    }
+  } catch (error) {
+    btn.innerHTML = '<i class="fas fa-times"></i> Error submitting';
+    btn.disabled = false;
+  }
+}
+
+// Initialize when DOM is ready
+document.addEventListener('DOMContentLoaded', function() {
+  // Attach click handlers to ALL chord buttons
+  document.querySelectorAll('.chord-btn').forEach(btn => {
+    btn.addEventListener('click', function() {
+      checkAnswer(this.dataset.chord);
+    });
+  });
+
+  // Attach click handlers to play buttons
+  document.getElementById('play-chord').addEventListener('click', playCurrentChord);
+  document.getElementById('replay-chord').addEventListener('click', playCurrentChord);
+
+  // Set initial difficulty
+  setDifficulty(state.difficulty);
+
+  // Load saved stats
+  loadStats();
+
+  updateStatsDisplay();
+});
@@ -0,0 +1,14 @@
+"""
+gunicorn settings, read automatically when gunicorn starts in this directory.
+
+``SERVER_MODE=asgi`` serves ``rithm.asgi`` with uvicorn workers; anything
+else keeps the sync ``rithm.wsgi`` workers. Worker count comes from
+``WEB_CONCURRENCY`` as usual.
+"""
+import os
+
+if os.environ.get('SERVER_MODE', 'wsgi').lower() == 'asgi':
+    wsgi_app = 'rithm.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'rithm.wsgi:application'
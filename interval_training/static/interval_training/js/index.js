@@ -0,0 +1,361 @@
+// Game State
+let state = {
+  correct: 0,
+  total: 0,
+  streak: 0,
+  bestStreak: 0,
+  difficulty: 'beginner',
+  direction: 'ascending',
+  currentInterval: null,
+  currentRootNote: null,
+  isPlaying: false,
+  canAnswer: true
+};
+
+// Interval definitions (semitones)
+const intervals = {
+  'unison': 0,
+  'minor-second': 1,
+  'major-second': 2,
+  'minor-third': 3,
+  'major-third': 4,
+  'perfect-fourth': 5,
+  'tritone': 6,
+  'perfect-fifth': 7,
+  'minor-sixth': 8,
+  'major-sixth': 9,
+  'minor-seventh': 10,
+  'major-seventh': 11,
+  'octave': 12
+};
+
+// Interval sets by difficulty
+const intervalSets = {
+  beginner: ['unison', 'perfect-fourth', 'perfect-fifth', 'octave'],
+  intermediate: ['unison', 'minor-second', 'major-second', 'minor-third', 'major-third', 'perfect-fourth', 'tritone', 'perfect-fifth', 'octave'],
+  advanced: Object.keys(intervals)
+};
+
+// Audio context - created and resumed on first user gesture
+let audioCtx = null;
+
+function getAudioContext() {
+  if (!audioCtx) {
+    audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+  }
+  return audioCtx;
+}
+
+// Warm up AudioContext on first click (capture phase fires before button handlers)
+document.addEventListener('click', function initAudioOnGesture() {
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    ctx.resume();
+  }
+  document.removeEventListener('click', initAudioOnGesture, true);
+}, true);
+
+// Play a single note using Web Audio API (simpler than Tone.js)
+function playNote(frequency, startTime, duration) {
+  const ctx = getAudioContext();
+
+  const oscillator = ctx.createOscillator();
+  const gainNode = ctx.createGain();
+
+  oscillator.type = 'sine';
+  oscillator.frequency.value = frequency;
+
+  gainNode.gain.setValueAtTime(0, startTime);
+  gainNode.gain.linearRampToValueAtTime(0.3, startTime + 0.05);
+  gainNode.gain.setValueAtTime(0.3, startTime + duration - 0.1);
+  gainNode.gain.linearRampToValueAtTime(0, startTime + duration);
+
+  oscillator.connect(gainNode);
+  gainNode.connect(ctx.destination);
+
+  oscillator.start(startTime);
+  oscillator.stop(startTime + duration);
+}
+
+// Convert note name to frequency
+function noteToFreq(note) {
+  const notes = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'];
+  const octave = parseInt(note.slice(-1));
+  const noteName = note.slice(0, -1);
+  const noteIndex = notes.indexOf(noteName);
+
+  // A4 = 440Hz, A4 is index 9 in octave 4
+  const semitonesFromA4 = (octave - 4) * 12 + (noteIndex - 9);
+  return 440 * Math.pow(2, semitonesFromA4 / 12);
+}
+
+// Load stats from server
+async function loadStats() {
+  if (!isAuthenticated) return;
+
+  try {
+    const bootstrap = await loadBootstrap();
+    const data = { authenticated: bootstrap.authenticated, stats: bootstrap.stats && bootstrap.stats.interval };
+
+    if (data.authenticated && data.stats) {
+      StatsSync.seed('interval', data.stats);
+      state.correct = data.stats.correct || 0;
+      state.total = data.stats.total || 0;
+      state.streak = data.stats.streak || 0;
+      state.bestStreak = data.stats.bestStreak || 0;
+
+      if (data.stats.difficulty) {
+        state.difficulty = data.stats.difficulty;
+      }
+
+      updateStatsDisplay();
+    }
+  } catch (error) {
+    console.error('Failed to load stats:', error);
+  }
+}
+
+// Queue streak and difficulty changes; answers are queued in checkAnswer()
+// and StatsSync sends both to the server in periodic batches
+function saveStats() {
+  if (!isAuthenticated) return;
+
+  StatsSync.update('interval', {
+    streak: state.streak,
+    bestStreak: state.bestStreak,
+    difficulty: state.difficulty
+  });
+}
+
+// Set difficulty level
+function setDifficulty(level) {
+  state.difficulty = level;
+
+  document.querySelectorAll('.difficulty-btn').forEach(btn => {
+    btn.classList.toggle('active', btn.dataset.level === level);
+  });
+
+  // Show/hide appropriate interval buttons
+  document.querySelectorAll('.interval-buttons').forEach(group => {
+    group.style.display = 'none';
+  });
+  document.getElementById(level + '-intervals').style.display = 'flex';
+
+  generateNewInterval();
+}
+
+// Set direction
+function setDirection(direction) {
+  state.direction = direction;
+
+  document.querySelectorAll('[data-direction]').forEach(btn => {
+    btn.classList.toggle('active', btn.dataset.direction === direction);
+  });
+}
+
+// Generate a new interval
+function generateNewInterval() {
+  const availableIntervals = intervalSets[state.difficulty];
+  state.currentInterval = availableIntervals[Math.floor(Math.random() * availableIntervals.length)];
+
+  // Random root note
+  const rootNotes = ['C4', 'D4', 'E4', 'F4', 'G4'];
+  state.currentRootNote = rootNotes[Math.floor(Math.random() * rootNotes.length)];
+
+  document.getElementById('feedback').textContent = 'What interval do you hear?';
+  document.getElementById('feedback').className = 'feedback-text';
+
+  state.canAnswer = true;
+}
+
+// Play the current interval
+async function playCurrentInterval() {
+  if (state.isPlaying) return;
+
+  // Resume audio context if suspended (must await before scheduling)
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    await ctx.resume();
+  }
+
+  state.isPlaying = true;
+
+  const playBtn = document.getElementById('play-interval');
+  const replayBtn = document.getElementById('replay-interval');
+  playBtn.disabled = true;
+  replayBtn.disabled = true;
+
+  const rootFreq = noteToFreq(state.currentRootNote);
+  const semitones = intervals[state.currentInterval];
+  const secondFreq = rootFreq * Math.pow(2, semitones / 12);
+
+  const now = ctx.currentTime;
+  const noteDuration = 0.5;
+  const gap = 0.6;
+
+  if (state.direction === 'ascending') {
+    playNote(rootFreq, now, noteDuration);
+    playNote(secondFreq, now + gap, noteDuration);
+  } else if (state.direction === 'descending') {
+    playNote(secondFreq, now, noteDuration);
+    playNote(rootFreq, now + gap, noteDuration);
+  } else {
+    // Harmonic - play together
+    playNote(rootFreq, now, 0.8);
+    playNote(secondFreq, now, 0.8);
+  }
+
+  // Re-enable buttons after playing
+  const totalDuration = state.direction === 'harmonic' ? 1000 : 1400;
+  setTimeout(() => {
+    playBtn.disabled = false;
+    replayBtn.disabled = false;
+    state.isPlaying = false;
+  }, totalDuration);
+}
+
+// Check answer
+function checkAnswer(selectedInterval) {
+  if (!state.canAnswer || state.isPlaying) return;
+
+  state.canAnswer = false;
+  const isCorrect = selectedInterval === state.currentInterval;
+
+  state.total++;
+  StatsSync.answer('interval', isCorrect);
+
+  const feedbackEl = document.getElementById('feedback');
+  const selectedBtn = document.querySelector(`#${state.difficulty}-intervals [data-interval="${selectedInterval}"]`);
+
+  if (isCorrect) {
+    state.correct++;
+    state.streak++;
+    if (state.streak > state.bestStreak) {
+      state.bestStreak = state.streak;
+    }
+
+    feedbackEl.innerHTML = '<i class="fas fa-check"></i> Correct!';
+    feedbackEl.className = 'feedback-text feedback-correct';
+
+    if (selectedBtn) {
+      selectedBtn.classList.add('correct');
+      setTimeout(() => selectedBtn.classList.remove('correct'), 500);
+    }
+
+    setTimeout(generateNewInterval, 800);
+  } else {
+    state.streak = 0;
+
+    const correctBtn = document.querySelector(`#${state.difficulty}-intervals [data-interval="${state.currentInterval}"]`);
+    const correctName = correctBtn ? correctBtn.textContent : state.currentInterval;
+
+    feedbackEl.innerHTML = `<i class="fas fa-times"></i> It was ${correctName}`;
+    feedbackEl.className = 'feedback-text feedback-incorrect';
+
+    if (selectedBtn) {
+      selectedBtn.classList.add('incorrect');
+      setTimeout(() => selectedBtn.classList.remove('incorrect'), 500);
+    }
+
+    setTimeout(generateNewInterval, 1500);
+  }
+
+  updateStatsDisplay();
+  saveStats();
+}
+
+// Update stats display
+function updateStatsDisplay() {
+  document.getElementById('score').textContent = state.correct;
+
+  const streakEl = document.getElementById('streak');
+  streakEl.innerHTML = state.streak + ' <i class="fas fa-fire" style="color: #f59e0b;"></i>';
+  streakEl.classList.toggle('streak-fire', state.streak >= 5);
+
+  document.getElementById('best-streak').textContent = state.bestStreak;
+
+  const accuracy = state.total > 0 ? Math.round((state.correct / state.total) * 100) : 0;
+  document.getElementById('accuracy').textContent = accuracy + '%';
+
+  // Show submit button when minimum attempts reached
+  const submitSection = document.getElementById('submit-section');
+  if (state.total >= 10 && isAuthenticated) {
+    submitSection.style.display = 'block';
+  }
+}
+
+// Submit score to leaderboard
+async function submitToLeaderboard() {
+  if (!isAuthenticated || state.total < 10) return;
+
+  const btn = document.getElementById('submit-score');
+  btn.disabled = true;
+  btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Submitting...';
+
+  try {
+    const response = await fetch('/leaderboard/api/submit/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': csrfToken
+      },
+      body: JSON.stringify({
+        game: 'interval',
+        difficulty: state.difficulty,
+        correct: state.correct,
+        total: state.total,
+        bestStreak: state.bestStreak
+      })
+    });
+
+    const data = await response.json();
+
+    if (data.success) {
+      btn.innerHTML = '<i class="fas fa-check"></i> Submitted! Rank #' + data.rank;
+      btn.classList.remove('btn-success');
+      btn.classList.add('btn-outline-success');
+
+      // Reset for new session
+      setTimeout(() => {
+        state.correct = 0;
+        state.total = 0;
+        state.streak = 0;
+        StatsSync.reset('interval');
+        updateStatsDisplay();
+        btn.innerHTML = '<i class="fas fa-trophy"></i> Submit to Leaderboard';
+        btn.classList.remove('btn-outline-success');
+        btn.classList.add('btn-success');
+        btn.disabled = false;
+        document.getElementById('submit-section').style.display = 'none';
+      }, 3000);
+    } else {
+      btn.innerHTML = '<i class="fas fa-times"></i> ' + data.error;
+      btn.disabled = false;
+    }
+  } catch (error) {
+    btn.innerHTML = '<i class="fas fa-times"></i> Error submitting';
+    btn.disabled = false;
+  }
+}
+
+// Initialize when DOM is ready
+document.addEventListener('DOMContentLoaded', function() {
+  // Attach click handlers to ALL interval buttons
+  document.querySelectorAll('.interval-btn').forEach(btn => {
+    btn.addEventListener('click', function() {
+      checkAnswer(this.dataset.interval);
+    });
+  });
+
+  // Attach click handlers to play buttons
+  document.getElementById('play-interval').addEventListener('click', playCurrentInterval);
+  document.getElementById('replay-interval').addEventListener('click', playCurrentInterval);
+
+  // Set initial difficulty
+  setDifficulty(state.difficulty);
+
+  // Load saved stats
+  loadStats();
+
+  updateStatsDisplay();
+});
@@ -0,0 +1,157 @@
+import gzip
+import json
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.templatetags.static import static
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from landing_page.management.commands.benchmark_pages import PAGES
+from leaderboard.management.commands.run_benchmarks import current_commit
+from rithm import images
+
+CSS_URL = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)|@import\s+[\'"]([^\'"]+)[\'"]')
+
+
+class ResourceParser(HTMLParser):
+    """Collect the URLs a page makes the browser fetch, and the origins it preconnects to."""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.preconnect = []
+        # The fallback <img> of each <picture>; which file is fetched depends on the viewport
+        self.pictures = []
+        self._in_picture = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        rel = (attrs.get('rel') or '').lower().split()
+        if tag == 'picture':
+            self._in_picture = True
+        elif tag == 'img' and self._in_picture and attrs.get('src'):
+            self.pictures.append(attrs['src'])
+        elif tag == 'link' and 'preconnect' in rel:
+            self.preconnect.append(attrs.get('href'))
+        elif tag == 'link' and {'stylesheet', 'icon', 'preload', 'modulepreload'} & set(rel):
+            self.urls.append(attrs.get('href'))
+        elif tag in ('script', 'img', 'source') and attrs.get('src'):
+            self.urls.append(attrs['src'])
+
+    def handle_endtag(self, tag):
+        if tag == 'picture':
+            self._in_picture = False
+
+
+def local_file(url):
+    """The file a static URL is served from, if any."""
+    path = urlsplit(url).path
+    if not path.startswith(settings.STATIC_URL):
+        return None
+    return finders.find(path[len(settings.STATIC_URL):])
+
+
+def sizes(data):
+    # Already compressed formats (woff2, png) are served as they are
+    return {'bytes': len(data), 'gzip_bytes': min(len(data), len(gzip.compress(data)))}
+
+
+class Command(BaseCommand):
+    help = (
+        'Count the requests and bytes each page makes a first-time visitor '
+        'download: the HTML, its stylesheets, scripts, images and the fonts '
+        'and images those stylesheets reference (an upper bound: browsers '
+        'skip fonts no element uses). Third-party requests are listed with '
+        'their origins; their size is not measured. Responsive images count '
+        'as the AVIF variant a browser picks at --viewport pixels wide.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark_results_assets.json', help='Where to write the results.')
+        parser.add_argument(
+            '--viewport', type=int, default=1280, help='Viewport width in CSS pixels used to pick image variants.'
+        )
+
+    def handle(self, *args, **options):
+        self.viewport = options['viewport']
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            client = Client()
+            results = {path: self._page(client, path) for path in PAGES}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for path, result in results.items():
+            self.stdout.write(
+                f"{path:<24} {result['requests']:>3} requests  {result['bytes'] / 1024:>8.1f} KB  "
+                f"{result['gzip_bytes'] / 1024:>7.1f} KB gzipped  "
+                f"{result['third_party_requests']} third-party from {len(result['origins'])} origins  "
+                f"{result['image_bytes_saved'] / 1024:.1f} KB saved by responsive images"
+            )
+
+        report = {
+            'commit': current_commit(),
+            'generated_at': timezone.now().isoformat(),
+            'pages': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def _page(self, client, path):
+        response = client.get(path)
+        parser = ResourceParser()
+        parser.feed(response.content.decode())
+
+        resources = {path: sizes(response.content)}
+        pending = [urljoin(path, url) for url in parser.urls if url and not url.startswith('data:')]
+        saved = 0
+        for url in parser.pictures:
+            url = urljoin(path, url)
+            entry = images.read_manifest().get(urlsplit(url).path[len(settings.STATIC_URL):])
+            variant = entry and images.pick(entry, self.viewport)
+            if variant:
+                url = static(variant['path'])
+                saved += entry['bytes'] - variant['bytes']
+            pending.append(url)
+        while pending:
+            url = pending.pop(0)
+            if url in resources:
+                continue
+            filename = None if urlsplit(url).netloc else local_file(url)
+            if filename is None:
+                # Third-party, or a broken link that still costs a request
+                resources[url] = {'bytes': None, 'gzip_bytes': None}
+                continue
+            with open(filename, 'rb') as fh:
+                data = fh.read()
+            resources[url] = sizes(data)
+            if url.split('?')[0].endswith('.css'):
+                for match in CSS_URL.finditer(data.decode(errors='ignore')):
+                    ref = (match.group(1) or match.group(2)).strip()
+                    if not ref.startswith('data:'):
+                        pending.append(urljoin(url, ref.split('?')[0].split('#')[0]))
+
+        third_party = [url for url in resources if urlsplit(url).netloc]
+        origins = {urlsplit(url).netloc for url in third_party + parser.preconnect if url}
+        return {
+            'requests': len(resources),
+            'bytes': sum(size['bytes'] or 0 for size in resources.values()),
+            'gzip_bytes': sum(size['gzip_bytes'] or 0 for size in resources.values()),
+            'third_party_requests': len(third_party),
+            'missing': [url for url, size in resources.items() if size['bytes'] is None and url not in third_party],
+            'origins': sorted(origins),
+            'image_bytes_saved': saved,
+            'resources': resources,
+        }
@@ -0,0 +1,107 @@
+import json
+import re
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from leaderboard.management.commands.run_benchmarks import current_commit, percentile
+
+# The mostly static pages whose rendering the page and fragment caches target
+PAGES = [
+    '/',
+    '/guide/',
+    '/tips/',
+    '/faq/',
+    '/synth/',
+    '/metronome/',
+    '/note_identification/',
+    '/interval_training/',
+    '/chord_identification/',
+    '/pitch_identification/',
+]
+
+TEMPLATE_TIMING = re.compile(r'tpl;dur=([\d.]+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the static content and game pages for an anonymous and a '
+        'logged-in user with template caching off and on, writing p50/p95 '
+        'response and template render times to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100, help='Requests per page, user and mode.')
+        parser.add_argument('--output', default='benchmark_results_pages.json', help='Where to write the results.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self._run(options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'commit': current_commit(),
+            'generated_at': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'pages': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def _run(self, iterations):
+        member = Client()
+        member.force_login(User.objects.create_user('page_benchmark'))
+        clients = {'anonymous': Client(), 'member': member}
+        timeout = getattr(settings, 'TEMPLATE_CACHE_TIMEOUT', 0) or 3600
+
+        results = {}
+        for mode, cache_timeout in [('uncached', 0), ('cached', timeout)]:
+            cache.clear()
+            # Template times are read back from the Server-Timing header
+            with override_settings(TEMPLATE_CACHE_TIMEOUT=cache_timeout, REQUEST_METRICS_HEADER=True):
+                for path in PAGES:
+                    for user, client in clients.items():
+                        result = self._measure(client, path, iterations)
+                        results.setdefault(path, {}).setdefault(user, {})[mode] = result
+                        self.stdout.write(
+                            f"{mode:<8} {user:<9} {path:<24} p50 {result['p50_ms']:>7.2f} ms  "
+                            f"p95 {result['p95_ms']:>7.2f} ms  templates {result['template_ms']:>7.2f} ms"
+                        )
+        return results
+
+    def _measure(self, client, path, iterations):
+        timings = []
+        template_times = []
+        statuses = set()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            statuses.add(response.status_code)
+            match = TEMPLATE_TIMING.search(response.get('Server-Timing', ''))
+            template_times.append(float(match.group(1)) if match else 0.0)
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            # Median time spent rendering templates, from the Server-Timing header
+            'template_ms': round(percentile(template_times, 50), 2),
+            'status': sorted(statuses),
+        }
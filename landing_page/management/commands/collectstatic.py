@@ -0,0 +1,20 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+from django.core.management.base import CommandError
+
+from rithm import images
+
+
+class Command(CollectStaticCommand):
+    help = CollectStaticCommand.help + ' Builds responsive image variants first (see responsive_images).'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--skip-images', action='store_true', help="Don't rebuild responsive image variants.")
+
+    def handle(self, **options):
+        if not options['skip_images'] and not options['dry_run']:
+            try:
+                images.build(stdout=self.stdout if options['verbosity'] > 1 else None)
+            except images.ImageError as e:
+                raise CommandError(str(e))
+        return super().handle(**options)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rithm import images
+
+# Viewport widths the savings are reported for
+VIEWPORTS = [480, 1280, 1920]
+
+
+class Command(BaseCommand):
+    help = (
+        'Resize the images in RESPONSIVE_IMAGES to AVIF and WebP variants '
+        'for {% responsive_image %} (collectstatic does this too) and report '
+        'the bytes each saves over the original. Needs Pillow.'
+    )
+
+    def handle(self, *args, **options):
+        try:
+            record = images.build(stdout=self.stdout)
+        except images.ImageError as e:
+            raise CommandError(str(e))
+        if record is None:
+            raise CommandError('responsive_images needs Pillow: pip install Pillow')
+
+        for name, entry in sorted(record.items()):
+            self.stdout.write(f"{name} ({entry['width']}x{entry['height']}, {entry['bytes'] / 1024:.1f} KB)")
+            for viewport in VIEWPORTS:
+                for fmt in images.FORMATS:
+                    variant = images.pick(entry, viewport, formats=(fmt,))
+                    saved = entry['bytes'] - variant['bytes']
+                    self.stdout.write(
+                        f"  {viewport:>5}px {fmt:<5} {variant['width']:>5}w {variant['bytes'] / 1024:>8.1f} KB  "
+                        f"saves {saved / 1024:>8.1f} KB ({saved / entry['bytes']:.0%})"
+                    )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rithm.vendor import BUILDERS, Fetcher, VendorError, build
+
+
+class Command(BaseCommand):
+    help = (
+        'Download the pinned third-party CSS, JS and fonts, purge and subset '
+        'them to what the site uses and write them to static/vendor/, where '
+        'the {% vendor %} tag picks them up instead of the CDN. Rerun after '
+        'using new Bootstrap classes or Font Awesome icons, and commit the '
+        'result.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('assets', nargs='*', help=f"Assets to build (default: all of {', '.join(BUILDERS)}).")
+        parser.add_argument(
+            '--source-dir',
+            help='Read upstream files from this directory (by file name) instead of downloading them.',
+        )
+
+    def handle(self, *args, **options):
+        names = options['assets'] or list(BUILDERS)
+        unknown = set(names) - set(BUILDERS)
+        if unknown:
+            raise CommandError(f"Unknown assets: {', '.join(sorted(unknown))}. Choose from: {', '.join(BUILDERS)}")
+
+        try:
+            record = build(names, Fetcher(options['source_dir']))
+        except VendorError as e:
+            raise CommandError(str(e))
+
+        for name in names:
+            for path, digest in sorted(record[name]['files'].items()):
+                self.stdout.write(f'{path:<50} {digest}')
+        self.stdout.write(self.style.SUCCESS(f"Vendored {', '.join(names)}"))
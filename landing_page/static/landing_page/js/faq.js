@@ -0,0 +1,15 @@
+// FAQ accordion functionality
+document.querySelectorAll('.faq-question').forEach(question => {
+  question.addEventListener('click', () => {
+    const item = question.parentElement;
+    const wasActive = item.classList.contains('active');
+
+    // Close all items
+    document.querySelectorAll('.faq-item').forEach(i => i.classList.remove('active'));
+
+    // Open clicked item if it wasn't already open
+    if (!wasActive) {
+      item.classList.add('active');
+    }
+  });
+});
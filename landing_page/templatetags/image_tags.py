@@ -0,0 +1,36 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from rithm.images import FORMATS, read_manifest
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(name, alt='', sizes='100vw', **attrs):
+    """``<picture>`` with the AVIF and WebP variants of static image ``name``.
+
+    Falls back to a plain ``<img>`` of the original when ``name`` isn't in
+    RESPONSIVE_IMAGES or hasn't been built. Extra keyword arguments become
+    ``<img>`` attributes, e.g. ``class="hero-image" loading="lazy"``.
+    """
+    entry = read_manifest().get(name)
+    attrs = {'alt': alt, 'decoding': 'async', **attrs}
+    if not entry:
+        return format_html('<img src="{}"{}>', static(name), flatatt(attrs))
+
+    # Intrinsic size, so the browser reserves the space before the image loads
+    attrs.update(width=entry['width'], height=entry['height'])
+    tags = ['<picture>']
+    for fmt, spec in FORMATS.items():
+        srcset = ', '.join(
+            f"{static(variant['path'])} {variant['width']}w"
+            for variant in entry['variants'] if variant['format'] == fmt
+        )
+        tags.append(format_html('<source type="{}" srcset="{}" sizes="{}">', spec['mime'], srcset, sizes))
+    tags.append(format_html('<img src="{}"{}>', static(name), flatatt(attrs)))
+    tags.append('</picture>')
+    return mark_safe(''.join(tags))
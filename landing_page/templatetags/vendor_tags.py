@@ -0,0 +1,19 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from rithm.vendor import ASSETS, read_manifest
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor(name):
+    """Link a third-party asset: our copy if ``vendor_assets`` built one, else the CDN."""
+    built = read_manifest().get(name)
+    if not built:
+        return mark_safe(ASSETS[name]['cdn'])
+    tags = [format_html('<link rel="stylesheet" href="{}">', static(path)) for path in built['css']]
+    tags += [format_html('<script src="{}"></script>', static(path)) for path in built['js']]
+    return mark_safe('\n'.join(tags))
@@ -1,11 +1,14 @@
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic, View
 from datetime import datetime
+from rithm.page_cache import cache_anonymous_page
 from .models import Game
 
 
+@method_decorator(cache_anonymous_page, name='dispatch')
 class IndexView(generic.ListView):
     template_name = 'landing_page/index.html'
     model = Game
@@ -23,16 +26,19 @@ class ShowTimeView(View):
         return HttpResponse(html)
 
 
+@cache_anonymous_page
 def music_theory_guide(request):
     """Music Theory Guide page."""
     return render(request, 'landing_page/guide.html')
 
 
+@cache_anonymous_page
 def practice_tips(request):
     """Practice Tips page."""
     return render(request, 'landing_page/tips.html')
 
 
+@cache_anonymous_page
 def faq(request):
     """FAQ page."""
     return render(request, 'landing_page/faq.html')
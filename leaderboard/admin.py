@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Score, WeeklyScore
+from .models import AllTimeScore, DailyScoreRollup, Score, WeeklyScore, WeeklyStanding
 
 
 @admin.register(Score)
@@ -18,3 +18,29 @@ class WeeklyScoreAdmin(admin.ModelAdmin):
     search_fields = ['user__username']
     readonly_fields = ['accuracy']
     ordering = ['-week_start', 'game']
+
+
+@admin.register(AllTimeScore)
+class AllTimeScoreAdmin(admin.ModelAdmin):
+    list_display = ['user', 'game', 'difficulty', 'total_correct', 'total_attempts', 'accuracy', 'sessions_played']
+    list_filter = ['game', 'difficulty']
+    search_fields = ['user__username']
+    readonly_fields = ['accuracy', 'updated_at']
+    ordering = ['game', 'difficulty', '-total_correct']
+
+
+@admin.register(WeeklyStanding)
+class WeeklyStandingAdmin(admin.ModelAdmin):
+    list_display = ['week_start', 'game', 'difficulty', 'rank', 'user', 'total_correct', 'accuracy']
+    list_filter = ['game', 'difficulty', 'week_start']
+    search_fields = ['user__username']
+    ordering = ['-week_start', 'game', 'difficulty', 'rank']
+
+
+@admin.register(DailyScoreRollup)
+class DailyScoreRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'game', 'difficulty', 'day', 'total_correct', 'total_attempts', 'sessions_played']
+    list_filter = ['game', 'difficulty', 'day']
+    search_fields = ['user__username']
+    readonly_fields = ['accuracy']
+    ordering = ['-day', 'game']
@@ -0,0 +1,51 @@
+"""
+Async versions of the leaderboard JSON APIs, routed only when SERVER_MODE
+is 'asgi' (see rithm/asgi_urls.py).
+
+The sync views in views.py stay the default: under WSGI an async view only
+adds an event loop hop per request.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from rithm import async_views
+from . import caching as leaderboard_cache
+from .views import _api_board, _api_board_params, _board_cache_control, _clean_session, _score_response, _store_score
+
+
+@async_views.require_POST
+async def submit_score(request):
+    """Async version of ``views.submit_score``."""
+    user = await async_views.auser(request)
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+    
+    try:
+        data = json.loads(request.body)
+        session, error = _clean_session(data)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        
+        # The transaction and the rank counts stay on one worker thread
+        return _score_response(session, *await sync_to_async(_store_score)(user, session))
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+async def api_leaderboard(request):
+    """Async version of ``views.api_leaderboard``."""
+    params = _api_board_params(request)
+    if params is None:
+        return JsonResponse({'success': False, 'error': 'Invalid game'}, status=400)
+    
+    state = await sync_to_async(leaderboard_cache.board_state)(params[0])
+    etag = leaderboard_cache.etag(state, *params)
+    response = leaderboard_cache.not_modified(request, etag, **_board_cache_control())
+    if response is not None:
+        return response
+    
+    data = await sync_to_async(_api_board)(*params, state)
+    return leaderboard_cache.set_validators(JsonResponse({'leaderboard': data}), etag, **_board_cache_control())
@@ -0,0 +1,152 @@
+"""
+Cache for rendered leaderboard data.
+
+Boards only change when a score is submitted, so they are cached under a key
+made from (game, difficulty, period, limit) plus a per-game version number.
+Submitting a score bumps the version, which makes every cached board for
+that game unreachable at once; entries also expire after
+LEADERBOARD_CACHE_TIMEOUT seconds. Works with any Django cache backend - use
+a file or database cache (see CACHE_BACKEND in settings) to share entries
+between gunicorn workers.
+
+The counters live in the cache, which is private to each worker with the
+default locmem backend, so they can't make ETags: a worker that missed a
+bump would confirm a changed board. The rankings API versions its boards
+with ``board_state()`` instead, read from the database so every worker
+agrees, and uses it for both the ETag and the cache key; polling clients
+get a 304 after one indexed aggregate. See ``etag()`` and ``not_modified()``.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .models import AllTimeScore
+
+KEY_PREFIX = 'leaderboard'
+
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _version_key(name):
+    return f'{KEY_PREFIX}:version:{name}'
+
+
+def version(name):
+    """Current value of the version counter ``name`` (a game)."""
+    key = _version_key(name)
+    value = cache.get(key)
+    if value is None:
+        # Seed from the clock so a lost version key can't resurrect old entries
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def bump(name):
+    """Advance the version counter ``name``."""
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        version(name)
+
+
+def board_version(game):
+    """Current cache version for a game's boards."""
+    return version(game)
+
+
+def board_state(game):
+    """Version of a game's boards read from the database, the same in every worker.
+
+    Saving a score stamps the player's AllTimeScore row, so the newest
+    stamp changes whenever any of the game's boards can; the row count
+    covers rows deleted with their user.
+    """
+    state = AllTimeScore.objects.filter(game=game).aggregate(changed=Max('updated_at'), rows=Count('pk'))
+    changed = state['changed'].timestamp() if state['changed'] else 0
+    return f"{changed}:{state['rows']}"
+
+
+def board_key(game, difficulty, period, limit, version=None):
+    difficulty = difficulty or 'all'
+    if version is None:
+        version = board_version(game)
+    return f'{KEY_PREFIX}:{game}:{difficulty}:{period}:{limit}:v{version}'
+
+
+def get_board(game, difficulty, period, limit, build, version=None):
+    """Return a cached board, calling ``build()`` to produce it on a miss.
+
+    ``version`` (e.g. from ``board_state()``) replaces the game's counter
+    in the key.
+    """
+    key = board_key(game, difficulty, period, limit, version)
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        return data
+
+    _count('misses')
+    data = build()
+    cache.set(key, data, getattr(settings, 'LEADERBOARD_CACHE_TIMEOUT', 60))
+    return data
+
+
+def invalidate(game):
+    """Make every cached board for a game stale."""
+    bump(game)
+    _count('invalidations')
+
+
+def etag(version, *parts):
+    """ETag for a response built from data at ``version``, from ``board_state()``.
+
+    ``parts`` tell apart responses built from the same data.
+    """
+    tag = ':'.join(str(part) for part in (*parts, version))
+    return quote_etag(f'{settings.DEPLOY_VERSION}:{tag}')
+
+
+def not_modified(request, etag, **cache_control):
+    """A 304 if the client already has ``etag``, else None.
+
+    Call it before building the response; when it returns None, build the
+    response and pass it through ``set_validators()`` with the same policy.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_validators(response, etag, **cache_control)
+    return response
+
+
+def set_validators(response, etag, **cache_control):
+    response['ETag'] = etag
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+def get_stats():
+    """Hit/miss counters for this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0
+    stats['backend'] = settings.CACHES['default']['BACKEND']
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
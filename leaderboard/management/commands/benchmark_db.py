@@ -0,0 +1,193 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from accounts.models import GameStats
+from leaderboard.models import AllTimeScore
+
+from .run_benchmarks import current_commit, percentile
+
+# Environment overrides compared by --compare, per database vendor
+VARIANTS = {
+    'sqlite': {
+        'rollback-journal': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+        'wal': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+    },
+    'postgresql': {
+        'no-persistence': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+        'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+        'pool': {'DB_POOL': 'True'},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Run short request-shaped transactions (a stats upsert and a board '
+        'read) from several threads at once and report throughput, latency, '
+        'errors and connections opened. --compare repeats the run with each '
+        'connection setting (SQLite journal modes, PostgreSQL pooling).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,8,32', help='Comma-separated numbers of concurrent threads.')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per thread count.')
+        parser.add_argument('--output', default='benchmark_results_db.json', help='Where to write the results.')
+        parser.add_argument('--compare', action='store_true', help='Run once per connection setting.')
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a throwaway test database.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['threads'].split(',')]
+        except ValueError:
+            raise CommandError('--threads must be a comma-separated list of integers')
+        if not levels or min(levels) < 1 or options['requests'] < 1:
+            raise CommandError('--threads and --requests must be at least 1')
+
+        if options['compare']:
+            report = {
+                'commit': current_commit(),
+                'generated_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'variants': self._compare(options),
+            }
+        else:
+            report = self._report(levels, options)
+
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def _compare(self, options):
+        """Run the benchmark in a fresh process for each setting."""
+        variants = VARIANTS.get(connection.vendor)
+        if not variants:
+            raise CommandError(f'Nothing to compare on {connection.vendor}')
+        results = {}
+        for name, env in variants.items():
+            self.stdout.write(f'== {name}')
+            with tempfile.NamedTemporaryFile(suffix='.json') as output:
+                command = [
+                    sys.executable, sys.argv[0], 'benchmark_db',
+                    '--threads', options['threads'],
+                    '--requests', str(options['requests']),
+                    '--output', output.name,
+                ]
+                if options['in_place']:
+                    command.append('--in-place')
+                process = subprocess.run(command, env=dict(os.environ, **env), capture_output=True, text=True)
+                self.stdout.write(process.stdout, ending='')
+                if process.returncode:
+                    raise CommandError(f'{name} run failed:\n{process.stderr}')
+                output.seek(0)
+                results[name] = dict(json.load(output), env=env)
+        return results
+
+    def _report(self, levels, options):
+        if options['in_place']:
+            results = self._run(levels, options['requests'])
+        else:
+            setup_test_environment()
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = self._run(levels, options['requests'])
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        return {
+            'commit': current_commit(),
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'options': {
+                key: value for key, value in connection.settings_dict['OPTIONS'].items()
+                if key in ('init_command', 'timeout', 'pool')
+            },
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'threads': results,
+        }
+
+    def _run(self, levels, total):
+        User.objects.filter(username__startswith='dbbench_').delete()
+        users = User.objects.bulk_create([User(username=f'dbbench_{i}', password='!') for i in range(max(levels))])
+        # Close the setup connection so every run starts from the same state
+        connection.close()
+
+        results = {}
+        try:
+            for level in levels:
+                results[str(level)] = result = self._load(users[:level], total)
+                self.stdout.write(
+                    f"x{level:<4} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+                    f"p95 {result['p95_ms']:>8.2f} ms  {result['errors']} errors  "
+                    f"{result['connections_opened']} connections opened"
+                )
+        finally:
+            User.objects.filter(username__startswith='dbbench_').delete()
+        return results
+
+    def _load(self, users, total):
+        per_thread = max(1, total // len(users))
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(**kwargs):
+            with lock:
+                opened.append(1)
+
+        def worker(user):
+            timings = []
+            errors = 0
+            for _ in range(per_thread):
+                # What Django does around every request
+                close_old_connections()
+                start = time.perf_counter()
+                try:
+                    GameStats.objects.record(user, 'note', increments={'total_correct': 1, 'total_attempts': 1})
+                    list(AllTimeScore.objects.filter(game='note', difficulty='beginner')
+                         .order_by('-total_correct')[:10])
+                except Exception:
+                    errors += 1
+                timings.append((time.perf_counter() - start) * 1000)
+                close_old_connections()
+            connections.close_all()
+            return timings, errors
+
+        pool = getattr(connection, 'pool', None)
+        opened_before = pool.opened if pool else 0
+        connection_created.connect(count_connection)
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(users)) as executor:
+                outcomes = list(executor.map(worker, users))
+            elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connection)
+
+        timings = [timing for thread_timings, _ in outcomes for timing in thread_timings]
+        return {
+            'rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'errors': sum(errors for _, errors in outcomes),
+            # With a pool, Django "connects" per request but the pool opens few
+            'connections_opened': (pool.opened - opened_before) if pool else len(opened),
+        }
@@ -0,0 +1,235 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from .run_benchmarks import current_commit, percentile
+
+# Any 32 alphanumerics make a valid CSRF secret; sending it as both the
+# cookie and the header satisfies CsrfViewMiddleware without a page load
+CSRF_TOKEN = 'benchmark' * 3 + 'token'
+
+
+def endpoints():
+    """(name, method, path, JSON body) for every request the benchmark drives."""
+    return [
+        ('api_leaderboard', 'GET', reverse('api-leaderboard') + '?game=note&period=weekly', None),
+        ('get_note_stats', 'GET', reverse('game-stats', args=['note']), None),
+        ('bootstrap', 'GET', reverse('bootstrap'), None),
+        ('submit_score', 'POST', reverse('submit-score'), {
+            'game': 'note', 'difficulty': 'beginner', 'correct': 18, 'total': 20, 'bestStreak': 9,
+        }),
+    ]
+
+
+def database_url(settings_dict):
+    """DATABASE_URL pointing the gunicorn processes at ``settings_dict``'s database."""
+    if settings_dict['ENGINE'].endswith('sqlite3'):
+        return f"sqlite:///{settings_dict['NAME']}"
+    credentials = quote(settings_dict['USER'] or '', safe='')
+    if settings_dict['PASSWORD']:
+        credentials += ':' + quote(settings_dict['PASSWORD'], safe='')
+    host = settings_dict['HOST'] or ''
+    if settings_dict['PORT']:
+        host += f":{settings_dict['PORT']}"
+    location = f'{credentials}@{host}' if credentials else host
+    return f"postgres://{location}/{quote(settings_dict['NAME'], safe='')}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn with sync workers (WSGI) and with uvicorn workers '
+        '(ASGI) in turn and compare requests per second and latency of the '
+        'JSON APIs under concurrent load. The servers share a throwaway '
+        'test database unless --in-place is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi', help='Comma-separated server modes to compare.')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes per server.')
+        parser.add_argument(
+            '--concurrency', default='1,8,32',
+            help='Comma-separated numbers of simultaneous clients.',
+        )
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint and concurrency level.')
+        parser.add_argument('--users', type=int, default=500, help='Synthetic users to generate first.')
+        parser.add_argument(
+            '--skip-data', action='store_true',
+            help='With --in-place, reuse the synthetic data already there.',
+        )
+        parser.add_argument('--output', default='benchmark_results_servers.json', help='Where to write the results.')
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a throwaway test database. '
+                 'Synthetic users from earlier runs are replaced.',
+        )
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        if not modes or set(modes) - {'wsgi', 'asgi'}:
+            raise CommandError('--modes must be wsgi, asgi or both')
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers')
+        if not levels or min(levels) < 1 or options['requests'] < 1 or options['workers'] < 1:
+            raise CommandError('Concurrency, --requests and --workers must be at least 1')
+
+        if options['skip_data'] and not options['in_place']:
+            raise CommandError('--skip-data needs --in-place: the test database starts empty')
+
+        if options['in_place']:
+            results = self._run(modes, levels, options, env={})
+        else:
+            setup_test_environment()
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = self._run(modes, levels, options, env={
+                    'DATABASE_URL': database_url(connection.settings_dict),
+                })
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            'commit': current_commit(),
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'workers': options['workers'],
+            'requests': options['requests'],
+            'modes': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def _run(self, modes, levels, options, env):
+        """Seed and log in on this process's database, then load a server per mode.
+
+        ``env`` points the servers at the same database.
+        """
+        if not options['skip_data']:
+            call_command('generate_synthetic_data', users=options['users'], clear=True, stdout=StringIO())
+        cookies = self._sessions(max(levels))
+        # The servers open their own connections; don't hold SQLite locks meanwhile
+        connection.close()
+
+        return {mode: self._benchmark(mode, cookies, levels, options, env) for mode in modes}
+
+    def _sessions(self, count):
+        """Log in ``count`` synthetic users and return their cookie headers."""
+        users = list(User.objects.filter(username__startswith='synth_').order_by('pk')[:count])
+        if len(users) < count:
+            raise CommandError(f'Need {count} synthetic users, found {len(users)}; raise --users')
+        cookies = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            cookies.append(
+                f'{settings.SESSION_COOKIE_NAME}={session}; {settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}'
+            )
+        return cookies
+
+    def _benchmark(self, mode, cookies, levels, options, env):
+        port = free_port()
+        base = f'http://127.0.0.1:{port}'
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(options['workers']), '--log-level', 'warning'],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ, SERVER_MODE=mode, REQUEST_LOG_LEVEL='WARNING', **env),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            self._wait_until_ready(server, base)
+            results = {}
+            for name, method, path, payload in endpoints():
+                results[name] = {}
+                for level in levels:
+                    result = self._load(base, method, path, payload, cookies[:level], options['requests'])
+                    results[name][str(level)] = result
+                    self.stdout.write(
+                        f"{mode:<5} {name:<16} x{level:<4} {result['rps']:>8.1f} req/s  "
+                        f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                        f"{result['errors']} errors"
+                    )
+            return results
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def _wait_until_ready(self, server, base, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn exited:\n{server.stderr.read().decode()}')
+            try:
+                with urllib.request.urlopen(base + reverse('api-leaderboard'), timeout=2):
+                    return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn did not start within {timeout}s')
+
+    def _load(self, base, method, path, payload, cookies, total):
+        """Send ``total`` requests from ``len(cookies)`` clients at once."""
+        body = json.dumps(payload).encode() if payload is not None else None
+        per_client = max(1, total // len(cookies))
+
+        def client(cookie):
+            headers = {'Cookie': cookie, 'X-CSRFToken': CSRF_TOKEN, 'Content-Type': 'application/json'}
+            timings = []
+            errors = 0
+            for _ in range(per_client):
+                request = urllib.request.Request(base + path, data=body, headers=headers, method=method)
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=60) as response:
+                        response.read()
+                except (urllib.error.URLError, OSError):
+                    errors += 1
+                timings.append((time.perf_counter() - start) * 1000)
+            return timings, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(cookies)) as pool:
+            outcomes = list(pool.map(client, cookies))
+        elapsed = time.perf_counter() - start
+
+        timings = [timing for client_timings, _ in outcomes for timing in client_timings]
+        return {
+            'rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'errors': sum(errors for _, errors in outcomes),
+        }
@@ -0,0 +1,154 @@
+import random
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from leaderboard import caching
+from leaderboard.models import AllTimeScore, Score, WeeklyScore
+from leaderboard.views import get_week_start
+
+
+def parse_weights(value, choices):
+    """Parse ``name=weight,...`` into a dict, validating names against choices."""
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in choices:
+            raise CommandError(f"Unknown choice '{name}'. Choose from: {', '.join(choices)}")
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise CommandError(f"Invalid weight '{weight}' for '{name}'")
+    return weights
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic population of users and game sessions for load '
+        'testing. Rows are written with bulk_create and the aggregate tables '
+        'are rebuilt afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Number of users to create.')
+        parser.add_argument(
+            '--sessions-per-user', type=int, default=20,
+            help='Average sessions per user (actual counts vary around this).',
+        )
+        parser.add_argument('--weeks', type=int, default=8, help='Weeks of history to spread sessions over.')
+        parser.add_argument(
+            '--games', default='note=4,interval=2,chord=2,pitch=1',
+            help='Game distribution as name=weight pairs.',
+        )
+        parser.add_argument(
+            '--difficulties', default='beginner=5,intermediate=3,advanced=1',
+            help='Difficulty distribution as name=weight pairs.',
+        )
+        parser.add_argument('--prefix', default='synth_', help='Username prefix for generated users.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data sets.')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete previously generated users (matching --prefix) first.',
+        )
+
+    def handle(self, *args, **options):
+        users = options['users']
+        weeks = options['weeks']
+        prefix = options['prefix']
+        if users < 1 or weeks < 1 or options['sessions_per_user'] < 1:
+            raise CommandError('--users, --weeks and --sessions-per-user must be at least 1')
+
+        games = parse_weights(options['games'], [choice for choice, _ in Score.GAME_CHOICES])
+        difficulties = parse_weights(
+            options['difficulties'], [choice for choice, _ in Score.DIFFICULTY_CHOICES]
+        )
+        rng = random.Random(options['seed'])
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=prefix).delete()
+            self.stdout.write(f'Deleted {deleted} rows from a previous run')
+
+        with transaction.atomic():
+            created = self._create_users(users, prefix)
+            scores = self._create_scores(created, options['sessions_per_user'], weeks, games, difficulties, rng)
+            weekly = self._create_weekly_scores(scores)
+            AllTimeScore.rebuild()
+
+        for game in games:
+            caching.invalidate(game)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} users, {len(scores)} scores and {weekly} weekly scores.'
+        ))
+
+    def _create_users(self, count, prefix):
+        start = User.objects.filter(username__startswith=prefix).count()
+        users = [
+            # '!' is an unusable password, which skips hashing
+            User(username=f'{prefix}{start + i:06d}', email=f'{prefix}{start + i:06d}@example.com', password='!')
+            for i in range(count)
+        ]
+        users = User.objects.bulk_create(users, batch_size=1000)
+        # bulk_create skips the post_save signal that normally creates profiles
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users], batch_size=1000)
+        return users
+
+    def _create_scores(self, users, sessions_per_user, weeks, games, difficulties, rng):
+        today = timezone.now().date()
+        days = weeks * 7
+        game_names, game_weights = zip(*games.items())
+        difficulty_names, difficulty_weights = zip(*difficulties.items())
+
+        by_day = defaultdict(list)
+        for user in users:
+            # Some players are far more active and more skilled than others
+            sessions = max(1, int(rng.expovariate(1 / sessions_per_user)))
+            skill = rng.betavariate(5, 2)
+            for _ in range(sessions):
+                total = rng.randint(10, 50)
+                correct = sum(rng.random() < skill for _ in range(total))
+                by_day[rng.randrange(days)].append(Score(
+                    user=user,
+                    game=rng.choices(game_names, game_weights)[0],
+                    difficulty=rng.choices(difficulty_names, difficulty_weights)[0],
+                    correct=correct,
+                    total=total,
+                    best_streak=min(correct, rng.randint(1, 15)),
+                    accuracy=Score.calculate_accuracy(correct, total),
+                ))
+
+        created = []
+        for days_ago, scores in by_day.items():
+            day = today - timedelta(days=days_ago)
+            scores = Score.objects.bulk_create(scores, batch_size=1000)
+            # auto_now_add stamps "now"; backdate each day's batch in one UPDATE
+            played_at = timezone.make_aware(datetime.combine(day, time(12)))
+            Score.objects.filter(pk__in=[score.pk for score in scores]).update(created_at=played_at)
+            for score in scores:
+                score.created_at = played_at
+            created.extend(scores)
+        return created
+
+    def _create_weekly_scores(self, scores):
+        totals = {}
+        for score in scores:
+            key = (score.user_id, score.game, score.difficulty, get_week_start(score.created_at.date()))
+            weekly = totals.get(key)
+            if weekly is None:
+                weekly = totals[key] = WeeklyScore(
+                    user_id=key[0], game=key[1], difficulty=key[2], week_start=key[3]
+                )
+            weekly.total_correct += score.correct
+            weekly.total_attempts += score.total
+            weekly.best_streak = max(weekly.best_streak, score.best_streak)
+            weekly.sessions_played += 1
+
+        for weekly in totals.values():
+            weekly.accuracy = Score.calculate_accuracy(weekly.total_correct, weekly.total_attempts)
+        WeeklyScore.objects.bulk_create(totals.values(), batch_size=1000)
+        return len(totals)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard import caching
+from leaderboard.models import AllTimeScore, Score
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the all-time leaderboard totals from the raw Score table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--game',
+            help='Only rebuild totals for this game (default: all games).',
+        )
+
+    def handle(self, *args, **options):
+        game = options['game']
+        valid_games = [choice for choice, _ in Score.GAME_CHOICES]
+        if game and game not in valid_games:
+            raise CommandError(f"Invalid game '{game}'. Choose from: {', '.join(valid_games)}")
+
+        count = AllTimeScore.rebuild(game=game)
+        for name in ([game] if game else valid_games):
+            caching.invalidate(name)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} all-time score rows.'))
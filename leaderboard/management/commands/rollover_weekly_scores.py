@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard.models import WeeklyScore, WeeklyStanding
+from leaderboard.views import get_week_start
+
+
+class Command(BaseCommand):
+    help = (
+        'Freeze the final standings of finished weeks into WeeklyStanding and '
+        'optionally prune old WeeklyScore rows. Safe to run repeatedly, e.g. '
+        'from cron or the release phase.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-weeks',
+            type=int,
+            help='Delete WeeklyScore rows of snapshotted weeks older than this many weeks.',
+        )
+        parser.add_argument(
+            '--resnapshot',
+            action='store_true',
+            help='Rebuild snapshots for finished weeks that already have one.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be done without changing anything.',
+        )
+
+    def handle(self, *args, **options):
+        keep_weeks = options['keep_weeks']
+        dry_run = options['dry_run']
+        if keep_weeks is not None and keep_weeks < 1:
+            raise CommandError('--keep-weeks must be at least 1')
+
+        current_week = get_week_start()
+        finished_weeks = set(
+            WeeklyScore.objects.filter(week_start__lt=current_week)
+            .values_list('week_start', flat=True).distinct()
+        )
+        snapshotted = set(WeeklyStanding.objects.values_list('week_start', flat=True).distinct())
+        to_snapshot = sorted(finished_weeks if options['resnapshot'] else finished_weeks - snapshotted)
+
+        for week_start in to_snapshot:
+            if dry_run:
+                count = WeeklyScore.objects.filter(week_start=week_start).count()
+                self.stdout.write(f'Would snapshot {count} standings for week of {week_start}')
+            else:
+                count = WeeklyStanding.snapshot_week(week_start)
+                snapshotted.add(week_start)
+                self.stdout.write(f'Snapshotted {count} standings for week of {week_start}')
+
+        if keep_weeks is not None:
+            cutoff = current_week - timedelta(weeks=keep_weeks)
+            # Never prune a week whose standings haven't been frozen
+            prunable = WeeklyScore.objects.filter(week_start__lt=cutoff, week_start__in=snapshotted)
+            if dry_run:
+                self.stdout.write(f'Would prune {prunable.count()} WeeklyScore rows before {cutoff}')
+            else:
+                deleted, _ = prunable.delete()
+                self.stdout.write(f'Pruned {deleted} WeeklyScore rows before {cutoff}')
+
+        self.stdout.write(self.style.SUCCESS('Weekly rollover complete.'))
@@ -0,0 +1,82 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from leaderboard.models import DailyScoreRollup, Score
+
+
+class Command(BaseCommand):
+    help = (
+        'Roll raw Score rows older than the retention period up into '
+        'per-user/game/difficulty/day totals and delete them in batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Retention period in days (default: SCORE_RETENTION_DAYS).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of Score rows rolled up per transaction.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many rows would be rolled up without changing anything.',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.SCORE_RETENTION_DAYS
+        batch_size = options['batch_size']
+        if days is None:
+            self.stdout.write('Score retention is disabled; nothing to do.')
+            return
+        if days < 1:
+            raise CommandError('Retention period must be at least 1 day')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        cutoff = timezone.now() - timedelta(days=days)
+        expired = Score.objects.filter(created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'Would roll up {expired.count()} scores older than {cutoff:%Y-%m-%d}')
+            return
+
+        rolled = 0
+        while True:
+            batch = list(expired.order_by('id').values(
+                'id', 'user_id', 'game', 'difficulty', 'created_at',
+                'correct', 'total', 'best_streak',
+            )[:batch_size])
+            if not batch:
+                break
+
+            days_totals = defaultdict(lambda: {'correct': 0, 'total': 0, 'best_streak': 0, 'sessions': 0})
+            for score in batch:
+                key = (score['user_id'], score['game'], score['difficulty'], score['created_at'].date())
+                totals = days_totals[key]
+                totals['correct'] += score['correct']
+                totals['total'] += score['total']
+                totals['best_streak'] = max(totals['best_streak'], score['best_streak'])
+                totals['sessions'] += 1
+
+            with transaction.atomic():
+                for (user_id, game, difficulty, day), totals in days_totals.items():
+                    DailyScoreRollup.objects.increment(
+                        **totals, user_id=user_id, game=game, difficulty=difficulty, day=day
+                    )
+                Score.objects.filter(id__in=[score['id'] for score in batch]).delete()
+
+            rolled += len(batch)
+            self.stdout.write(f'Rolled up {rolled} scores...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {rolled} scores older than {cutoff:%Y-%m-%d}.'))
@@ -0,0 +1,167 @@
+import json
+import subprocess
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from leaderboard.models import Score
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def scenarios():
+    """(name, method, path, payload) for every request the benchmark drives."""
+    leaderboard = reverse('leaderboard')
+    rankings = reverse('api-leaderboard')
+    return [
+        ('leaderboard_alltime', 'get', leaderboard, {'game': 'note', 'difficulty': 'beginner'}),
+        ('leaderboard_weekly', 'get', leaderboard, {'game': 'note', 'difficulty': 'beginner', 'period': 'weekly'}),
+        ('api_leaderboard_alltime', 'get', rankings, {'game': 'note'}),
+        ('api_leaderboard_weekly', 'get', rankings, {'game': 'note', 'period': 'weekly'}),
+        ('submit_score', 'post', reverse('submit-score'), {
+            'game': 'note', 'difficulty': 'beginner', 'correct': 18, 'total': 20, 'bestStreak': 9,
+        }),
+        ('get_note_stats', 'get', reverse('game-stats', args=['note']), None),
+        ('update_note_stats', 'post', reverse('game-stats', args=['note']), {
+            'correct': 40, 'total': 50, 'streak': 3, 'bestStreak': 12,
+        }),
+    ]
+
+
+def current_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the leaderboard and stats endpoints against synthetic data '
+        'sets of increasing size, writing p50/p95 latency and queries per '
+        'request to a JSON file that can be diffed across commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='100,1000,5000',
+            help='Comma-separated user counts to benchmark.',
+        )
+        parser.add_argument('--sessions-per-user', type=int, default=20)
+        parser.add_argument('--weeks', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=50, help='Requests per endpoint and size.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the results.')
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a throwaway test database. '
+                 'Synthetic users from earlier runs are replaced.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        if not sizes or min(sizes) < 1 or options['iterations'] < 1:
+            raise CommandError('Sizes and --iterations must be at least 1')
+
+        if options['in_place']:
+            results = self._run(sizes, options)
+        else:
+            setup_test_environment()
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = self._run(sizes, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            'commit': current_commit(),
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'sizes': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def _run(self, sizes, options):
+        results = {}
+        for size in sizes:
+            call_command(
+                'generate_synthetic_data',
+                users=size,
+                sessions_per_user=options['sessions_per_user'],
+                weeks=options['weeks'],
+                seed=options['seed'],
+                clear=True,
+                stdout=StringIO(),
+            )
+            cache.clear()
+
+            client = Client()
+            client.force_login(User.objects.filter(username__startswith='synth_').order_by('pk').first())
+
+            endpoints = {}
+            for name, method, path, payload in scenarios():
+                endpoints[name] = self._measure(client, method, path, payload, options['iterations'])
+                self.stdout.write(
+                    f"{size:>7} users  {name:<24} p50 {endpoints[name]['p50_ms']:>8.2f} ms  "
+                    f"p95 {endpoints[name]['p95_ms']:>8.2f} ms  {endpoints[name]['queries']} queries"
+                )
+            results[str(size)] = {
+                'users': size,
+                'scores': Score.objects.count(),
+                'endpoints': endpoints,
+            }
+        return results
+
+    def _measure(self, client, method, path, payload, iterations):
+        timings = []
+        queries = []
+        statuses = set()
+        for _ in range(iterations):
+            if method == 'post':
+                kwargs = {'data': json.dumps(payload), 'content_type': 'application/json'}
+            else:
+                kwargs = {'data': payload} if payload else {}
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+
+        return {
+            # The first request pays for cold caches
+            'cold_ms': round(timings[0], 2),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': percentile(queries[1:] or queries, 50),
+            'queries_cold': queries[0],
+            'status': sorted(statuses),
+        }
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.28 on 2026-10-18 02:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_alltime_scores(apps, schema_editor):
+    Score = apps.get_model('leaderboard', 'Score')
+    AllTimeScore = apps.get_model('leaderboard', 'AllTimeScore')
+    totals = Score.objects.values('user_id', 'game', 'difficulty').annotate(
+        total_correct=models.Sum('correct'),
+        total_attempts=models.Sum('total'),
+        best_streak=models.Max('best_streak'),
+        sessions_played=models.Count('id'),
+    ).order_by()
+    AllTimeScore.objects.bulk_create([
+        AllTimeScore(
+            accuracy=round((row['total_correct'] / row['total_attempts']) * 100, 1) if row['total_attempts'] > 0 else 0,
+            **row
+        )
+        for row in totals
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('leaderboard', '0003_remove_score_leaderboard_game_ceb80d_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllTimeScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.CharField(choices=[('note', 'Note Reading'), ('interval', 'Interval Training'), ('chord', 'Chord Identification'), ('pitch', 'Pitch Identification')], max_length=20)),
+                ('difficulty', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], default='beginner', max_length=20)),
+                ('total_correct', models.IntegerField(default=0)),
+                ('total_attempts', models.IntegerField(default=0)),
+                ('best_streak', models.IntegerField(default=0)),
+                ('sessions_played', models.IntegerField(default=0)),
+                ('accuracy', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alltime_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-total_correct', '-accuracy'],
+                'indexes': [models.Index(fields=['game', 'difficulty', '-total_correct'], name='leaderboard_game_eccac6_idx')],
+                'unique_together': {('user', 'game', 'difficulty')},
+            },
+        ),
+        migrations.RunPython(populate_alltime_scores, migrations.RunPython.noop),
+    ]
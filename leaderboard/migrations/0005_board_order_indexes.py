@@ -0,0 +1,29 @@
+# Generated by Django 4.2.28 on 2026-10-18 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0004_alltimescore'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='alltimescore',
+            name='leaderboard_game_eccac6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='weeklyscore',
+            name='leaderboard_game_961d88_idx',
+        ),
+        migrations.AddIndex(
+            model_name='alltimescore',
+            index=models.Index(fields=['game', 'difficulty', '-total_correct', '-accuracy', 'user'], name='leaderboard_game_8953be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyscore',
+            index=models.Index(fields=['game', 'difficulty', 'week_start', '-total_correct', '-accuracy', 'user'], name='leaderboard_game_6da858_idx'),
+        ),
+    ]
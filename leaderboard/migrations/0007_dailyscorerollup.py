@@ -0,0 +1,35 @@
+# Generated by Django 4.2.28 on 2026-10-18 03:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('leaderboard', '0006_weeklystanding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.CharField(choices=[('note', 'Note Reading'), ('interval', 'Interval Training'), ('chord', 'Chord Identification'), ('pitch', 'Pitch Identification')], max_length=20)),
+                ('difficulty', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], default='beginner', max_length=20)),
+                ('day', models.DateField()),
+                ('total_correct', models.IntegerField(default=0)),
+                ('total_attempts', models.IntegerField(default=0)),
+                ('best_streak', models.IntegerField(default=0)),
+                ('sessions_played', models.IntegerField(default=0)),
+                ('accuracy', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', 'difficulty', 'day'], name='leaderboard_game_b8bcbc_idx')],
+                'unique_together': {('user', 'game', 'difficulty', 'day')},
+            },
+        ),
+    ]
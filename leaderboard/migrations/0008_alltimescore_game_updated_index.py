@@ -0,0 +1,17 @@
+# Generated by Django 4.2.28 on 2026-10-18 05:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0007_dailyscorerollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alltimescore',
+            index=models.Index(fields=['game', 'updated_at'], name='leaderboard_game_fba6ec_idx'),
+        ),
+    ]
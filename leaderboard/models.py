@@ -1,7 +1,98 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, Func, Max, Sum
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from rithm.db import upsert
+
+
+class Accuracy(Func):
+    """SQL equivalent of the accuracy calculation done in ``save()``."""
+
+    output_field = FloatField()
+
+    def __init__(self, correct, attempts, **extra):
+        super().__init__(correct, attempts, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        correct, attempts = self.get_source_expressions()
+        correct_sql, correct_params = compiler.compile(correct)
+        attempts_sql, attempts_params = compiler.compile(attempts)
+        sql = f'COALESCE(ROUND(100.0 * {correct_sql} / NULLIF({attempts_sql}, 0), 1), 0)'
+        return sql, (*correct_params, *attempts_params)
+
+
+class AggregateScoreManager(models.Manager):
+    """Manager for tables holding running totals (weekly and all-time scores).
+
+    ``increment()`` folds new results into a row with a single
+    ``INSERT ... ON CONFLICT DO UPDATE`` on the model's unique key, so
+    concurrent submissions from several workers can't lose updates.
+    """
+
+    AGGREGATE_FIELDS = ['total_correct', 'total_attempts', 'best_streak', 'sessions_played', 'accuracy']
+
+    def increment(self, correct, total, best_streak, sessions=1, **key):
+        """Add results to the row identified by ``key`` and return it.
+
+        ``key`` must cover the model's unique_together fields, e.g.
+        ``user_id``, ``game``, ``difficulty`` (and ``week_start``).
+        """
+        if upsert.can_upsert(self.model):
+            return self._upsert(correct, total, best_streak, sessions, key)
+        return self._locked_increment(correct, total, best_streak, sessions, key)
+
+    def _upsert(self, correct, total, best_streak, sessions, key):
+        row = dict(
+            key,
+            total_correct=correct,
+            total_attempts=total,
+            best_streak=best_streak,
+            sessions_played=sessions,
+            accuracy=round((correct / total) * 100, 1) if total > 0 else 0,
+        )
+
+        def accuracy(current, new):
+            correct = f"{current('total_correct')} + {new('total_correct')}"
+            attempts = f"{current('total_attempts')} + {new('total_attempts')}"
+            return f'COALESCE(ROUND(100.0 * ({correct}) / NULLIF({attempts}, 0), 1), 0)'
+
+        stored = upsert.upsert(self.model, row, {
+            'total_correct': upsert.ADD,
+            'total_attempts': upsert.ADD,
+            'best_streak': upsert.MAX,
+            'sessions_played': upsert.ADD,
+            'accuracy': accuracy,
+        }, returning=['id'] + self.AGGREGATE_FIELDS)
+        if stored is None:
+            return self.get(**key)
+        return self.model(**key, **stored)
+
+    def _locked_increment(self, correct, total, best_streak, sessions, key):
+        # Fallback for backends without ON CONFLICT: lock the row instead
+        with transaction.atomic(using=self.db):
+            entry, _ = self.select_for_update().get_or_create(**key)
+            total_correct = F('total_correct') + correct
+            total_attempts = F('total_attempts') + total
+            # update() skips auto_now, which the board ETags rely on
+            stamps = {
+                field.name: timezone.now()
+                for field in self.model._meta.concrete_fields if getattr(field, 'auto_now', False)
+            }
+            self.filter(pk=entry.pk).update(
+                **stamps,
+                total_correct=total_correct,
+                total_attempts=total_attempts,
+                best_streak=Greatest('best_streak', best_streak),
+                sessions_played=F('sessions_played') + sessions,
+                accuracy=Accuracy(total_correct, total_attempts),
+            )
+            entry.refresh_from_db()
+        return entry
+
 
 class Score(models.Model):
     """Individual game score entry for leaderboards."""
@@ -44,9 +135,15 @@ class Score(models.Model):
     def save(self, *args, **kwargs):
         # Calculate accuracy before saving
         if self.total > 0:
-            self.accuracy = round((self.correct / self.total) * 100, 1)
+            self.accuracy = self.calculate_accuracy(self.correct, self.total)
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def calculate_accuracy(correct, total):
+        if total <= 0:
+            return 0
+        return round((correct / total) * 100, 1)
+    
     def __str__(self):
         return f"{self.user.username} - {self.game}: {self.correct} correct ({self.accuracy}%)"
 
@@ -73,11 +170,13 @@ class WeeklyScore(models.Model):
     # Calculated
     accuracy = models.FloatField(default=0)
     
+    objects = AggregateScoreManager()
+    
     class Meta:
         unique_together = ['user', 'game', 'difficulty', 'week_start']
         ordering = ['-total_correct', '-accuracy']
         indexes = [
-            models.Index(fields=['game', 'difficulty', 'week_start', '-total_correct']),
+            models.Index(fields=['game', 'difficulty', 'week_start', '-total_correct', '-accuracy', 'user']),
         ]
     
     def save(self, *args, **kwargs):
@@ -87,3 +186,236 @@ class WeeklyScore(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.game} (week of {self.week_start}): {self.total_correct}"
+
+
+class AllTimeScore(models.Model):
+    """Running all-time totals per user, game and difficulty.
+
+    Kept up to date as scores are saved so the all-time leaderboard is an
+    indexed read instead of a GROUP BY over every Score ever submitted.
+    Rebuild it from the raw scores with ``manage.py rebuild_alltime_scores``.
+    """
+    
+    GAME_CHOICES = Score.GAME_CHOICES
+    DIFFICULTY_CHOICES = Score.DIFFICULTY_CHOICES
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='alltime_scores')
+    game = models.CharField(max_length=20, choices=GAME_CHOICES)
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='beginner')
+    
+    # Aggregated metrics
+    total_correct = models.IntegerField(default=0)
+    total_attempts = models.IntegerField(default=0)
+    best_streak = models.IntegerField(default=0)
+    sessions_played = models.IntegerField(default=0)
+    
+    # Calculated
+    accuracy = models.FloatField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = AggregateScoreManager()
+    
+    class Meta:
+        unique_together = ['user', 'game', 'difficulty']
+        ordering = ['-total_correct', '-accuracy']
+        indexes = [
+            # Matches the board order used for keyset pagination
+            models.Index(fields=['game', 'difficulty', '-total_correct', '-accuracy', 'user']),
+            # Newest change per game, for the board ETags (caching.board_state)
+            models.Index(fields=['game', 'updated_at']),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.total_attempts > 0:
+            self.accuracy = round((self.total_correct / self.total_attempts) * 100, 1)
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.game} (all-time): {self.total_correct}"
+    
+    @classmethod
+    def add_score(cls, score):
+        """Fold a newly created Score into the user's running totals."""
+        return cls.objects.increment(
+            correct=score.correct,
+            total=score.total,
+            best_streak=score.best_streak,
+            user_id=score.user_id,
+            game=score.game,
+            difficulty=score.difficulty,
+        )
+    
+    @classmethod
+    def rebuild(cls, game=None):
+        """Recompute the running totals from the score history.
+
+        Returns the number of aggregate rows written.
+        """
+        entries = [cls(**row) for row in combined_score_totals(game)]
+        for entry in entries:
+            if entry.total_attempts > 0:
+                entry.accuracy = round((entry.total_correct / entry.total_attempts) * 100, 1)
+        
+        with transaction.atomic():
+            stale = cls.objects.all()
+            if game:
+                stale = stale.filter(game=game)
+            stale.delete()
+            cls.objects.bulk_create(entries, batch_size=500)
+        return len(entries)
+
+
+@receiver(post_save, sender=Score)
+def update_alltime_score(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Keep the updated totals around so callers can rank without re-reading them
+        instance.alltime_score = AllTimeScore.add_score(instance)
+
+
+class DailyScoreRollup(models.Model):
+    """Per-day totals of raw Score rows that aged out of retention.
+
+    ``manage.py rollup_scores`` folds scores older than SCORE_RETENTION_DAYS
+    into these rows and deletes them, keeping the raw session log bounded.
+    Anything that totals the score history must combine both tables - see
+    ``combined_score_totals()``.
+    """
+    
+    GAME_CHOICES = Score.GAME_CHOICES
+    DIFFICULTY_CHOICES = Score.DIFFICULTY_CHOICES
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_rollups')
+    game = models.CharField(max_length=20, choices=GAME_CHOICES)
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='beginner')
+    day = models.DateField()
+    
+    # Aggregated metrics
+    total_correct = models.IntegerField(default=0)
+    total_attempts = models.IntegerField(default=0)
+    best_streak = models.IntegerField(default=0)
+    sessions_played = models.IntegerField(default=0)
+    
+    # Calculated
+    accuracy = models.FloatField(default=0)
+    
+    objects = AggregateScoreManager()
+    
+    class Meta:
+        unique_together = ['user', 'game', 'difficulty', 'day']
+        indexes = [
+            models.Index(fields=['game', 'difficulty', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.game} ({self.day}): {self.total_correct}"
+
+
+def combined_score_totals(game=None):
+    """Per (user, game, difficulty) totals over the whole score history.
+
+    Sums the rolled-up days together with the raw Score rows that are still
+    within retention, so results are the same as before any rollup ran.
+    """
+    scores = Score.objects.all()
+    rollups = DailyScoreRollup.objects.all()
+    if game:
+        scores = scores.filter(game=game)
+        rollups = rollups.filter(game=game)
+    
+    raw = scores.values('user_id', 'game', 'difficulty').annotate(
+        total_correct=Sum('correct'),
+        total_attempts=Sum('total'),
+        best_streak=Max('best_streak'),
+        sessions_played=Count('id'),
+    ).order_by()
+    rolled = rollups.values('user_id', 'game', 'difficulty').annotate(
+        total_correct=Sum('total_correct'),
+        total_attempts=Sum('total_attempts'),
+        best_streak=Max('best_streak'),
+        sessions_played=Sum('sessions_played'),
+    ).order_by()
+    
+    totals = {}
+    for row in list(raw) + list(rolled):
+        key = (row['user_id'], row['game'], row['difficulty'])
+        if key not in totals:
+            totals[key] = row
+            continue
+        merged = totals[key]
+        merged['total_correct'] += row['total_correct']
+        merged['total_attempts'] += row['total_attempts']
+        merged['best_streak'] = max(merged['best_streak'], row['best_streak'])
+        merged['sessions_played'] += row['sessions_played']
+    return list(totals.values())
+
+
+class WeeklyStanding(models.Model):
+    """Final ranked standings of a finished week, frozen from WeeklyScore.
+
+    Written once per week by ``manage.py rollover_weekly_scores`` so past
+    boards are served from precomputed ranks and old WeeklyScore rows can
+    be pruned.
+    """
+    
+    GAME_CHOICES = Score.GAME_CHOICES
+    DIFFICULTY_CHOICES = Score.DIFFICULTY_CHOICES
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='weekly_standings')
+    game = models.CharField(max_length=20, choices=GAME_CHOICES)
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='beginner')
+    week_start = models.DateField()
+    rank = models.PositiveIntegerField()
+    
+    # Final totals for the week
+    total_correct = models.IntegerField(default=0)
+    total_attempts = models.IntegerField(default=0)
+    best_streak = models.IntegerField(default=0)
+    sessions_played = models.IntegerField(default=0)
+    accuracy = models.FloatField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'game', 'difficulty', 'week_start']
+        ordering = ['week_start', 'game', 'difficulty', 'rank']
+        indexes = [
+            models.Index(fields=['game', 'difficulty', 'week_start', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.rank} {self.user.username} - {self.game} (week of {self.week_start})"
+    
+    @classmethod
+    def snapshot_week(cls, week_start):
+        """Freeze every board of a week from WeeklyScore.
+
+        Replaces any existing snapshot of that week and returns the number
+        of standings written.
+        """
+        rows = WeeklyScore.objects.filter(week_start=week_start).order_by(
+            'game', 'difficulty', '-total_correct', '-accuracy', 'user_id'
+        )
+        standings = []
+        rank = 0
+        board = None
+        for row in rows.iterator():
+            if (row.game, row.difficulty) != board:
+                board = (row.game, row.difficulty)
+                rank = 0
+            rank += 1
+            standings.append(cls(
+                user_id=row.user_id,
+                game=row.game,
+                difficulty=row.difficulty,
+                week_start=week_start,
+                rank=rank,
+                total_correct=row.total_correct,
+                total_attempts=row.total_attempts,
+                best_streak=row.best_streak,
+                sessions_played=row.sessions_played,
+                accuracy=row.accuracy,
+            ))
+        
+        with transaction.atomic():
+            cls.objects.filter(week_start=week_start).delete()
+            cls.objects.bulk_create(standings, batch_size=500)
+        return len(standings)
@@ -0,0 +1,134 @@
+"""
+Keyset pagination over the aggregate leaderboard tables.
+
+Boards are ordered by (total_correct desc, accuracy desc, user id asc) and a
+page cursor encodes the last row's values plus its position, so fetching
+page N is an index seek from the cursor rather than an OFFSET that scans
+every earlier row. The "around me" view finds the user's position with
+ranking.count_above(), a count on the board index.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+from . import ranking
+from .models import AllTimeScore, WeeklyScore
+
+ORDERING = ('-total_correct', '-accuracy', 'user_id')
+REVERSE_ORDERING = ('total_correct', 'accuracy', '-user_id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row, position):
+    payload = json.dumps([row.total_correct, row.accuracy, row.user_id, position])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(total_correct, accuracy, user_id, position)`` from a cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        total_correct, accuracy, user_id, position = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not all(isinstance(value, (int, float)) for value in (total_correct, accuracy, user_id, position)):
+        raise InvalidCursor('Invalid cursor')
+    return total_correct, accuracy, user_id, position
+
+
+def board_rows(game, difficulty, week_start=None):
+    if week_start is None:
+        rows = AllTimeScore.objects.filter(game=game, difficulty=difficulty)
+    else:
+        rows = WeeklyScore.objects.filter(game=game, difficulty=difficulty, week_start=week_start)
+    return rows.select_related('user')
+
+
+def _after(total_correct, accuracy, user_id):
+    """Rows that come after the given key in board order."""
+    return (
+        Q(total_correct__lt=total_correct)
+        | Q(total_correct=total_correct, accuracy__lt=accuracy)
+        | Q(total_correct=total_correct, accuracy=accuracy, user_id__gt=user_id)
+    )
+
+
+def _before(total_correct, accuracy, user_id):
+    """Rows that come before the given key in board order."""
+    return (
+        Q(total_correct__gt=total_correct)
+        | Q(total_correct=total_correct, accuracy__gt=accuracy)
+        | Q(total_correct=total_correct, accuracy=accuracy, user_id__lt=user_id)
+    )
+
+
+def _entry(row, position):
+    return {
+        'rank': position,
+        'username': row.user.username,
+        'correct': row.total_correct,
+        'accuracy': row.accuracy,
+        'best_streak': row.best_streak,
+        'sessions': row.sessions_played,
+    }
+
+
+def get_page(game, difficulty, limit, cursor=None, week_start=None):
+    """Return ``(entries, next_cursor)`` for one page of a board."""
+    rows = board_rows(game, difficulty, week_start)
+    position = 0
+    if cursor:
+        total_correct, accuracy, user_id, position = decode_cursor(cursor)
+        rows = rows.filter(_after(total_correct, accuracy, user_id))
+
+    page = list(rows.order_by(*ORDERING)[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    entries = [_entry(row, position + i + 1) for i, row in enumerate(page)]
+    next_cursor = encode_cursor(page[-1], position + len(page)) if has_more else None
+    return entries, next_cursor
+
+
+def position_of(row, week_start=None):
+    """1-based position of an aggregate row on its board."""
+    ahead = ranking.count_above(row.game, row.difficulty, row.total_correct, week_start)
+    # Players tied on total are ordered by accuracy, then user id
+    tied_ahead = board_rows(row.game, row.difficulty, week_start).filter(
+        Q(accuracy__gt=row.accuracy) | Q(accuracy=row.accuracy, user_id__lt=row.user_id),
+        total_correct=row.total_correct,
+    ).count()
+    return ahead + tied_ahead + 1
+
+
+def get_user_entry(game, difficulty, user, week_start=None):
+    """The user's board entry with its position, or None if not on the board."""
+    row = board_rows(game, difficulty, week_start).filter(user=user).first()
+    if row is None:
+        return None
+    return _entry(row, position_of(row, week_start))
+
+
+def get_around(game, difficulty, user, radius, week_start=None):
+    """Return ``(entries, next_cursor)`` for the user and ``radius`` rows either side."""
+    rows = board_rows(game, difficulty, week_start)
+    me = rows.filter(user=user).first()
+    if me is None:
+        return [], None
+
+    key = (me.total_correct, me.accuracy, me.user_id)
+    above = list(rows.filter(_before(*key)).order_by(*REVERSE_ORDERING)[:radius])[::-1]
+    below = list(rows.filter(_after(*key)).order_by(*ORDERING)[:radius + 1])
+    has_more = len(below) > radius
+    below = below[:radius]
+
+    first_position = position_of(me, week_start) - len(above)
+    page = above + [me] + below
+    entries = [_entry(row, first_position + i) for i, row in enumerate(page)]
+    next_cursor = encode_cursor(page[-1], first_position + len(page) - 1) if has_more else None
+    return entries, next_cursor
@@ -0,0 +1,58 @@
+"""
+Rank lookups for the leaderboards.
+
+A player's rank is one more than the number of players on the board with
+a higher total. That count runs on the aggregate tables (AllTimeScore /
+WeeklyScore) against their board index on (game, difficulty[, week_start],
+-total_correct), so it is a range count on an index instead of a GROUP BY
+over every Score. Reading the tables directly keeps ranks exact whichever
+gunicorn worker recorded the scores; no per-process copy can go stale.
+
+The count walks the index entries above the player, so a lookup costs
+O(rank), not O(log n): cheap near the top of a board, where players look,
+and linear at the bottom. An order-statistic structure would give
+O(log n), but it would have to live outside the database to be shared
+between workers, which is what the per-process index got wrong.
+"""
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AllTimeScore, WeeklyScore
+
+
+def board(game, difficulty, week_start=None):
+    """Aggregate rows of one board: all-time, or the week of ``week_start``."""
+    if week_start is None:
+        return AllTimeScore.objects.filter(game=game, difficulty=difficulty)
+    return WeeklyScore.objects.filter(game=game, difficulty=difficulty, week_start=week_start)
+
+
+def count_above(game, difficulty, total, week_start=None):
+    """Number of players on a board with a strictly higher total."""
+    return board(game, difficulty, week_start).filter(total_correct__gt=total).order_by().count()
+
+
+def rank(game, difficulty, total, week_start=None):
+    """Rank a total has on a board; equal totals share a rank."""
+    return count_above(game, difficulty, total, week_start) + 1
+
+
+def rank_of(game, difficulty, user_id, week_start=None):
+    """Current rank of a user on a board, or None if they aren't on it."""
+    total = board(game, difficulty, week_start).filter(user_id=user_id).values_list('total_correct', flat=True).first()
+    if total is None:
+        return None
+    return rank(game, difficulty, total, week_start)
+
+
+def with_ranks(rows):
+    """Annotate AllTimeScore or WeeklyScore rows with ``rank`` on their own boards.
+
+    The ranks are counted in a subquery, so any number of rows costs one query.
+    """
+    same_board = {'game': OuterRef('game'), 'difficulty': OuterRef('difficulty')}
+    if rows.model is WeeklyScore:
+        same_board['week_start'] = OuterRef('week_start')
+    above = rows.model.objects.filter(total_correct__gt=OuterRef('total_correct'), **same_board)
+    count = above.order_by().values('game').annotate(n=Count('pk')).values('n')
+    return rows.annotate(rank=Coalesce(Subquery(count), 0) + 1)
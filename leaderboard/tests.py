@@ -1,11 +1,22 @@
 from datetime import date, timedelta
 import json
+import os
+import tempfile
 
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.utils import timezone
 
-from .models import Score, WeeklyScore
+from . import caching, ranking
+from .models import AllTimeScore, DailyScoreRollup, Score, WeeklyScore, WeeklyStanding
 from .views import get_week_start
 
 
@@ -153,10 +164,206 @@ class WeeklyScoreModelTests(TestCase):
         self.assertIn('42', result)
 
 
+class AggregateUpsertTests(TestCase):
+    """Tests for the single-statement aggregate upsert."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('upserter', password='testpass123!')
+        self.key = {
+            'user_id': self.user.id, 'game': 'note', 'difficulty': 'beginner',
+            'week_start': date(2026, 2, 2),
+        }
+
+    def test_first_increment_inserts_row(self):
+        """Incrementing a missing row should create it with the given totals."""
+        weekly = WeeklyScore.objects.increment(correct=8, total=10, best_streak=5, **self.key)
+        self.assertEqual(weekly.total_correct, 8)
+        self.assertEqual(weekly.sessions_played, 1)
+        self.assertEqual(weekly.accuracy, 80.0)
+        self.assertEqual(WeeklyScore.objects.get(**self.key).pk, weekly.pk)
+
+    def test_increment_adds_to_existing_row(self):
+        """Incrementing an existing row should add in the database."""
+        WeeklyScore.objects.increment(correct=8, total=10, best_streak=5, **self.key)
+        weekly = WeeklyScore.objects.increment(correct=1, total=20, best_streak=2, **self.key)
+        self.assertEqual(weekly.total_correct, 9)
+        self.assertEqual(weekly.total_attempts, 30)
+        self.assertEqual(weekly.best_streak, 5)
+        self.assertEqual(weekly.sessions_played, 2)
+        self.assertEqual(weekly.accuracy, 30.0)
+        stored = WeeklyScore.objects.get(**self.key)
+        self.assertEqual(stored.total_correct, 9)
+        self.assertEqual(stored.accuracy, 30.0)
+
+    def test_increment_is_one_query(self):
+        """The upsert should take a single round trip."""
+        WeeklyScore.objects.increment(correct=8, total=10, best_streak=5, **self.key)
+        with self.assertNumQueries(1):
+            WeeklyScore.objects.increment(correct=8, total=10, best_streak=5, **self.key)
+
+    def test_submit_score_does_not_read_aggregates(self):
+        """A submission should insert the score, upsert both aggregates and count the ranks."""
+        client = Client()
+        client.force_login(self.user)
+        payload = json.dumps({'game': 'note', 'correct': 8, 'total': 10})
+        with self.assertNumQueries(9):
+            # Session and user lookups, then inside a savepoint the Score
+            # insert and the all-time and weekly upserts, then one count per rank
+            client.post('/leaderboard/api/submit/', data=payload, content_type='application/json')
+
+
+class AggregateUpsertConcurrencyTests(TransactionTestCase):
+    """Concurrent submissions must not lose updates."""
+
+    def test_threads_do_not_lose_updates(self):
+        """Increments from many threads should all be counted."""
+        user = User.objects.create_user('hammer', password='testpass123!')
+        key = {
+            'user_id': user.id, 'game': 'note', 'difficulty': 'beginner',
+            'week_start': date(2026, 2, 2),
+        }
+        threads, per_thread = 8, 25
+
+        def hammer(streak):
+            try:
+                for _ in range(per_thread):
+                    WeeklyScore.objects.increment(correct=1, total=2, best_streak=streak, **key)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(hammer, range(threads)))
+
+        weekly = WeeklyScore.objects.get(**key)
+        self.assertEqual(weekly.total_correct, threads * per_thread)
+        self.assertEqual(weekly.total_attempts, threads * per_thread * 2)
+        self.assertEqual(weekly.sessions_played, threads * per_thread)
+        self.assertEqual(weekly.best_streak, threads - 1)
+        self.assertEqual(weekly.accuracy, 50.0)
+
+
+class AllTimeScoreModelTests(TestCase):
+    """Tests for the incrementally maintained AllTimeScore aggregate."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alltimer', password='testpass123!')
+
+    def test_score_creates_aggregate_row(self):
+        """Saving a new Score should create the user's all-time row."""
+        Score.objects.create(
+            user=self.user, game='note', difficulty='beginner',
+            correct=8, total=10, best_streak=4
+        )
+        entry = AllTimeScore.objects.get(user=self.user, game='note', difficulty='beginner')
+        self.assertEqual(entry.total_correct, 8)
+        self.assertEqual(entry.total_attempts, 10)
+        self.assertEqual(entry.best_streak, 4)
+        self.assertEqual(entry.sessions_played, 1)
+        self.assertEqual(entry.accuracy, 80.0)
+
+    def test_scores_accumulate(self):
+        """Further scores should increment the existing totals."""
+        Score.objects.create(user=self.user, game='note', correct=8, total=10, best_streak=6)
+        Score.objects.create(user=self.user, game='note', correct=1, total=20, best_streak=2)
+        entry = AllTimeScore.objects.get(user=self.user, game='note')
+        self.assertEqual(entry.total_correct, 9)
+        self.assertEqual(entry.total_attempts, 30)
+        self.assertEqual(entry.best_streak, 6)
+        self.assertEqual(entry.sessions_played, 2)
+        self.assertEqual(entry.accuracy, 30.0)
+
+    def test_difficulties_tracked_separately(self):
+        """Each difficulty should get its own aggregate row."""
+        Score.objects.create(user=self.user, game='note', difficulty='beginner', correct=5, total=10)
+        Score.objects.create(user=self.user, game='note', difficulty='advanced', correct=7, total=10)
+        self.assertEqual(AllTimeScore.objects.filter(user=self.user).count(), 2)
+
+    def test_updating_score_does_not_double_count(self):
+        """Re-saving an existing Score should not add it again."""
+        score = Score.objects.create(user=self.user, game='note', correct=5, total=10)
+        score.save()
+        entry = AllTimeScore.objects.get(user=self.user, game='note')
+        self.assertEqual(entry.total_correct, 5)
+        self.assertEqual(entry.sessions_played, 1)
+
+    def test_rebuild_matches_raw_scores(self):
+        """Rebuilding should recompute totals from the Score table."""
+        Score.objects.create(user=self.user, game='note', correct=8, total=10, best_streak=3)
+        Score.objects.create(user=self.user, game='note', correct=4, total=10, best_streak=5)
+        AllTimeScore.objects.update(total_correct=0, total_attempts=0, sessions_played=0)
+        out = StringIO()
+        call_command('rebuild_alltime_scores', stdout=out)
+        entry = AllTimeScore.objects.get(user=self.user, game='note')
+        self.assertEqual(entry.total_correct, 12)
+        self.assertEqual(entry.total_attempts, 20)
+        self.assertEqual(entry.best_streak, 5)
+        self.assertEqual(entry.sessions_played, 2)
+        self.assertEqual(entry.accuracy, 60.0)
+        self.assertIn('Rebuilt 1', out.getvalue())
+
+    def test_rebuild_single_game_leaves_others(self):
+        """Rebuilding one game should not touch other games' totals."""
+        Score.objects.create(user=self.user, game='note', correct=8, total=10)
+        Score.objects.create(user=self.user, game='chord', correct=6, total=10)
+        AllTimeScore.objects.filter(game='chord').update(total_correct=99)
+        call_command('rebuild_alltime_scores', game='note', stdout=StringIO())
+        self.assertEqual(AllTimeScore.objects.get(game='chord').total_correct, 99)
+        self.assertEqual(AllTimeScore.objects.get(game='note').total_correct, 8)
+
+
+class RankingTests(TestCase):
+    """Tests for rank lookups on the aggregate tables."""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(f'ranked{i}', password='testpass123!') for i in range(3)]
+        for user, correct in zip(self.users, [10, 30, 10]):
+            Score.objects.create(user=user, game='note', correct=correct, total=40)
+
+    def test_rank_is_one_plus_higher_totals(self):
+        """Rank should count strictly higher totals."""
+        self.assertEqual(ranking.rank('note', 'beginner', 30), 1)
+        self.assertEqual(ranking.rank('note', 'beginner', 20), 2)
+        self.assertEqual(ranking.rank('note', 'beginner', 0), 4)
+        self.assertEqual(ranking.count_above('note', 'beginner', 10), 1)
+
+    def test_ties_share_a_rank(self):
+        """Equal totals should share the same rank."""
+        self.assertEqual(ranking.rank_of('note', 'beginner', self.users[1].id), 1)
+        self.assertEqual(ranking.rank_of('note', 'beginner', self.users[0].id), 2)
+        self.assertEqual(ranking.rank_of('note', 'beginner', self.users[2].id), 2)
+
+    def test_unranked_user(self):
+        """Users without a row on a board should have no rank there."""
+        self.assertIsNone(ranking.rank_of('chord', 'beginner', self.users[0].id))
+        self.assertIsNone(ranking.rank_of('note', 'beginner', self.users[0].id, get_week_start() - timedelta(days=7)))
+
+    def test_weekly_board(self):
+        """Weekly ranks should only count that week's totals."""
+        week_start = get_week_start()
+        WeeklyScore.objects.increment(correct=5, total=5, best_streak=5, user_id=self.users[0].id,
+                                      game='note', difficulty='beginner', week_start=week_start)
+        self.assertEqual(ranking.rank_of('note', 'beginner', self.users[0].id, week_start), 1)
+        self.assertEqual(ranking.rank('note', 'beginner', 5, week_start), 1)
+
+    def test_sees_writes_from_other_workers(self):
+        """Ranks should reflect every committed row, whoever wrote it."""
+        self.assertEqual(ranking.rank_of('note', 'beginner', self.users[0].id), 2)
+        # As if another worker folded in a session
+        AllTimeScore.objects.increment(correct=25, total=25, best_streak=25, user_id=self.users[0].id,
+                                       game='note', difficulty='beginner')
+        self.assertEqual(ranking.rank_of('note', 'beginner', self.users[0].id), 1)
+
+    def test_rank_is_one_query(self):
+        """A rank lookup should be a single count."""
+        with self.assertNumQueries(1):
+            ranking.rank('note', 'beginner', 10)
+
+
 class LeaderboardViewTests(TestCase):
     """Tests for the main leaderboard page view."""
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user1 = User.objects.create_user('alice', password='testpass123!')
         self.user2 = User.objects.create_user('bob', password='testpass123!')
@@ -318,6 +525,7 @@ class SubmitScoreAPITests(TestCase):
     """Tests for the submit_score API endpoint."""
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user('player', password='testpass123!')
         self.valid_payload = {
@@ -459,6 +667,34 @@ class SubmitScoreAPITests(TestCase):
         response = self._post_score()
         data = response.json()
         self.assertEqual(data['rank'], 1)
+        self.assertEqual(data['weekly_rank'], 1)
+
+    def test_rank_counts_players_ahead(self):
+        """Rank should be one more than the number of higher totals."""
+        for name, correct in [('ahead1', 30), ('ahead2', 20), ('behind', 5)]:
+            other = User.objects.create_user(name, password='testpass123!')
+            Score.objects.create(user=other, game='note', correct=correct, total=40)
+        data = self._post_score().json()
+        self.assertEqual(data['rank'], 3)
+
+    def test_rank_reflects_accumulated_total(self):
+        """Repeat submissions should rank on the running all-time total."""
+        rival = User.objects.create_user('rival', password='testpass123!')
+        Score.objects.create(user=rival, game='note', correct=25, total=30)
+        self.assertEqual(self._post_score().json()['rank'], 2)
+        self.assertEqual(self._post_score().json()['rank'], 1)
+
+    def test_weekly_rank_ignores_older_weeks(self):
+        """Weekly rank should only consider the current week's totals."""
+        rival = User.objects.create_user('rival', password='testpass123!')
+        Score.objects.create(user=rival, game='note', correct=100, total=100)
+        WeeklyScore.objects.create(
+            user=rival, game='note', week_start=get_week_start() - timedelta(weeks=1),
+            total_correct=100, total_attempts=100
+        )
+        data = self._post_score().json()
+        self.assertEqual(data['rank'], 2)
+        self.assertEqual(data['weekly_rank'], 1)
 
     def test_difficulty_defaults_to_beginner(self):
         """Missing difficulty should default to beginner."""
@@ -492,11 +728,130 @@ class SubmitScoreAPITests(TestCase):
                 f"Difficulty '{difficulty}' should be accepted"
             )
 
+    @override_settings(ROOT_URLCONF='rithm.asgi_urls')
+    async def test_submit_under_asgi(self):
+        """The async view should store the score when served over ASGI."""
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.post(
+            '/leaderboard/api/submit/',
+            data=json.dumps(self.valid_payload),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rank'], 1)
+        self.assertEqual(await Score.objects.filter(user=self.user).acount(), 1)
+
+
+class SubmitScoreBatchAPITests(TestCase):
+    """Tests for the batch score submission endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user('batcher', password='testpass123!')
+        self.client.login(username='batcher', password='testpass123!')
+
+    def _post_batch(self, sessions):
+        return self.client.post(
+            '/leaderboard/api/submit/batch/',
+            data=json.dumps({'sessions': sessions}),
+            content_type='application/json',
+        )
+
+    def test_creates_scores_and_aggregates(self):
+        """Every valid session should be stored and folded into the totals."""
+        response = self._post_batch([
+            {'game': 'note', 'difficulty': 'beginner', 'correct': 8, 'total': 10, 'bestStreak': 4},
+            {'game': 'note', 'difficulty': 'beginner', 'correct': 12, 'total': 20, 'bestStreak': 7},
+            {'game': 'chord', 'difficulty': 'advanced', 'correct': 5, 'total': 10, 'bestStreak': 2},
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['accepted'], 3)
+        self.assertEqual(Score.objects.count(), 3)
+        self.assertEqual(Score.objects.get(game='chord').accuracy, 50.0)
+
+        alltime = AllTimeScore.objects.get(game='note', difficulty='beginner')
+        self.assertEqual(alltime.total_correct, 20)
+        self.assertEqual(alltime.total_attempts, 30)
+        self.assertEqual(alltime.best_streak, 7)
+        self.assertEqual(alltime.sessions_played, 2)
+
+        weekly = WeeklyScore.objects.get(game='note', difficulty='beginner')
+        self.assertEqual(weekly.total_correct, 20)
+        self.assertEqual(weekly.sessions_played, 2)
+        self.assertEqual(weekly.week_start, get_week_start())
+
+    def test_results_include_ranks_per_session(self):
+        """Each accepted session should report its board's rank."""
+        rival = User.objects.create_user('rival', password='testpass123!')
+        Score.objects.create(user=rival, game='note', correct=15, total=20)
+        results = self._post_batch([
+            {'game': 'note', 'correct': 8, 'total': 10},
+            {'game': 'note', 'correct': 8, 'total': 10},
+            {'game': 'pitch', 'correct': 8, 'total': 10},
+        ]).json()['results']
+        self.assertEqual([r['rank'] for r in results], [1, 1, 1])
+        self.assertEqual(results[0]['score_id'], Score.objects.filter(user=self.user).order_by('id')[0].id)
+        self.assertEqual(results[2]['game'], 'pitch')
+
+    def test_invalid_sessions_are_reported_not_stored(self):
+        """Invalid sessions should be rejected individually."""
+        data = self._post_batch([
+            {'game': 'note', 'correct': 8, 'total': 10},
+            {'game': 'bogus', 'correct': 8, 'total': 10},
+            {'game': 'note', 'correct': 3, 'total': 5},
+            {'game': 'note', 'correct': 'x', 'total': 10},
+            'not a session',
+        ]).json()
+        self.assertEqual(data['accepted'], 1)
+        self.assertEqual(data['rejected'], 4)
+        self.assertTrue(data['results'][0]['success'])
+        self.assertEqual(data['results'][1]['error'], 'Invalid game')
+        self.assertEqual(data['results'][2]['error'], 'Minimum 10 attempts required')
+        self.assertEqual(data['results'][3]['error'], 'Invalid score values')
+        self.assertEqual(data['results'][4]['error'], 'Invalid session')
+        self.assertEqual(Score.objects.count(), 1)
+
+    def test_one_upsert_per_board(self):
+        """Sessions for the same board should share a single upsert."""
+        sessions = [{'game': 'note', 'correct': 8, 'total': 10}] * 20
+        with self.assertNumQueries(9):
+            # Session and user lookups, savepoint, Score bulk insert,
+            # all-time and weekly upserts, release, then two index loads
+            self._post_batch(sessions)
+        self.assertEqual(WeeklyScore.objects.get().sessions_played, 20)
+
+    def test_empty_batch_returns_400(self):
+        """A batch without sessions should be rejected."""
+        self.assertEqual(self._post_batch([]).status_code, 400)
+
+    def test_oversized_batch_returns_400(self):
+        """Batches over the size limit should be rejected."""
+        from .views import MAX_BATCH_SESSIONS
+        sessions = [{'game': 'note', 'correct': 8, 'total': 10}] * (MAX_BATCH_SESSIONS + 1)
+        self.assertEqual(self._post_batch(sessions).status_code, 400)
+        self.assertEqual(Score.objects.count(), 0)
+
+    def test_unauthenticated_returns_401(self):
+        """Anonymous users should not be able to submit."""
+        self.client.logout()
+        response = self._post_batch([{'game': 'note', 'correct': 8, 'total': 10}])
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalidates_cached_boards(self):
+        """Cached boards for the affected games should be refreshed."""
+        self.client.get('/leaderboard/api/rankings/?game=note')
+        self._post_batch([{'game': 'note', 'correct': 8, 'total': 10}])
+        board = self.client.get('/leaderboard/api/rankings/?game=note').json()['leaderboard']
+        self.assertEqual(board[0]['correct'], 8)
+
 
 class APILeaderboardTests(TestCase):
     """Tests for the api_leaderboard JSON endpoint."""
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user1 = User.objects.create_user('alice', password='testpass123!')
         self.user2 = User.objects.create_user('bob', password='testpass123!')
@@ -618,3 +973,462 @@ class APILeaderboardTests(TestCase):
         """Leaderboard API should be accessible anonymously."""
         response = self.client.get('/leaderboard/api/rankings/')
         self.assertEqual(response.status_code, 200)
+
+
+class RankingsPageAPITests(TestCase):
+    """Tests for the keyset-paginated rankings API."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        # 12 players: p00 has 0 correct ... p11 has 110 correct
+        self.users = []
+        for i in range(12):
+            user = User.objects.create_user(f'p{i:02d}')
+            Score.objects.create(user=user, game='note', correct=i * 10, total=200)
+            self.users.append(user)
+
+    def _get(self, **params):
+        return self.client.get('/leaderboard/api/rankings/page/', params)
+
+    def test_first_page(self):
+        """The first page should hold the top entries and a cursor."""
+        data = self._get(limit=5).json()
+        self.assertEqual([e['username'] for e in data['leaderboard']], ['p11', 'p10', 'p09', 'p08', 'p07'])
+        self.assertEqual([e['rank'] for e in data['leaderboard']], [1, 2, 3, 4, 5])
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_cursor_walks_the_whole_board(self):
+        """Following cursors should visit every entry once, in order."""
+        seen, ranks, cursor = [], [], None
+        while True:
+            params = {'limit': 5}
+            if cursor:
+                params['cursor'] = cursor
+            data = self._get(**params).json()
+            seen += [e['username'] for e in data['leaderboard']]
+            ranks += [e['rank'] for e in data['leaderboard']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [f'p{i:02d}' for i in range(11, -1, -1)])
+        self.assertEqual(ranks, list(range(1, 13)))
+
+    def test_ties_are_broken_by_accuracy_then_user(self):
+        """Equal totals should page deterministically without skipping rows."""
+        for i in range(3):
+            user = User.objects.create_user(f'tie{i}')
+            Score.objects.create(user=user, game='note', correct=200, total=400 - i)
+        first = self._get(limit=2).json()
+        second = self._get(limit=2, cursor=first['next_cursor']).json()
+        names = [e['username'] for e in first['leaderboard'] + second['leaderboard']]
+        self.assertEqual(names, ['tie2', 'tie1', 'tie0', 'p11'])
+
+    def test_deep_page_query_count_matches_first_page(self):
+        """A deep page should cost the same number of queries as page one."""
+        cursor = self._get(limit=10).json()['next_cursor']
+        with self.assertNumQueries(1):
+            self._get(limit=1)
+        with self.assertNumQueries(1):
+            self._get(limit=1, cursor=cursor)
+
+    def test_around_me(self):
+        """around=me should return the user's neighbourhood with positions."""
+        self.client.force_login(self.users[5])
+        data = self._get(around='me', radius=2).json()
+        entries = data['leaderboard']
+        self.assertEqual([e['username'] for e in entries], ['p07', 'p06', 'p05', 'p04', 'p03'])
+        self.assertEqual([e['rank'] for e in entries], [5, 6, 7, 8, 9])
+        following = self._get(limit=2, cursor=data['next_cursor']).json()['leaderboard']
+        self.assertEqual([e['rank'] for e in following], [10, 11])
+
+    def test_around_me_at_top_of_board(self):
+        """The leader should get only entries below them."""
+        self.client.force_login(self.users[11])
+        entries = self._get(around='me', radius=2).json()['leaderboard']
+        self.assertEqual([e['rank'] for e in entries], [1, 2, 3])
+
+    def test_around_me_requires_login(self):
+        """Anonymous users have no position to centre on."""
+        self.assertEqual(self._get(around='me').status_code, 401)
+
+    def test_around_me_without_scores_is_empty(self):
+        """Users not on the board should get an empty list."""
+        self.client.force_login(User.objects.create_user('newbie'))
+        self.assertEqual(self._get(around='me').json()['leaderboard'], [])
+
+    def test_weekly_period(self):
+        """Weekly boards should page over the current week's totals."""
+        WeeklyScore.objects.create(
+            user=self.users[0], game='note', week_start=get_week_start(),
+            total_correct=5, total_attempts=10
+        )
+        data = self._get(period='weekly').json()
+        self.assertEqual([e['username'] for e in data['leaderboard']], ['p00'])
+
+    def test_invalid_cursor_returns_400(self):
+        """Garbage cursors should be rejected."""
+        self.assertEqual(self._get(cursor='not-a-cursor').status_code, 400)
+
+    def test_invalid_game_returns_400(self):
+        """Unknown games should be rejected."""
+        self.assertEqual(self._get(game='bogus').status_code, 400)
+
+    def test_leaderboard_page_shows_rank_outside_top_50(self):
+        """The main page should show the user's rank even below the top 50."""
+        for i in range(50):
+            user = User.objects.create_user(f'top{i}')
+            Score.objects.create(user=user, game='note', correct=1000 + i, total=2000)
+        self.client.force_login(self.users[10])
+        response = self.client.get('/leaderboard/?game=note')
+        self.assertEqual(response.context['user_rank']['rank'], 52)
+
+
+class WeeklyRolloverTests(TestCase):
+    """Tests for freezing finished weeks into WeeklyStanding."""
+
+    def setUp(self):
+        cache.clear()
+        self.this_week = get_week_start()
+        self.last_week = self.this_week - timedelta(weeks=1)
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        for user, correct in [(self.alice, 10), (self.bob, 20)]:
+            WeeklyScore.objects.create(
+                user=user, game='note', week_start=self.last_week,
+                total_correct=correct, total_attempts=30, sessions_played=2
+            )
+        WeeklyScore.objects.create(
+            user=self.alice, game='note', week_start=self.this_week,
+            total_correct=5, total_attempts=10
+        )
+
+    def _rollover(self, *args):
+        out = StringIO()
+        call_command('rollover_weekly_scores', *args, stdout=out)
+        return out.getvalue()
+
+    def test_snapshots_finished_weeks_only(self):
+        """Only weeks before the current one should be frozen."""
+        self._rollover()
+        standings = list(WeeklyStanding.objects.order_by('rank'))
+        self.assertEqual([(s.user, s.rank) for s in standings], [(self.bob, 1), (self.alice, 2)])
+        self.assertTrue(all(s.week_start == self.last_week for s in standings))
+        self.assertEqual(standings[0].total_correct, 20)
+        self.assertEqual(standings[0].sessions_played, 2)
+
+    def test_ranks_restart_per_board(self):
+        """Each game/difficulty board should be ranked independently."""
+        WeeklyScore.objects.create(
+            user=self.alice, game='chord', week_start=self.last_week,
+            total_correct=1, total_attempts=10
+        )
+        self._rollover()
+        self.assertEqual(WeeklyStanding.objects.get(game='chord').rank, 1)
+
+    def test_rerun_is_idempotent(self):
+        """Running twice should not duplicate standings."""
+        self._rollover()
+        self._rollover()
+        self.assertEqual(WeeklyStanding.objects.count(), 2)
+
+    def test_prune_keeps_recent_and_unsnapshotted_weeks(self):
+        """Pruning should only delete rows of old, frozen weeks."""
+        old_week = self.this_week - timedelta(weeks=5)
+        WeeklyScore.objects.create(
+            user=self.bob, game='note', week_start=old_week,
+            total_correct=3, total_attempts=10
+        )
+        self._rollover('--keep-weeks', '2')
+        self.assertFalse(WeeklyScore.objects.filter(week_start=old_week).exists())
+        self.assertTrue(WeeklyStanding.objects.filter(week_start=old_week).exists())
+        self.assertEqual(WeeklyScore.objects.filter(week_start=self.last_week).count(), 2)
+
+    def test_dry_run_changes_nothing(self):
+        """--dry-run should only report."""
+        out = self._rollover('--dry-run', '--keep-weeks', '1')
+        self.assertIn('Would snapshot 2', out)
+        self.assertEqual(WeeklyStanding.objects.count(), 0)
+        self.assertEqual(WeeklyScore.objects.count(), 3)
+
+    def test_last_week_board_served_from_standings(self):
+        """The last-week board should use the frozen ranks."""
+        self._rollover()
+        WeeklyScore.objects.filter(week_start=self.last_week).delete()
+        response = self.client.get('/leaderboard/?game=note&period=lastweek')
+        board = response.context['leaderboard']
+        self.assertEqual([e['username'] for e in board], ['bob', 'alice'])
+        self.assertEqual(board[1]['rank'], 2)
+
+    def test_last_week_board_falls_back_to_live_rows(self):
+        """Before rollover runs, last week should come from WeeklyScore."""
+        response = self.client.get('/leaderboard/?game=note&period=lastweek')
+        self.assertEqual([e['username'] for e in response.context['leaderboard']], ['bob', 'alice'])
+
+
+class ScoreRollupTests(TestCase):
+    """Tests for rolling expired raw scores up into daily totals."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('veteran')
+        self.old_day = timezone.now() - timedelta(days=100)
+        for correct, streak in [(5, 2), (7, 6), (9, 3)]:
+            score = Score.objects.create(
+                user=self.user, game='note', correct=correct, total=10, best_streak=streak
+            )
+            Score.objects.filter(pk=score.pk).update(created_at=self.old_day)
+        Score.objects.create(user=self.user, game='note', correct=4, total=10, best_streak=1)
+
+    def _rollup(self, *args):
+        out = StringIO()
+        call_command('rollup_scores', '--days', '90', *args, stdout=out)
+        return out.getvalue()
+
+    def test_expired_scores_are_rolled_up_and_deleted(self):
+        """Old rows should become one daily rollup; recent rows stay raw."""
+        self._rollup()
+        self.assertEqual(Score.objects.count(), 1)
+        rollup = DailyScoreRollup.objects.get()
+        self.assertEqual(rollup.day, self.old_day.date())
+        self.assertEqual(rollup.total_correct, 21)
+        self.assertEqual(rollup.total_attempts, 30)
+        self.assertEqual(rollup.best_streak, 6)
+        self.assertEqual(rollup.sessions_played, 3)
+        self.assertEqual(rollup.accuracy, 70.0)
+
+    def test_small_batches_fold_into_the_same_day(self):
+        """Batches should accumulate into existing rollup rows."""
+        out = self._rollup('--batch-size', '2')
+        self.assertIn('Rolled up 3 scores', out)
+        self.assertEqual(DailyScoreRollup.objects.get().sessions_played, 3)
+
+    def test_dry_run_changes_nothing(self):
+        """--dry-run should only report."""
+        out = self._rollup('--dry-run')
+        self.assertIn('Would roll up 3 scores', out)
+        self.assertEqual(Score.objects.count(), 4)
+        self.assertFalse(DailyScoreRollup.objects.exists())
+
+    def test_rebuild_after_rollup_matches_original_totals(self):
+        """All-time totals rebuilt after rollup should be unchanged."""
+        before = AllTimeScore.objects.values().get()
+        self._rollup()
+        call_command('rebuild_alltime_scores', stdout=StringIO())
+        after = AllTimeScore.objects.values().get()
+        for field in ['total_correct', 'total_attempts', 'best_streak', 'sessions_played', 'accuracy']:
+            self.assertEqual(after[field], before[field], field)
+
+    def test_leaderboard_unchanged_by_rollup(self):
+        """The all-time board should look the same before and after rollup."""
+        before = self.client.get('/leaderboard/api/rankings/?game=note').json()
+        self._rollup()
+        call_command('rebuild_alltime_scores', stdout=StringIO())
+        after = self.client.get('/leaderboard/api/rankings/?game=note').json()
+        self.assertEqual(after, before)
+
+
+class SyntheticDataTests(TestCase):
+    """Tests for the synthetic data generator and benchmark harness."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generates_consistent_population(self):
+        """Generated scores should be reflected in the aggregate tables."""
+        call_command('generate_synthetic_data', '--users', '15', '--weeks', '2', stdout=StringIO())
+        users = User.objects.filter(username__startswith='synth_')
+        self.assertEqual(users.count(), 15)
+        self.assertFalse(users.first().has_usable_password())
+        self.assertEqual(users.filter(profile__isnull=False).count(), 15)
+
+        total = sum(Score.objects.values_list('correct', flat=True))
+        self.assertGreater(total, 0)
+        self.assertEqual(sum(AllTimeScore.objects.values_list('total_correct', flat=True)), total)
+        self.assertEqual(sum(WeeklyScore.objects.values_list('total_correct', flat=True)), total)
+
+        oldest = Score.objects.order_by('created_at').first().created_at
+        self.assertGreaterEqual(oldest.date(), timezone.now().date() - timedelta(days=14))
+
+    def test_clear_replaces_previous_run(self):
+        call_command('generate_synthetic_data', '--users', '5', stdout=StringIO())
+        call_command('generate_synthetic_data', '--users', '3', '--clear', stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='synth_').count(), 3)
+
+    def test_rejects_unknown_game(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', '--games', 'kazoo=1', stdout=StringIO())
+
+    def test_benchmark_writes_report(self):
+        """The harness should report latency and queries for every endpoint."""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            call_command(
+                'run_benchmarks', '--in-place', '--sizes', '5', '--iterations', '2',
+                '--output', output, stdout=StringIO(),
+            )
+            with open(output) as fh:
+                report = json.load(fh)
+
+        endpoints = report['sizes']['5']['endpoints']
+        self.assertIn('submit_score', endpoints)
+        for name, result in endpoints.items():
+            self.assertEqual(result['status'], [200], name)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertIsInstance(result['queries'], int)
+
+    def test_server_benchmark_points_servers_at_its_database(self):
+        """benchmark_servers should hand gunicorn a DATABASE_URL for the database it seeded."""
+        import dj_database_url
+        from leaderboard.management.commands.benchmark_servers import database_url
+        sqlite = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': '/tmp/test_db.sqlite3'}
+        self.assertEqual(dj_database_url.parse(database_url(sqlite))['NAME'], '/tmp/test_db.sqlite3')
+        postgres = {
+            'ENGINE': 'django.db.backends.postgresql', 'NAME': 'test_rithm',
+            'USER': 'rithm', 'PASSWORD': 'p@ss', 'HOST': 'db', 'PORT': '5432',
+        }
+        parsed = dj_database_url.parse(database_url(postgres))
+        self.assertEqual(
+            {key: parsed[key] for key in ('NAME', 'USER', 'PASSWORD', 'HOST')},
+            {'NAME': 'test_rithm', 'USER': 'rithm', 'PASSWORD': 'p@ss', 'HOST': 'db'},
+        )
+        self.assertEqual(int(parsed['PORT']), 5432)
+
+    def test_server_benchmark_skip_data_needs_in_place(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_servers', '--skip-data', stdout=StringIO())
+
+
+class LeaderboardCacheTests(TestCase):
+    """Tests for the leaderboard read cache."""
+
+    def setUp(self):
+        cache.clear()
+        caching.reset_stats()
+        self.client = Client()
+        self.user = User.objects.create_user('cached', password='testpass123!')
+        Score.objects.create(user=self.user, game='note', correct=10, total=15)
+
+    def test_second_read_is_served_from_cache(self):
+        """Repeat reads should only check the board state, not query the board."""
+        self.client.get('/leaderboard/api/rankings/?game=note')
+        with self.assertNumQueries(1):
+            response = self.client.get('/leaderboard/api/rankings/?game=note')
+        self.assertEqual(response.json()['leaderboard'][0]['correct'], 10)
+        stats = caching.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_limit_is_part_of_the_key(self):
+        """Different limits should be cached separately."""
+        self.client.get('/leaderboard/api/rankings/?game=note&limit=5')
+        self.client.get('/leaderboard/api/rankings/?game=note&limit=10')
+        self.assertEqual(caching.get_stats()['misses'], 2)
+
+    def test_submit_invalidates_cached_boards(self):
+        """Submitting a score should make the next read see the new totals."""
+        self.client.get('/leaderboard/?game=note&difficulty=beginner')
+        self.client.login(username='cached', password='testpass123!')
+        self.client.post(
+            '/leaderboard/api/submit/',
+            data=json.dumps({'game': 'note', 'correct': 5, 'total': 10}),
+            content_type='application/json',
+        )
+        response = self.client.get('/leaderboard/?game=note&difficulty=beginner')
+        self.assertEqual(response.context['leaderboard'][0]['correct'], 15)
+
+    def test_invalidation_is_per_game(self):
+        """A score in one game should keep other games' boards cached."""
+        self.client.get('/leaderboard/api/rankings/?game=note')
+        self.client.get('/leaderboard/api/rankings/?game=chord')
+        Score.objects.create(user=self.user, game='chord', correct=1, total=2)
+        self.client.get('/leaderboard/api/rankings/?game=note')
+        self.client.get('/leaderboard/api/rankings/?game=chord')
+        stats = caching.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+
+    def test_unknown_game_never_reaches_the_cache(self):
+        """Junk game names should be rejected without adding cache keys."""
+        cache.clear()
+        response = self.client.get('/leaderboard/api/rankings/?game=junk123')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/leaderboard/?game=junk456')
+        self.assertEqual(response.context['current_game'], 'note')
+        self.assertFalse([key for key in cache._cache if 'junk' in key])
+
+    def test_cache_stats_requires_staff(self):
+        """Cache counters should only be visible to staff users."""
+        self.client.login(username='cached', password='testpass123!')
+        response = self.client.get('/leaderboard/api/cache-stats/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_cache_stats_for_staff(self):
+        """Staff should see hit/miss counters."""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username='cached', password='testpass123!')
+        self.client.get('/leaderboard/api/rankings/?game=note')
+        response = self.client.get('/leaderboard/api/cache-stats/')
+        stats = response.json()['stats']
+        self.assertEqual(stats['misses'], 1)
+        self.assertIn('hit_rate', stats)
+
+    def test_revalidation_skips_the_board(self):
+        """A matching If-None-Match should get a 304 from one aggregate, without a cache lookup."""
+        response = self.client.get('/leaderboard/api/rankings/?game=note')
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/leaderboard/api/rankings/?game=note', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        stats = caching.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 1))
+
+    def test_etag_is_per_board(self):
+        """Other periods, limits and games should not match a board's ETag."""
+        etag = self.client.get('/leaderboard/api/rankings/?game=note')['ETag']
+        for query in ['game=note&period=weekly', 'game=note&limit=5', 'game=chord']:
+            response = self.client.get(f'/leaderboard/api/rankings/?{query}', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, query)
+
+    def test_submit_changes_etag(self):
+        """Submitting a score should make the game's earlier ETags stale."""
+        etag = self.client.get('/leaderboard/api/rankings/?game=note')['ETag']
+        self.client.login(username='cached', password='testpass123!')
+        self.client.post(
+            '/leaderboard/api/submit/',
+            data=json.dumps({'game': 'note', 'correct': 5, 'total': 10}),
+            content_type='application/json',
+        )
+        response = self.client.get('/leaderboard/api/rankings/?game=note', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['leaderboard'][0]['correct'], 15)
+
+    def test_boards_are_cacheable_by_proxies(self):
+        """Boards should be shared-cacheable for as long as the server caches them."""
+        with self.settings(LEADERBOARD_CACHE_TIMEOUT=30):
+            response = self.client.get('/leaderboard/api/rankings/?game=note')
+        directives = {d.strip() for d in response['Cache-Control'].split(',')}
+        self.assertEqual(directives, {'public', 'max-age=0', 's-maxage=30'})
+
+    def test_etag_sees_scores_from_other_workers(self):
+        """A score saved without touching this worker's cache should still change the ETag and board."""
+        from unittest import mock
+        etag = self.client.get('/leaderboard/api/rankings/?game=note')['ETag']
+
+        # As another gunicorn worker would: its invalidation never reaches this locmem cache
+        with mock.patch('leaderboard.caching.invalidate'):
+            Score.objects.create(user=self.user, game='note', correct=5, total=10)
+        response = self.client.get('/leaderboard/api/rankings/?game=note', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['leaderboard'][0]['correct'], 15)
+
+    def test_etag_changes_when_a_player_leaves(self):
+        """Deleting a player's rows should change the ETag even though no row was stamped."""
+        other = User.objects.create_user('leaver')
+        Score.objects.create(user=other, game='note', correct=1, total=2)
+        etag = self.client.get('/leaderboard/api/rankings/?game=note')['ETag']
+        other.delete()
+        response = self.client.get('/leaderboard/api/rankings/?game=note', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
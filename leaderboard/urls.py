@@ -4,5 +4,8 @@ from . import views
 urlpatterns = [
     path('', views.leaderboard_view, name='leaderboard'),
     path('api/submit/', views.submit_score, name='submit-score'),
+    path('api/submit/batch/', views.submit_score_batch, name='submit-score-batch'),
     path('api/rankings/', views.api_leaderboard, name='api-leaderboard'),
+    path('api/rankings/page/', views.api_rankings_page, name='api-rankings-page'),
+    path('api/cache-stats/', views.cache_stats, name='leaderboard-cache-stats'),
 ]
@@ -1,13 +1,24 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.db.models import Sum, Max, Count
+from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from datetime import timedelta
-from .models import Score, WeeklyScore
+from .models import AllTimeScore, Score, WeeklyScore, WeeklyStanding
+from . import caching as leaderboard_cache
+from . import pagination, ranking
 import json
 
 
+# Upper bound on sessions accepted by one batch submission
+MAX_BATCH_SESSIONS = 100
+
+# Checked before any cache access, so junk ?game= values can't add cache keys
+GAMES = [game for game, _ in Score.GAME_CHOICES]
+
+
 def get_week_start(date=None):
     """Get Monday of the current week."""
     if date is None:
@@ -15,13 +26,97 @@ def get_week_start(date=None):
     return date - timedelta(days=date.weekday())
 
 
+def _weekly_board(game, difficulty, week_start, limit):
+    leaders = WeeklyScore.objects.filter(
+        game=game,
+        difficulty=difficulty,
+        week_start=week_start
+    ).select_related('user').order_by('-total_correct', '-accuracy')[:limit]
+    
+    return [{
+        'rank': i + 1,
+        'username': score.user.username,
+        'correct': score.total_correct,
+        'accuracy': score.accuracy,
+        'best_streak': score.best_streak,
+        'sessions': score.sessions_played,
+    } for i, score in enumerate(leaders)]
+
+
+def _past_week_board(game, difficulty, week_start, limit):
+    # Finished weeks are served from the frozen standings when available
+    standings = WeeklyStanding.objects.filter(
+        game=game,
+        difficulty=difficulty,
+        week_start=week_start
+    ).select_related('user').order_by('rank')[:limit]
+    
+    data = [{
+        'rank': standing.rank,
+        'username': standing.user.username,
+        'correct': standing.total_correct,
+        'accuracy': standing.accuracy,
+        'best_streak': standing.best_streak,
+        'sessions': standing.sessions_played,
+    } for standing in standings]
+    return data or _weekly_board(game, difficulty, week_start, limit)
+
+
+def _alltime_board(game, difficulty, limit):
+    # Read the running per-user totals
+    leaders = AllTimeScore.objects.filter(
+        game=game,
+        difficulty=difficulty
+    ).select_related('user').order_by('-total_correct', '-accuracy')[:limit]
+    
+    return [{
+        'rank': i + 1,
+        'username': score.user.username,
+        'correct': score.total_correct,
+        'accuracy': score.accuracy,
+        'best_streak': score.best_streak,
+        'sessions': score.sessions_played,
+    } for i, score in enumerate(leaders)]
+
+
+def _weekly_api_board(game, week_start, limit):
+    leaders = WeeklyScore.objects.filter(
+        game=game,
+        week_start=week_start
+    ).select_related('user').order_by('-total_correct', '-accuracy')[:limit]
+    
+    return [{
+        'rank': i + 1,
+        'username': score.user.username,
+        'correct': score.total_correct,
+        'accuracy': score.accuracy,
+    } for i, score in enumerate(leaders)]
+
+
+def _alltime_api_board(game, limit):
+    # Sum the per-difficulty totals rather than the raw score history
+    leaders = AllTimeScore.objects.filter(game=game).values('user__username').annotate(
+        total_correct=Sum('total_correct'),
+        total_attempts=Sum('total_attempts'),
+    ).order_by('-total_correct')[:limit]
+    
+    return [{
+        'rank': i + 1,
+        'username': leader['user__username'],
+        'correct': leader['total_correct'],
+        'accuracy': round((leader['total_correct'] / leader['total_attempts'] * 100), 1) if leader['total_attempts'] > 0 else 0,
+    } for i, leader in enumerate(leaders)]
+
+
 def leaderboard_view(request):
     """Main leaderboard page."""
     game = request.GET.get('game', 'note')
     difficulty = request.GET.get('difficulty', 'beginner')
     period = request.GET.get('period', 'alltime')
     
-    # Validate difficulty
+    # Validate game and difficulty
+    if game not in GAMES:
+        game = 'note'
     if difficulty not in ['beginner', 'intermediate', 'advanced']:
         difficulty = 'beginner'
     
@@ -38,41 +133,24 @@ def leaderboard_view(request):
         {'id': 'advanced', 'name': 'Advanced', 'icon': 'fa-tree'},
     ]
     
+    week_start = None
     if period == 'weekly':
         week_start = get_week_start()
-        leaders = WeeklyScore.objects.filter(
-            game=game,
-            difficulty=difficulty,
-            week_start=week_start
-        ).select_related('user').order_by('-total_correct', '-accuracy')[:50]
-        
-        leaderboard_data = [{
-            'rank': i + 1,
-            'username': score.user.username,
-            'correct': score.total_correct,
-            'accuracy': score.accuracy,
-            'best_streak': score.best_streak,
-            'sessions': score.sessions_played,
-        } for i, score in enumerate(leaders)]
+        leaderboard_data = leaderboard_cache.get_board(
+            game, difficulty, f'weekly:{week_start}', 50,
+            lambda: _weekly_board(game, difficulty, week_start, 50)
+        )
+    elif period == 'lastweek':
+        week_start = get_week_start() - timedelta(weeks=1)
+        leaderboard_data = leaderboard_cache.get_board(
+            game, difficulty, f'weekly:{week_start}', 50,
+            lambda: _past_week_board(game, difficulty, week_start, 50)
+        )
     else:
-        # All-time: aggregate all scores per user
-        from django.contrib.auth.models import User
-        
-        leaders = Score.objects.filter(game=game, difficulty=difficulty).values('user__username').annotate(
-            total_correct=Sum('correct'),
-            total_attempts=Sum('total'),
-            max_streak=Max('best_streak'),
-            sessions=Count('id')
-        ).order_by('-total_correct')[:50]
-        
-        leaderboard_data = [{
-            'rank': i + 1,
-            'username': leader['user__username'],
-            'correct': leader['total_correct'],
-            'accuracy': round((leader['total_correct'] / leader['total_attempts'] * 100), 1) if leader['total_attempts'] > 0 else 0,
-            'best_streak': leader['max_streak'],
-            'sessions': leader['sessions'],
-        } for i, leader in enumerate(leaders)]
+        leaderboard_data = leaderboard_cache.get_board(
+            game, difficulty, 'alltime', 50,
+            lambda: _alltime_board(game, difficulty, 50)
+        )
     
     # Get current user's rank
     user_rank = None
@@ -81,6 +159,25 @@ def leaderboard_view(request):
             if entry['username'] == request.user.username:
                 user_rank = entry
                 break
+        else:
+            if len(leaderboard_data) == 50 and period == 'lastweek':
+                standing = WeeklyStanding.objects.filter(
+                    user=request.user, game=game, difficulty=difficulty, week_start=week_start
+                ).first()
+                if standing:
+                    user_rank = {
+                        'rank': standing.rank,
+                        'username': request.user.username,
+                        'correct': standing.total_correct,
+                        'accuracy': standing.accuracy,
+                        'best_streak': standing.best_streak,
+                        'sessions': standing.sessions_played,
+                    }
+            elif len(leaderboard_data) == 50:
+                # Outside the top 50: look up their position directly
+                user_rank = pagination.get_user_entry(
+                    game, difficulty, request.user, week_start=week_start
+                )
     
     context = {
         'games': games,
@@ -95,32 +192,50 @@ def leaderboard_view(request):
     return render(request, 'leaderboard/index.html', context)
 
 
-@require_POST
-def submit_score(request):
-    """API endpoint to submit a game score."""
-    if not request.user.is_authenticated:
-        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+def _clean_session(data):
+    """Validate one submitted game session.
+
+    Returns ``(session, None)`` with normalised values, or ``(None, error)``.
+    """
+    game = data.get('game')
+    difficulty = data.get('difficulty', 'beginner')
+    correct = data.get('correct', 0)
+    total = data.get('total', 0)
+    best_streak = data.get('bestStreak', 0)
     
-    try:
-        data = json.loads(request.body)
-        game = data.get('game')
-        difficulty = data.get('difficulty', 'beginner')
-        correct = data.get('correct', 0)
-        total = data.get('total', 0)
-        best_streak = data.get('bestStreak', 0)
-        
-        if game not in ['note', 'interval', 'chord', 'pitch']:
-            return JsonResponse({'success': False, 'error': 'Invalid game'}, status=400)
-        
-        if difficulty not in ['beginner', 'intermediate', 'advanced']:
-            return JsonResponse({'success': False, 'error': 'Invalid difficulty'}, status=400)
-        
-        if total < 10:
-            return JsonResponse({'success': False, 'error': 'Minimum 10 attempts required'}, status=400)
-        
-        # Create score entry
+    if game not in ['note', 'interval', 'chord', 'pitch']:
+        return None, 'Invalid game'
+    
+    if difficulty not in ['beginner', 'intermediate', 'advanced']:
+        return None, 'Invalid difficulty'
+    
+    if not all(isinstance(value, int) for value in (correct, total, best_streak)):
+        return None, 'Invalid score values'
+    
+    if total < 10:
+        return None, 'Minimum 10 attempts required'
+    
+    return {
+        'game': game,
+        'difficulty': difficulty,
+        'correct': correct,
+        'total': total,
+        'best_streak': best_streak,
+    }, None
+
+
+def _store_score(user, session):
+    """Save one cleaned session and return ``(score, rank, weekly_rank)``."""
+    game = session['game']
+    difficulty = session['difficulty']
+    correct = session['correct']
+    total = session['total']
+    best_streak = session['best_streak']
+    
+    with transaction.atomic():
+        # Create score entry (saving it also updates the all-time totals)
         score = Score.objects.create(
-            user=request.user,
+            user=user,
             game=game,
             difficulty=difficulty,
             correct=correct,
@@ -128,48 +243,166 @@ def submit_score(request):
             best_streak=best_streak
         )
         
-        # Update weekly score
+        # Fold the session into this week's totals in a single upsert
         week_start = get_week_start()
-        weekly, created = WeeklyScore.objects.get_or_create(
-            user=request.user,
+        weekly = WeeklyScore.objects.increment(
+            correct=correct,
+            total=total,
+            best_streak=best_streak,
+            user_id=user.id,
             game=game,
             difficulty=difficulty,
             week_start=week_start,
-            defaults={
-                'total_correct': 0,
-                'total_attempts': 0,
-                'best_streak': 0,
-                'sessions_played': 0
-            }
         )
+    
+    leaderboard_cache.invalidate(game)
+    
+    # Count higher totals on the board indexes instead of aggregating every Score
+    rank = ranking.rank(game, difficulty, score.alltime_score.total_correct)
+    weekly_rank = ranking.rank(game, difficulty, weekly.total_correct, week_start=week_start)
+    return score, rank, weekly_rank
+
+
+def _score_response(session, score, rank, weekly_rank):
+    return JsonResponse({
+        'success': True,
+        'score_id': score.id,
+        'rank': rank,
+        'weekly_rank': weekly_rank,
+        'difficulty': session['difficulty']
+    })
+
+
+@require_POST
+def submit_score(request):
+    """API endpoint to submit a game score."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+    
+    try:
+        data = json.loads(request.body)
+        session, error = _clean_session(data)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        
+        return _score_response(session, *_store_score(request.user, session))
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@require_POST
+def submit_score_batch(request):
+    """API endpoint to submit several game sessions at once.
+
+    Expects ``{"sessions": [{game, difficulty, correct, total, bestStreak}, ...]}``,
+    e.g. sessions buffered by a client while offline. Valid sessions are
+    stored even if others in the batch are rejected; each gets a result
+    entry in the same order as the request.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+    
+    try:
+        data = json.loads(request.body)
+        sessions = data.get('sessions')
+        
+        if not isinstance(sessions, list) or not sessions:
+            return JsonResponse({'success': False, 'error': 'No sessions submitted'}, status=400)
+        
+        if len(sessions) > MAX_BATCH_SESSIONS:
+            return JsonResponse({
+                'success': False,
+                'error': f'At most {MAX_BATCH_SESSIONS} sessions per batch'
+            }, status=400)
+        
+        # Validate everything before writing anything
+        results = []
+        valid = []
+        for index, item in enumerate(sessions):
+            session, error = _clean_session(item) if isinstance(item, dict) else (None, 'Invalid session')
+            if error:
+                results.append({'index': index, 'success': False, 'error': error})
+            else:
+                results.append({'index': index, 'success': True})
+                valid.append((index, session))
+        
+        # Sum the sessions per board so each aggregate row is upserted once
+        boards = {}
+        for _, session in valid:
+            board = boards.setdefault((session['game'], session['difficulty']), {
+                'correct': 0, 'total': 0, 'best_streak': 0, 'sessions': 0,
+            })
+            board['correct'] += session['correct']
+            board['total'] += session['total']
+            board['best_streak'] = max(board['best_streak'], session['best_streak'])
+            board['sessions'] += 1
+        
+        week_start = get_week_start()
+        totals = {}
+        with transaction.atomic():
+            scores = Score.objects.bulk_create([
+                Score(
+                    user=request.user,
+                    game=session['game'],
+                    difficulty=session['difficulty'],
+                    correct=session['correct'],
+                    total=session['total'],
+                    best_streak=session['best_streak'],
+                    accuracy=Score.calculate_accuracy(session['correct'], session['total']),
+                )
+                for _, session in valid
+            ])
+            
+            for (game, difficulty), board in boards.items():
+                key = {'user_id': request.user.id, 'game': game, 'difficulty': difficulty}
+                alltime = AllTimeScore.objects.increment(**board, **key)
+                weekly = WeeklyScore.objects.increment(**board, **key, week_start=week_start)
+                totals[game, difficulty] = (alltime.total_correct, weekly.total_correct)
+        
+        for game in {game for game, _ in boards}:
+            leaderboard_cache.invalidate(game)
         
-        weekly.total_correct += correct
-        weekly.total_attempts += total
-        weekly.sessions_played += 1
-        if best_streak > weekly.best_streak:
-            weekly.best_streak = best_streak
-        weekly.save()
+        ranks = {}
+        for (game, difficulty), (alltime_total, weekly_total) in totals.items():
+            ranks[game, difficulty] = (
+                ranking.rank(game, difficulty, alltime_total),
+                ranking.rank(game, difficulty, weekly_total, week_start=week_start),
+            )
         
-        # Get user's current rank for this game + difficulty
-        rank = Score.objects.filter(game=game, difficulty=difficulty).values('user').annotate(
-            total=Sum('correct')
-        ).filter(total__gt=Score.objects.filter(game=game, difficulty=difficulty, user=request.user).aggregate(Sum('correct'))['correct__sum'] or 0).count() + 1
+        for (index, session), score in zip(valid, scores):
+            rank, weekly_rank = ranks[session['game'], session['difficulty']]
+            results[index].update({
+                'score_id': score.id,
+                'game': session['game'],
+                'difficulty': session['difficulty'],
+                'rank': rank,
+                'weekly_rank': weekly_rank,
+            })
         
         return JsonResponse({
             'success': True,
-            'score_id': score.id,
-            'rank': rank,
-            'difficulty': difficulty
+            'accepted': len(valid),
+            'rejected': len(sessions) - len(valid),
+            'results': results,
         })
         
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
-def api_leaderboard(request):
-    """API endpoint to get leaderboard data."""
+def _board_cache_control():
+    """Boards are the same for everyone: shared caches may keep them as long as we do."""
+    return {'public': True, 'max_age': 0, 's_maxage': settings.LEADERBOARD_CACHE_TIMEOUT}
+
+
+def _api_board_params(request):
+    """``(game, period, week_start, limit)`` from the query string, or None for an unknown game."""
     game = request.GET.get('game', 'note')
     period = request.GET.get('period', 'alltime')
+    if game not in GAMES:
+        return None
+    
     try:
         raw_limit = int(request.GET.get('limit', 10))
         if raw_limit < 1:
@@ -179,30 +412,92 @@ def api_leaderboard(request):
     except (ValueError, TypeError):
         limit = 10
     
+    week_start = get_week_start() if period == 'weekly' else None
+    return game, period, week_start, limit
+
+
+def _api_board(game, period, week_start, limit, version):
     if period == 'weekly':
-        week_start = get_week_start()
-        leaders = WeeklyScore.objects.filter(
-            game=game,
-            week_start=week_start
-        ).select_related('user').order_by('-total_correct', '-accuracy')[:limit]
-        
-        data = [{
-            'rank': i + 1,
-            'username': score.user.username,
-            'correct': score.total_correct,
-            'accuracy': score.accuracy,
-        } for i, score in enumerate(leaders)]
+        return leaderboard_cache.get_board(
+            game, None, f'weekly:{week_start}', limit,
+            lambda: _weekly_api_board(game, week_start, limit), version
+        )
+    return leaderboard_cache.get_board(
+        game, None, 'alltime', limit,
+        lambda: _alltime_api_board(game, limit), version
+    )
+
+
+def api_leaderboard(request):
+    """API endpoint to get leaderboard data.
+
+    Answers ``If-None-Match`` with a 304 from the game's board state in the
+    database, before the board is looked up.
+    """
+    params = _api_board_params(request)
+    if params is None:
+        return JsonResponse({'success': False, 'error': 'Invalid game'}, status=400)
+    
+    state = leaderboard_cache.board_state(params[0])
+    etag = leaderboard_cache.etag(state, *params)
+    response = leaderboard_cache.not_modified(request, etag, **_board_cache_control())
+    if response is not None:
+        return response
+    
+    data = _api_board(*params, state)
+    return leaderboard_cache.set_validators(JsonResponse({'leaderboard': data}), etag, **_board_cache_control())
+
+
+def cache_stats(request):
+    """API endpoint exposing leaderboard cache hit/miss counters to staff."""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Forbidden'}, status=403)
+    
+    return JsonResponse({'success': True, 'stats': leaderboard_cache.get_stats()})
+
+
+def api_rankings_page(request):
+    """API endpoint for paging through a full leaderboard.
+
+    Query params: ``game``, ``difficulty``, ``period`` (alltime/weekly),
+    ``limit``, and either ``cursor`` (from a previous ``next_cursor``) or
+    ``around=me`` with an optional ``radius`` to get the entries above and
+    below the current user.
+    """
+    game = request.GET.get('game', 'note')
+    difficulty = request.GET.get('difficulty', 'beginner')
+    period = request.GET.get('period', 'alltime')
+    
+    if game not in GAMES:
+        return JsonResponse({'success': False, 'error': 'Invalid game'}, status=400)
+    
+    if difficulty not in ['beginner', 'intermediate', 'advanced']:
+        return JsonResponse({'success': False, 'error': 'Invalid difficulty'}, status=400)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 25)), 1), 100)
+        radius = min(max(int(request.GET.get('radius', 5)), 0), 25)
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid limit'}, status=400)
+    
+    week_start = get_week_start() if period == 'weekly' else None
+    
+    if request.GET.get('around') == 'me':
+        if not request.user.is_authenticated:
+            return JsonResponse({'success': False, 'error': 'Not authenticated'}, status=401)
+        entries, next_cursor = pagination.get_around(
+            game, difficulty, request.user, radius, week_start=week_start
+        )
     else:
-        leaders = Score.objects.filter(game=game).values('user__username').annotate(
-            total_correct=Sum('correct'),
-            total_attempts=Sum('total'),
-        ).order_by('-total_correct')[:limit]
-        
-        data = [{
-            'rank': i + 1,
-            'username': leader['user__username'],
-            'correct': leader['total_correct'],
-            'accuracy': round((leader['total_correct'] / leader['total_attempts'] * 100), 1) if leader['total_attempts'] > 0 else 0,
-        } for i, leader in enumerate(leaders)]
-    
-    return JsonResponse({'leaderboard': data})
+        try:
+            entries, next_cursor = pagination.get_page(
+                game, difficulty, limit, cursor=request.GET.get('cursor'), week_start=week_start
+            )
+        except pagination.InvalidCursor as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'leaderboard': entries,
+        'next_cursor': next_cursor,
+    })
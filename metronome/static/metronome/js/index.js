@@ -0,0 +1,201 @@
+// Metronome State
+let state = {
+  bpm: 120,
+  timeSignature: 4,
+  isPlaying: false,
+  currentBeat: 1,
+  intervalId: null,
+  audioCtx: null,
+  tapTimes: []
+};
+
+// Initialize Audio Context
+function getAudioContext() {
+  if (!state.audioCtx) {
+    state.audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+  }
+  return state.audioCtx;
+}
+
+// Resume audio context on first user gesture
+document.addEventListener('click', function initAudioOnGesture() {
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    ctx.resume();
+  }
+  document.removeEventListener('click', initAudioOnGesture, true);
+}, true);
+
+// Play metronome click sound
+function playClick(isAccent = false) {
+  const ctx = getAudioContext();
+  const now = ctx.currentTime;
+
+  const oscillator = ctx.createOscillator();
+  const gainNode = ctx.createGain();
+
+  oscillator.type = 'sine';
+  oscillator.frequency.value = isAccent ? 1200 : 800;
+
+  gainNode.gain.setValueAtTime(0.3, now);
+  gainNode.gain.exponentialRampToValueAtTime(0.01, now + 0.1);
+
+  oscillator.connect(gainNode);
+  gainNode.connect(ctx.destination);
+
+  oscillator.start(now);
+  oscillator.stop(now + 0.1);
+}
+
+// Update BPM display
+function updateBPMDisplay() {
+  document.getElementById('bpmValue').textContent = state.bpm;
+  document.getElementById('tempoSlider').value = state.bpm;
+}
+
+// Set BPM
+function setBPM(bpm) {
+  state.bpm = Math.max(40, Math.min(240, bpm));
+  updateBPMDisplay();
+
+  if (state.isPlaying) {
+    stopMetronome();
+    startMetronome();
+  }
+}
+
+// Set Time Signature
+function setTimeSignature(beats) {
+  state.timeSignature = beats;
+  state.currentBeat = 1;
+
+  document.querySelectorAll('.setting-btn').forEach(btn => {
+    btn.classList.remove('active');
+  });
+  event.target.classList.add('active');
+
+  document.getElementById('beatNumber').textContent = state.currentBeat;
+}
+
+// Metronome tick
+function tick() {
+  const beatCircle = document.getElementById('beatCircle');
+  const beatNumber = document.getElementById('beatNumber');
+
+  const isAccent = state.currentBeat === 1;
+
+  playClick(isAccent);
+
+  beatCircle.classList.remove('beat', 'accent');
+  void beatCircle.offsetWidth;
+  beatCircle.classList.add(isAccent ? 'accent' : 'beat');
+
+  beatNumber.textContent = state.currentBeat;
+
+  state.currentBeat++;
+  if (state.currentBeat > state.timeSignature) {
+    state.currentBeat = 1;
+  }
+
+  setTimeout(() => {
+    beatCircle.classList.remove('beat', 'accent');
+  }, 100);
+}
+
+// Start metronome
+function startMetronome() {
+  if (state.isPlaying) return;
+
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    ctx.resume();
+  }
+
+  state.isPlaying = true;
+  state.currentBeat = 1;
+
+  document.getElementById('startBtn').style.display = 'none';
+  document.getElementById('stopBtn').style.display = 'inline-block';
+
+  tick();
+
+  const interval = (60 / state.bpm) * 1000;
+  state.intervalId = setInterval(tick, interval);
+}
+
+// Stop metronome
+function stopMetronome() {
+  if (!state.isPlaying) return;
+
+  state.isPlaying = false;
+
+  if (state.intervalId) {
+    clearInterval(state.intervalId);
+    state.intervalId = null;
+  }
+
+  document.getElementById('startBtn').style.display = 'inline-block';
+  document.getElementById('stopBtn').style.display = 'none';
+
+  const beatCircle = document.getElementById('beatCircle');
+  beatCircle.classList.remove('beat', 'accent');
+
+  state.currentBeat = 1;
+  document.getElementById('beatNumber').textContent = state.currentBeat;
+}
+
+// Tap tempo
+function tapTempo() {
+  const now = Date.now();
+  state.tapTimes.push(now);
+
+  if (state.tapTimes.length > 4) {
+    state.tapTimes.shift();
+  }
+
+  if (state.tapTimes.length >= 2) {
+    const intervals = [];
+    for (let i = 1; i < state.tapTimes.length; i++) {
+      intervals.push(state.tapTimes[i] - state.tapTimes[i - 1]);
+    }
+
+    const avgInterval = intervals.reduce((a, b) => a + b, 0) / intervals.length;
+    const calculatedBPM = Math.round(60000 / avgInterval);
+
+    setBPM(calculatedBPM);
+  }
+
+  const tapBtn = event.target.closest('.control-btn');
+  tapBtn.style.transform = 'scale(0.95)';
+  setTimeout(() => {
+    tapBtn.style.transform = '';
+  }, 100);
+
+  setTimeout(() => {
+    if (Date.now() - state.tapTimes[state.tapTimes.length - 1] > 3000) {
+      state.tapTimes = [];
+    }
+  }, 3000);
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+  const slider = document.getElementById('tempoSlider');
+
+  slider.addEventListener('input', function() {
+    setBPM(parseInt(this.value, 10));
+  });
+
+  updateBPMDisplay();
+
+  document.addEventListener('keydown', function(e) {
+    if (e.code === 'Space') {
+      e.preventDefault();
+      if (state.isPlaying) {
+        stopMetronome();
+      } else {
+        startMetronome();
+      }
+    }
+  });
+});
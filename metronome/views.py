@@ -1,5 +1,8 @@
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
+from rithm.page_cache import cache_anonymous_page
 
 
+@method_decorator(cache_anonymous_page, name='dispatch')
 class IndexView(TemplateView):
     template_name = 'metronome/index.html'
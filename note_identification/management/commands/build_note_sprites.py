@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+# Each note is drawn in exactly one sheet; a difficulty loads the sheets it needs
+SHEETS = ['naturals', 'sharps', 'flats']
+LETTERS = 'CDEFGAB'
+OUTPUT_DIR = 'sprites'
+
+
+def sheet_for(note):
+    if note.endswith('_sharp'):
+        return 'sharps'
+    if note.endswith('♭'):
+        return 'flats'
+    return 'naturals'
+
+
+def note_order(note):
+    return SHEETS.index(sheet_for(note)), LETTERS.index(note[0])
+
+
+class Command(BaseCommand):
+    help = (
+        'Combine the note images into one sprite sheet each for naturals, '
+        'sharps and flats, plus notes.css positioning every note, so the '
+        'note game shows a new note without a request. Needs Pillow. Rerun '
+        'after adding or changing a note image, and commit the result.'
+    )
+
+    def handle(self, *args, **options):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise CommandError('build_note_sprites needs Pillow: pip install Pillow')
+
+        static_dir = Path(apps.get_app_config('note_identification').path, 'static', 'note_identification')
+        images = {path.stem: path for path in static_dir.glob('*.png')}
+        if not images:
+            raise CommandError(f'No note images in {static_dir}')
+        unknown = [note for note in images if note[0] not in LETTERS]
+        if unknown:
+            raise CommandError(f"Can't place {', '.join(sorted(unknown))}: note images are named <letter>[_sharp|♭].png")
+
+        output = static_dir / OUTPUT_DIR
+        output.mkdir(exist_ok=True)
+        tiles = {note: Image.open(path).convert('RGBA') for note, path in images.items()}
+        width = max(tile.width for tile in tiles.values())
+        height = max(tile.height for tile in tiles.values())
+
+        rules = []
+        for sheet in SHEETS:
+            notes = sorted((note for note in tiles if sheet_for(note) == sheet), key=note_order)
+            if not notes:
+                continue
+            # One column; percentage offsets keep working when the image is scaled down
+            sprite = Image.new('RGBA', (width, height * len(notes)))
+            for index, note in enumerate(notes):
+                sprite.paste(tiles[note], (0, index * height))
+                offset = 0 if len(notes) == 1 else index * 100 / (len(notes) - 1)
+                rules.append(
+                    f'.note-sprite[data-note="{note}"] {{ background-image: url({sheet}.png); '
+                    f'background-size: 100% {len(notes) * 100}%; background-position: 0 {offset:g}%; }}'
+                )
+            # Black on transparent: a palette keeps the antialiasing at a fraction of the size
+            sprite.quantize(colors=64, method=Image.Quantize.FASTOCTREE).save(output / f'{sheet}.png', optimize=True)
+            self.stdout.write(f'{sheet}.png: {", ".join(notes)}')
+
+        css = [
+            '@charset "UTF-8";',
+            '/* Generated by `manage.py build_note_sprites`; do not edit. */',
+            f'.note-sprite {{ aspect-ratio: {width} / {height}; width: {width}px; max-width: 100%; '
+            'background-repeat: no-repeat; }',
+            *rules,
+        ]
+        (output / 'notes.css').write_text('\n'.join(css) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(tiles)} notes to {output}'))
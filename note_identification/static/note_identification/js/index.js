@@ -0,0 +1,292 @@
+// Game State
+let state = {
+  correct: 0,
+  total: 0,
+  streak: 0,
+  bestStreak: 0,
+  difficulty: 'beginner',
+  currentNote: null
+};
+
+// Load stats from server on page load
+async function loadStats() {
+  if (!isAuthenticated) return;
+
+  try {
+    const bootstrap = await loadBootstrap();
+    const data = { authenticated: bootstrap.authenticated, stats: bootstrap.stats && bootstrap.stats.note };
+
+    if (data.authenticated && data.stats) {
+      StatsSync.seed('note', data.stats);
+      state.correct = data.stats.correct || 0;
+      state.total = data.stats.total || 0;
+      state.streak = data.stats.streak || 0;
+      state.bestStreak = data.stats.bestStreak || 0;
+
+      if (data.stats.difficulty) {
+        setDifficulty(data.stats.difficulty);
+      }
+
+      updateStats();
+      console.log('Stats loaded from server');
+    }
+  } catch (error) {
+    console.error('Failed to load stats:', error);
+  }
+}
+
+// Queue streak and difficulty changes; answers are queued in checkAnswer()
+// and StatsSync sends both to the server in periodic batches
+function saveStats() {
+  if (!isAuthenticated) return;
+
+  StatsSync.update('note', {
+    streak: state.streak,
+    bestStreak: state.bestStreak,
+    difficulty: state.difficulty
+  });
+}
+
+// Note sets by difficulty
+const noteSets = {
+  beginner: ['C', 'D', 'E', 'F', 'G', 'A', 'B'],
+  intermediate: ['C', 'C_sharp', 'D', 'D_sharp', 'E', 'F', 'F_sharp', 'G', 'G_sharp', 'A', 'A_sharp', 'B'],
+  advanced: ['C', 'C_sharp', 'D♭', 'D', 'D_sharp', 'E♭', 'E', 'F', 'F_sharp', 'G♭', 'G', 'G_sharp', 'A♭', 'A', 'A_sharp', 'B♭', 'B']
+};
+
+// Sprite sheets each difficulty draws notes from (manage.py build_note_sprites).
+// Naturals are preloaded with the page; the others load with their difficulty
+// so that showing a note never waits on the network.
+const noteSheets = {
+  beginner: [],
+  intermediate: ['sharps'],
+  advanced: ['sharps', 'flats']
+};
+const preloadedSheets = new Set();
+
+function preloadSheets(level) {
+  const display = document.getElementById('note-image');
+  noteSheets[level].forEach(sheet => {
+    const url = display.dataset[sheet];
+    if (url && !preloadedSheets.has(url)) {
+      preloadedSheets.add(url);
+      new Image().src = url;
+    }
+  });
+}
+
+// Map file names to display names
+function fileToDisplay(fileName) {
+  if (fileName.includes('_sharp')) {
+    return fileName.charAt(0) + '#';
+  }
+  return fileName;
+}
+
+// Set difficulty level
+function setDifficulty(level) {
+  state.difficulty = level;
+  preloadSheets(level);
+
+  document.querySelectorAll('.difficulty-btn').forEach(btn => {
+    btn.classList.remove('active');
+    if (btn.dataset.level === level) {
+      btn.classList.add('active');
+    }
+  });
+
+  const sharpsRow = document.getElementById('sharps-row');
+  const flatsRow = document.getElementById('flats-row');
+
+  if (level === 'beginner') {
+    sharpsRow.style.display = 'none';
+    flatsRow.style.display = 'none';
+  } else if (level === 'intermediate') {
+    sharpsRow.style.display = 'flex';
+    flatsRow.style.display = 'none';
+  } else {
+    sharpsRow.style.display = 'flex';
+    flatsRow.style.display = 'flex';
+  }
+
+  nextNote();
+}
+
+// Get random note for current difficulty
+function getRandomNote() {
+  const notes = noteSets[state.difficulty];
+  return notes[Math.floor(Math.random() * notes.length)];
+}
+
+// Load next note
+function nextNote() {
+  state.currentNote = getRandomNote();
+  document.getElementById('note-image').dataset.note = state.currentNote;
+  document.getElementById('feedback').textContent = 'What note is this?';
+  document.getElementById('feedback').className = 'feedback-text';
+}
+
+// Check answer
+function checkAnswer(selectedNote) {
+  const correctNote = fileToDisplay(state.currentNote);
+  const isCorrect = selectedNote === correctNote || 
+                    (selectedNote.includes('♯') && selectedNote.replace('♯', '#') === correctNote) ||
+                    (correctNote.includes('♭') && selectedNote === correctNote);
+
+  // Handle enharmonic equivalents
+  const enharmonics = {
+    'C#': 'D♭', 'D♭': 'C#',
+    'D#': 'E♭', 'E♭': 'D#',
+    'F#': 'G♭', 'G♭': 'F#',
+    'G#': 'A♭', 'A♭': 'G#',
+    'A#': 'B♭', 'B♭': 'A#'
+  };
+
+  const isEnharmonic = enharmonics[selectedNote] === correctNote || 
+                       enharmonics[correctNote] === selectedNote;
+
+  state.total++;
+  StatsSync.answer('note', isCorrect || isEnharmonic);
+
+  if (isCorrect || isEnharmonic) {
+    state.correct++;
+    state.streak++;
+    if (state.streak > state.bestStreak) {
+      state.bestStreak = state.streak;
+    }
+
+    document.getElementById('feedback').innerHTML = '<i class="fas fa-check"></i> Correct!';
+    document.getElementById('feedback').className = 'feedback-text feedback-correct';
+
+    const btn = document.querySelector(`[data-note="${selectedNote}"]`);
+    if (btn) {
+      btn.classList.add('correct');
+      setTimeout(() => btn.classList.remove('correct'), 500);
+    }
+
+    setTimeout(nextNote, 600);
+  } else {
+    state.streak = 0;
+
+    document.getElementById('feedback').innerHTML = '<i class="fas fa-times"></i> It was ' + correctNote;
+    document.getElementById('feedback').className = 'feedback-text feedback-incorrect';
+
+    const btn = document.querySelector(`[data-note="${selectedNote}"]`);
+    if (btn) {
+      btn.classList.add('incorrect');
+      setTimeout(() => btn.classList.remove('incorrect'), 500);
+    }
+
+    setTimeout(nextNote, 1500);
+  }
+
+  updateStats();
+}
+
+// Update stats display
+function updateStats() {
+  document.getElementById('score').textContent = state.correct;
+
+  const streakEl = document.getElementById('streak');
+  streakEl.innerHTML = state.streak + ' <i class="fas fa-fire" style="color: #f59e0b;"></i>';
+  if (state.streak >= 5) {
+    streakEl.classList.add('streak-fire');
+  } else {
+    streakEl.classList.remove('streak-fire');
+  }
+
+  document.getElementById('best-streak').textContent = state.bestStreak;
+
+  const accuracy = state.total > 0 ? Math.round((state.correct / state.total) * 100) : 0;
+  document.getElementById('accuracy').textContent = accuracy + '%';
+
+  // Show submit button when minimum attempts reached
+  const submitSection = document.getElementById('submit-section');
+  if (state.total >= 10 && isAuthenticated) {
+    submitSection.style.display = 'block';
+  }
+
+  // Save stats to server
+  saveStats();
+}
+
+// Submit score to leaderboard
+async function submitToLeaderboard() {
+  if (!isAuthenticated || state.total < 10) return;
+
+  const btn = document.getElementById('submit-score');
+  btn.disabled = true;
+  btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Submitting...';
+
+  try {
+    const response = await fetch('/leaderboard/api/submit/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': csrfToken
+      },
+      body: JSON.stringify({
+        game: 'note',
+        difficulty: state.difficulty,
+        correct: state.correct,
+        total: state.total,
+        bestStreak: state.bestStreak
+      })
+    });
+
+    const data = await response.json();
+
+    if (data.success) {
+      btn.innerHTML = '<i class="fas fa-check"></i> Submitted! Rank #' + data.rank;
+      btn.classList.remove('btn-success');
+      btn.classList.add('btn-outline-success');
+
+      setTimeout(() => {
+        state.correct = 0;
+        state.total = 0;
+        state.streak = 0;
+        StatsSync.reset('note');
+        updateStats();
+        btn.innerHTML = '<i class="fas fa-trophy"></i> Submit to Leaderboard';
+        btn.classList.remove('btn-outline-success');
+        btn.classList.add('btn-success');
+        btn.disabled = false;
+        document.getElementById('submit-section').style.display = 'none';
+      }, 3000);
+    } else {
+      btn.innerHTML = '<i class="fas fa-times"></i> ' + data.error;
+      btn.disabled = false;
+    }
+  } catch (error) {
+    btn.innerHTML = '<i class="fas fa-times"></i> Error submitting';
+    btn.disabled = false;
+  }
+}
+
+// Reset game
+function resetGame() {
+  state.correct = 0;
+  state.total = 0;
+  state.streak = 0;
+  StatsSync.reset('note');
+  updateStats();
+  nextNote();
+}
+
+// Attach click handlers to all note buttons
+document.querySelectorAll('.note-btn').forEach(btn => {
+  btn.addEventListener('click', function() {
+    if (this.style.visibility !== 'hidden') {
+      checkAnswer(this.dataset.note);
+    }
+  });
+});
+
+// Initialize
+loadStats().then(() => {
+  // If no saved difficulty, default to beginner
+  if (!state.difficulty) {
+    setDifficulty('beginner');
+  }
+  updateStats();
+});
@@ -0,0 +1,206 @@
+// Game state
+let state = {
+  correct: 0,
+  total: 0,
+  bestStreak: 0,
+  streak: 0,
+  currentNote: null,
+  currentFreq: null,
+  isPlaying: false,
+  canAnswer: true
+};
+
+// Notes and frequencies
+const notes = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'];
+const octaves = [3, 4, 5];
+
+// Audio context - created and resumed on first user gesture
+let audioCtx = null;
+
+function getAudioContext() {
+  if (!audioCtx) {
+    audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+  }
+  return audioCtx;
+}
+
+// Warm up AudioContext on first click (capture phase fires before button handlers)
+document.addEventListener('click', function initAudioOnGesture() {
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    ctx.resume();
+  }
+  document.removeEventListener('click', initAudioOnGesture, true);
+}, true);
+
+// Calculate frequency for a note
+function noteToFreq(note, octave) {
+  const noteIndex = notes.indexOf(note);
+  const semitonesFromA4 = (octave - 4) * 12 + (noteIndex - 9);
+  return 440 * Math.pow(2, semitonesFromA4 / 12);
+}
+
+// Play a frequency
+async function playFrequency(freq) {
+  const ctx = getAudioContext();
+  if (ctx.state === 'suspended') {
+    try {
+      await ctx.resume();
+    } catch (err) {
+      console.warn('Unable to resume AudioContext; audio will not play.', err);
+      return;
+    }
+  }
+
+  const osc = ctx.createOscillator();
+  const gain = ctx.createGain();
+
+  osc.type = 'sine';
+  osc.frequency.value = freq;
+
+  gain.gain.setValueAtTime(0.3, ctx.currentTime);
+  gain.gain.exponentialRampToValueAtTime(0.001, ctx.currentTime + 1);
+
+  osc.connect(gain);
+  gain.connect(ctx.destination);
+
+  osc.start();
+  osc.stop(ctx.currentTime + 1);
+}
+
+// Generate new question
+function generateQuestion() {
+  // Pick random note and octave
+  const note = notes[Math.floor(Math.random() * notes.length)];
+  const octave = octaves[Math.floor(Math.random() * octaves.length)];
+
+  state.currentNote = note;
+  state.currentFreq = noteToFreq(note, octave);
+
+  // Generate answer buttons (correct + 5 wrong)
+  const answers = new Set([note]);
+  while (answers.size < 6) {
+    answers.add(notes[Math.floor(Math.random() * notes.length)]);
+  }
+
+  // Shuffle and render buttons
+  const shuffled = Array.from(answers).sort(() => Math.random() - 0.5);
+  const container = document.getElementById('answer-buttons');
+  container.innerHTML = shuffled.map(n => 
+    `<button class="note-btn" data-note="${n}">${n}</button>`
+  ).join('');
+
+  // Add click handlers
+  container.querySelectorAll('.note-btn').forEach(btn => {
+    btn.addEventListener('click', () => checkAnswer(btn.dataset.note, btn));
+  });
+
+  document.getElementById('feedback').textContent = 'What note do you hear?';
+  document.getElementById('feedback').className = 'feedback-text';
+
+  state.canAnswer = true;
+}
+
+// Check answer
+function checkAnswer(selected, btn) {
+  if (!state.canAnswer) return;
+  state.canAnswer = false;
+
+  state.total++;
+  const isCorrect = selected === state.currentNote;
+
+  if (isCorrect) {
+    state.correct++;
+    state.streak++;
+    if (state.streak > state.bestStreak) {
+      state.bestStreak = state.streak;
+    }
+    btn.classList.add('correct');
+    document.getElementById('feedback').innerHTML = '<i class="fas fa-check"></i> Correct!';
+    document.getElementById('feedback').className = 'feedback-text feedback-correct';
+  } else {
+    state.streak = 0;
+    btn.classList.add('incorrect');
+    document.getElementById('feedback').innerHTML = `<i class="fas fa-times"></i> It was ${state.currentNote}`;
+    document.getElementById('feedback').className = 'feedback-text feedback-incorrect';
+  }
+
+  updateStats();
+  setTimeout(generateQuestion, isCorrect ? 800 : 1500);
+}
+
+// Update stats display
+function updateStats() {
+  document.getElementById('score').textContent = state.correct;
+  document.getElementById('total').textContent = state.total;
+  const accuracy = state.total > 0 ? Math.round((state.correct / state.total) * 100) : 0;
+  document.getElementById('accuracy').textContent = accuracy + '%';
+
+  // Show submit button when minimum attempts reached
+  const submitSection = document.getElementById('submit-section');
+  if (state.total >= 10 && isAuthenticated) {
+    submitSection.style.display = 'block';
+  }
+}
+
+// Submit score to leaderboard
+async function submitToLeaderboard() {
+  if (!isAuthenticated || state.total < 10) return;
+
+  const btn = document.getElementById('submit-score');
+  btn.disabled = true;
+  btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Submitting...';
+
+  try {
+    const response = await fetch('/leaderboard/api/submit/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': csrfToken
+      },
+      body: JSON.stringify({
+        game: 'pitch',
+        difficulty: 'beginner',
+        correct: state.correct,
+        total: state.total,
+        bestStreak: state.bestStreak
+      })
+    });
+
+    const data = await response.json();
+
+    if (data.success) {
+      btn.innerHTML = '<i class="fas fa-check"></i> Submitted! Rank #' + data.rank;
+      btn.classList.remove('btn-success');
+      btn.classList.add('btn-outline-success');
+
+      setTimeout(() => {
+        state.correct = 0;
+        state.total = 0;
+        state.streak = 0;
+        state.bestStreak = 0;
+        updateStats();
+        btn.innerHTML = '<i class="fas fa-trophy"></i> Submit to Leaderboard';
+        btn.classList.remove('btn-outline-success');
+        btn.classList.add('btn-success');
+        btn.disabled = false;
+        document.getElementById('submit-section').style.display = 'none';
+      }, 3000);
+    } else {
+      btn.innerHTML = '<i class="fas fa-times"></i> ' + data.error;
+      btn.disabled = false;
+    }
+  } catch (error) {
+    btn.innerHTML = '<i class="fas fa-times"></i> Error submitting';
+    btn.disabled = false;
+  }
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+  document.getElementById('play-btn').addEventListener('click', function() {
+    playFrequency(state.currentFreq);
+  });
+
+  generateQuestion();
+});
@@ -0,0 +1,18 @@
+"""
+ASGI config for rithm project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run it under uvicorn workers, e.g. ``SERVER_MODE=asgi gunicorn`` (see
+gunicorn.conf.py).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rithm.settings')
+
+application = get_asgi_application()
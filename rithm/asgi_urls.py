@@ -0,0 +1,26 @@
+"""
+URL configuration for SERVER_MODE='asgi'.
+
+The same routes as rithm.urls, except that the JSON APIs go to their async
+views. Under WSGI the sync views in rithm.urls are faster, so this urlconf
+is only selected for uvicorn workers (see ROOT_URLCONF in settings).
+"""
+from django.urls import path
+
+from accounts import asgi_views as accounts_views
+from leaderboard import asgi_views as leaderboard_views
+from . import urls
+
+urlpatterns = [
+    path('leaderboard/api/submit/', leaderboard_views.submit_score, name='submit-score'),
+    path('leaderboard/api/rankings/', leaderboard_views.api_leaderboard, name='api-leaderboard'),
+    path('accounts/api/bootstrap/', accounts_views.bootstrap, name='bootstrap'),
+    path('accounts/api/stats/sync/', accounts_views.sync_stats, name='sync-stats'),
+    path('accounts/api/stats/<str:game>/', accounts_views.game_stats, name='game-stats'),
+    path('accounts/api/note-stats/', accounts_views.game_stats, {'game': 'note'}, name='get-note-stats'),
+    path('accounts/api/note-stats/update/', accounts_views.update_game_stats, {'game': 'note'}, name='update-note-stats'),
+    path('accounts/api/interval-stats/', accounts_views.game_stats, {'game': 'interval'}, name='get-interval-stats'),
+    path('accounts/api/interval-stats/update/', accounts_views.update_game_stats, {'game': 'interval'}, name='update-interval-stats'),
+    path('accounts/api/chord-stats/', accounts_views.game_stats, {'game': 'chord'}, name='get-chord-stats'),
+    path('accounts/api/chord-stats/update/', accounts_views.update_game_stats, {'game': 'chord'}, name='update-chord-stats'),
+] + urls.urlpatterns
@@ -0,0 +1,43 @@
+"""
+Helpers for writing async views on Django 4.2.
+
+The ``django.views.decorators.http`` decorators only learned to wrap
+coroutine views in Django 5.0, and ``request.auser()`` arrived in the same
+release. These are the async equivalents the JSON APIs use until then.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed
+from django.utils.log import log_response
+
+
+def require_http_methods(request_method_list):
+    """Async version of ``django.views.decorators.http.require_http_methods``."""
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                response = HttpResponseNotAllowed(request_method_list)
+                log_response(
+                    'Method Not Allowed (%s): %s', request.method, request.path,
+                    response=response,
+                    request=request,
+                )
+                return response
+            return await view(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+require_GET = require_http_methods(['GET'])
+require_POST = require_http_methods(['POST'])
+
+
+async def auser(request):
+    """Return ``request.user``, loading it from the session off the event loop."""
+    def load():
+        # Touching the lazy object runs the session and user queries
+        request.user.is_authenticated
+        return request.user
+    return await sync_to_async(load)()
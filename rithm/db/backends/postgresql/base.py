@@ -0,0 +1,108 @@
+"""
+PostgreSQL backend with optional connection pooling.
+
+Set ``OPTIONS['pool']`` to True, or to a dict of ConnectionPool arguments
+(``min_size``, ``max_size``, ``timeout``, ``max_lifetime``, ``max_idle``),
+the same setting Django 5.1 uses for its own psycopg 3 pool. As there,
+pooling needs ``CONN_MAX_AGE = 0``: Django "closes" the connection after
+every request and the pool keeps it open for the next one.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from rithm.db.pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def close_pools():
+    """Close the connections idling in every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured("Pooling doesn't support persistent connections.")
+
+        key = (self.alias, self.settings_dict['NAME'], self.settings_dict['HOST'], self.settings_dict['PORT'])
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                conn_params = self.get_connection_params()
+                pool = _pools[key] = ConnectionPool(
+                    lambda: self.Database.connect(**conn_params),
+                    check=self._check_pooled if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                    reset=self._reset_pooled,
+                    **({} if options is True else options),
+                )
+        return pool
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        try:
+            connection = pool.getconn()
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        # What super() sets up per connection
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(isolation_level or IsolationLevel.READ_COMMITTED)
+        except ValueError:
+            pool.putconn(connection)
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level} '
+                f'specified. Use one of the psycopg.IsolationLevel values.'
+            )
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        base.psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+
+    @staticmethod
+    def _check_pooled(connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+
+    @staticmethod
+    def _reset_pooled(connection):
+        # Never hand a connection with an open or failed transaction to the
+        # next request; a broken one is closed instead
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == base.Database.extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status in (base.Database.extensions.TRANSACTION_STATUS_INTRANS,
+                      base.Database.extensions.TRANSACTION_STATUS_INERROR):
+            connection.rollback()
+            return True
+        return False
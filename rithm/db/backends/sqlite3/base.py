@@ -0,0 +1,25 @@
+"""
+SQLite backend that runs ``OPTIONS['init_command']`` on every new connection.
+
+Django 5.1 added this option; on 4.2 the ``PRAGMA``\\s that make SQLite cope
+with several writers (``journal_mode=WAL``, ``synchronous=NORMAL``) need
+this small subclass. Settings only set them when SQLITE_JOURNAL_MODE asks,
+because ``journal_mode=WAL`` is written into the database file.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('init_command', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        init_command = self.settings_dict['OPTIONS'].get('init_command')
+        if init_command:
+            for statement in init_command.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+        return conn
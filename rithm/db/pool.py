@@ -0,0 +1,151 @@
+"""
+A small thread-safe pool of DB-API connections.
+
+Django 4.2 has no connection pooling of its own (5.1 adds it, for psycopg 3
+only). The ``rithm.db.backends.postgresql`` backend keeps one ConnectionPool
+per process and database, checks a connection out when Django connects and
+hands it back when Django closes it at the end of a request. This caps the
+connections each worker holds at ``max_size`` and lets the threads of an
+ASGI worker share them.
+"""
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, connect, check=None, reset=None, min_size=0, max_size=10,
+                 timeout=10, max_lifetime=3600, max_idle=600):
+        """``connect()`` opens a new connection. ``check(conn)`` and
+        ``reset(conn)`` are optional; either returning False (or raising)
+        discards the connection instead of reusing it.
+        """
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError('Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1')
+        self._connect = connect
+        self._check = check
+        self._reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+
+        self._lock = threading.Condition()
+        # (connection, opened_at, returned_at), most recently returned last
+        self._idle = []
+        self._opened_at = {}
+        # Slots reserved by threads that are connecting outside the lock
+        self._opening = 0
+        # Connections ever opened, for benchmarks and tests
+        self.opened = 0
+
+    @property
+    def size(self):
+        """Connections currently open, idle or checked out."""
+        return len(self._opened_at)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def getconn(self):
+        """Check out a connection, opening one if the pool isn't full."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                while not self._idle and self.size + self._opening >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f'No database connection free after {self.timeout}s '
+                            f'({self.max_size} in use)'
+                        )
+                    self._lock.wait(remaining)
+                if self._idle:
+                    conn, opened_at, _ = self._idle.pop()
+                else:
+                    conn = None
+                    self._opening += 1
+
+            if conn is None:
+                return self._open()
+            if self._usable(conn, opened_at):
+                return conn
+            self._discard(conn)
+
+    def _open(self):
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._lock:
+                self._opening -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._opening -= 1
+            self._opened_at[id(conn)] = time.monotonic()
+            self.opened += 1
+        return conn
+
+    def _usable(self, conn, opened_at):
+        if time.monotonic() - opened_at > self.max_lifetime:
+            return False
+        if self._check is None:
+            return True
+        try:
+            return self._check(conn) is not False
+        except Exception:
+            return False
+
+    def putconn(self, conn, discard=False):
+        """Return a checked-out connection to the pool."""
+        opened_at = self._opened_at.get(id(conn))
+        if opened_at is None:
+            # Not ours (the pool was closed meanwhile)
+            self._close_quietly(conn)
+            return
+        if not discard and self._reset is not None:
+            try:
+                discard = self._reset(conn) is False
+            except Exception:
+                discard = True
+        if discard or time.monotonic() - opened_at > self.max_lifetime:
+            self._discard(conn)
+            return
+
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            self._idle.append((conn, opened_at, now))
+            # Trim connections nobody has needed for a while, oldest first
+            while self.size - len(stale) > self.min_size and self._idle and now - self._idle[0][2] > self.max_idle:
+                stale.append(self._idle.pop(0)[0])
+            self._lock.notify()
+        for conn in stale:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened_at.pop(id(conn), None)
+            self._lock.notify()
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close every idle connection and forget the checked-out ones."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._opened_at.clear()
+            self._lock.notify_all()
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
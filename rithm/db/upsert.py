@@ -0,0 +1,88 @@
+"""
+Single-statement upserts for running-total tables.
+
+``upsert()`` writes a row with ``INSERT ... ON CONFLICT (...) DO UPDATE``
+on the model's unique key and reads the new values back with RETURNING,
+so creating, updating and re-reading a row is one round trip and
+concurrent writers can't lose updates. Each updated field says how the
+stored value combines with the new one: replaced (SET), added to (ADD),
+kept at the larger of the two (MAX), or any SQL expression (a callable).
+
+Only PostgreSQL and SQLite have ON CONFLICT; check ``can_upsert()`` and
+fall back to a row lock elsewhere.
+"""
+from django.db import connections, router
+from django.utils import timezone
+
+SET = 'set'
+ADD = 'add'
+MAX = 'max'
+
+
+def can_upsert(model):
+    return connections[router.db_for_write(model)].vendor in ('postgresql', 'sqlite')
+
+
+def upsert(model, row, updates, returning=()):
+    """Insert ``row`` or update the row sharing its unique key; returns the stored values.
+
+    ``row`` maps field names to values for a new row, and must cover the
+    first of the model's unique_together. ``updates`` maps the fields to
+    change on conflict to SET, ADD, MAX or ``f(current, new)``, which gets
+    functions giving the SQL for a field's stored and incoming value and
+    returns an SQL expression.
+
+    Returns a dict of the ``returning`` fields, plus the values given to
+    ``auto_now`` fields, or None if the backend can't return from an
+    INSERT and the caller must read the row itself.
+    """
+    connection = connections[router.db_for_write(model)]
+    meta = model._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+
+    def column(name):
+        return qn(meta.get_field(name).column)
+
+    def current(name):
+        return f'{table}.{column(name)}'
+
+    def new(name):
+        return f'EXCLUDED.{column(name)}'
+
+    greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+    expressions = {
+        SET: new,
+        ADD: lambda name: f'{current(name)} + {new(name)}',
+        MAX: lambda name: f'{greatest}({current(name)}, {new(name)})',
+    }
+
+    row = dict(row)
+    updates = dict(updates)
+    stamped = {}
+    for field in meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            stamped[field.name] = row[field.name] = timezone.now()
+            updates[field.name] = SET
+
+    fields = [(meta.get_field(name), value) for name, value in row.items()]
+    columns = ', '.join(qn(field.column) for field, _ in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    params = [field.get_db_prep_save(value, connection) for field, value in fields]
+    conflict = ', '.join(column(name) for name in meta.unique_together[0])
+    assignments = ', '.join(
+        f'{column(name)} = {how(current, new) if callable(how) else expressions[how](name)}'
+        for name, how in updates.items()
+    )
+
+    sql = (
+        f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+        f'ON CONFLICT ({conflict}) DO UPDATE SET {assignments}'
+    )
+    with connection.cursor() as cursor:
+        if not connection.features.can_return_columns_from_insert:
+            cursor.execute(sql, params)
+            return None
+        cursor.execute(f'{sql} RETURNING {", ".join(column(name) for name in returning)}', params)
+        values = cursor.fetchone()
+    return dict(zip(returning, values), **stamped)
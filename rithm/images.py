@@ -0,0 +1,145 @@
+"""
+Responsive variants of large static images.
+
+``build()`` resizes every image in ``RESPONSIVE_IMAGES`` to the
+``RESPONSIVE_IMAGE_WIDTHS`` breakpoints (never upscaling) as AVIF and WebP,
+writes them to ``static/responsive/`` and records them in ``images.json``
+there, from where collectstatic hashes them like any other static file.
+It runs before every ``collectstatic`` (see
+landing_page/management/commands/collectstatic.py) and skips sources that
+haven't changed. The variants are build output, so they are not committed.
+
+The ``{% responsive_image %}`` tag (landing_page/templatetags/image_tags.py)
+renders ``<picture>`` markup from the record, or a plain ``<img>`` of the
+original when it hasn't been built.
+
+Resizing needs Pillow, imported lazily; without it ``build()`` does
+nothing and pages keep serving the originals.
+"""
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'responsive'
+MANIFEST = 'images.json'
+
+# Best first: browsers take the first <source> type they support
+FORMATS = {
+    'avif': {'mime': 'image/avif', 'options': {'quality': 50}},
+    'webp': {'mime': 'image/webp', 'options': {'quality': 75, 'method': 6}},
+}
+
+
+class ImageError(Exception):
+    pass
+
+
+def output_dir():
+    return Path(settings.BASE_DIR, 'static', PREFIX)
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _widths(width):
+    """The breakpoints narrower than ``width``, plus the widest we serve."""
+    breakpoints = sorted(settings.RESPONSIVE_IMAGE_WIDTHS)
+    widths = [w for w in breakpoints if w < width]
+    widths.append(min(width, breakpoints[-1]))
+    return sorted(set(widths))
+
+
+def _variants(name, data, Image):
+    image = Image.open(BytesIO(data))
+    image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode.endswith('A') else 'RGB')
+
+    stem = PurePosixPath(name).with_suffix('')
+    variants = []
+    for width in _widths(image.width):
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, spec in FORMATS.items():
+            path = f'{stem}-{width}.{fmt}'
+            target = output_dir() / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            resized.save(target, fmt.upper(), **spec['options'])
+            variants.append({
+                'path': f'{PREFIX}/{path}',
+                'format': fmt,
+                'width': width,
+                'height': height,
+                'bytes': target.stat().st_size,
+            })
+    return {'width': image.width, 'height': image.height, 'variants': variants}
+
+
+def _remove(entry):
+    for variant in entry['variants']:
+        (output_dir() / variant['path'][len(PREFIX) + 1:]).unlink(missing_ok=True)
+
+
+def build(stdout=None):
+    """Build variants of every configured image; returns the record, or None without Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning('Pillow is not installed; serving original images')
+        return None
+
+    record = dict(read_manifest())
+    config = {'widths': sorted(settings.RESPONSIVE_IMAGE_WIDTHS), 'formats': FORMATS}
+    for name in set(record) - set(settings.RESPONSIVE_IMAGES):
+        _remove(record.pop(name))
+    for name in settings.RESPONSIVE_IMAGES:
+        source = finders.find(name)
+        if source is None:
+            raise ImageError(f'{name}: no such static file')
+        with open(source, 'rb') as fh:
+            data = fh.read()
+        entry = record.get(name)
+        if entry and entry['source_hash'] == _digest(data) and entry['config'] == config:
+            continue
+        if entry:
+            _remove(entry)
+        record[name] = dict(_variants(name, data, Image), bytes=len(data), source_hash=_digest(data), config=config)
+        if stdout:
+            stdout.write(f'{name}: {len(record[name]["variants"])} variants')
+
+    output_dir().mkdir(parents=True, exist_ok=True)
+    with open(output_dir() / MANIFEST, 'w') as fh:
+        json.dump(record, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+    read_manifest.cache_clear()
+    return record
+
+
+@lru_cache(maxsize=None)
+def read_manifest():
+    """What has been built, from images.json."""
+    try:
+        with open(output_dir() / MANIFEST) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def pick(entry, viewport_width, formats=tuple(FORMATS)):
+    """The variant a browser supporting ``formats`` downloads to fill ``viewport_width`` pixels."""
+    for fmt in FORMATS:
+        if fmt not in formats:
+            continue
+        candidates = sorted((v for v in entry['variants'] if v['format'] == fmt), key=lambda v: v['width'])
+        if candidates:
+            return next((v for v in candidates if v['width'] >= viewport_width), candidates[-1])
+    return None
@@ -0,0 +1,173 @@
+"""
+Per-request performance instrumentation.
+
+RequestMetricsMiddleware records, for every request, the number of SQL
+queries and the time spent in them, the time spent rendering templates and
+the response size. The numbers are logged as one JSON line on the
+``rithm.requests`` logger, and sent back as a ``Server-Timing`` header
+(visible in the browser dev tools) when REQUEST_METRICS_HEADER is on or the
+user is staff - query counts are not for everyone to see.
+
+The middleware runs natively under both WSGI and ASGI. Under ASGI the
+queries of an async view run on worker threads with their own connections,
+so the query hook is installed on every connection as it is opened and
+finds the current request's metrics through a context variable.
+
+QueryBudgetMixin gives TestCases an ``assertQueryBudget()`` helper so the
+suite can pin how many queries each view is allowed to issue.
+"""
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as DjangoTemplate
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger('rithm.requests')
+
+# Metrics for the request being handled by the current thread/task
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def _install_query_wrapper(connection, **kwargs):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+_original_render = DjangoTemplate.render
+
+
+def _timed_render(self, context=None, request=None):
+    metrics = _current.get()
+    if metrics is None:
+        return _original_render(self, context, request)
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        metrics.template_time += time.perf_counter() - start
+
+
+def _show_header(request):
+    if getattr(settings, 'REQUEST_METRICS_HEADER', settings.DEBUG):
+        return True
+    # Only a user the request already loaded: the check must not cost a query
+    user = getattr(request, '_cached_user', None) or getattr(request, '_acached_user', None)
+    return bool(user and user.is_staff)
+
+
+class RequestMetricsMiddleware:
+    """Measure queries, DB time, template time and response size per request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Patched once; a no-op outside of an instrumented request
+        DjangoTemplate.render = _timed_render
+        connection_created.connect(_install_query_wrapper, dispatch_uid='rithm.instrumentation')
+        for alias in connections:
+            _install_query_wrapper(connections[alias])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total_ms = metrics.total_time * 1000
+        db_ms = metrics.db_time * 1000
+        template_ms = metrics.template_time * 1000
+        size = None if response.streaming else len(response.content)
+
+        if _show_header(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.1f};desc="{metrics.queries} queries"',
+                f'tpl;dur={template_ms:.1f};desc="templates"',
+                f'total;dur={total_ms:.1f}',
+            ])
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(db_ms, 1),
+            'template_ms': round(template_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'bytes': size,
+        }))
+        return response
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for asserting how many queries a request may issue."""
+
+    def assertQueryBudget(self, path, budget, method='get', **kwargs):
+        """Request ``path`` and fail if it issues more than ``budget`` queries.
+
+        Returns the response so callers can make further assertions.
+        """
+        with CaptureQueriesContext(connections['default']) as captured:
+            response = getattr(self.client, method)(path, **kwargs)
+        executed = len(captured.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(captured.captured_queries, start=1)
+            )
+            self.fail(f'{method.upper()} {path} issued {executed} queries, budget is {budget}:\n{queries}')
+        return response
@@ -0,0 +1,62 @@
+"""
+Caching for the mostly static pages.
+
+Two layers, both keyed on ``DEPLOY_VERSION`` so a deploy never serves markup
+rendered by the previous release, and both switched off when
+``TEMPLATE_CACHE_TIMEOUT`` is 0 (the default with DEBUG on):
+
+* ``cache_anonymous_page`` caches whole responses of views that render the
+  same page for every anonymous visitor. Logged-in users always get a fresh
+  render because the navbar shows their name.
+* The ``template_cache`` context processor exposes ``TEMPLATE_CACHE_TIMEOUT``
+  and ``DEPLOY_VERSION`` to templates for ``{% cache %}`` fragments, which
+  cache page bodies for everyone while the user-specific bits stay outside.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+KEY_PREFIX = 'page'
+
+
+def template_cache(request):
+    """Context processor for the ``{% cache %}`` fragments."""
+    return {
+        'TEMPLATE_CACHE_TIMEOUT': getattr(settings, 'TEMPLATE_CACHE_TIMEOUT', 0),
+        'DEPLOY_VERSION': settings.DEPLOY_VERSION,
+    }
+
+
+def page_key(path):
+    return f'{KEY_PREFIX}:{settings.DEPLOY_VERSION}:{path}'
+
+
+def cache_anonymous_page(view):
+    """Serve anonymous GETs of ``view`` from the cache."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        timeout = getattr(settings, 'TEMPLATE_CACHE_TIMEOUT', 0)
+        # Query strings are left alone so they can't fill the cache
+        if (not timeout or request.method not in ('GET', 'HEAD') or request.GET
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request.path)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            # Never share a response that sets a cookie, e.g. a CSRF token
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response['Content-Type']), timeout)
+        # The same URL renders differently once the visitor logs in
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import time
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -91,6 +92,7 @@ LOGOUT_REDIRECT_URL = '/'
 
 MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'rithm.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -102,6 +104,32 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'rithm.urls'
 
+# Per-request query count, DB/template time and size as Server-Timing headers
+# and JSON log lines on the 'rithm.requests' logger
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+
+# Send the Server-Timing header to every client, not only to staff. It reveals
+# query counts, so it is on by default only in DEBUG.
+REQUEST_METRICS_HEADER = os.environ.get('REQUEST_METRICS_HEADER', str(DEBUG)).lower() in ('true', '1', 'yes')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'rithm.requests': {
+            'handlers': ['console'],
+            # Quiet during development and tests unless asked for
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -113,12 +141,23 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'rithm.page_cache.template_cache',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'rithm.wsgi.application'
+ASGI_APPLICATION = 'rithm.asgi.application'
+
+# How gunicorn serves the app: 'wsgi' (sync workers, default) or 'asgi'
+# (uvicorn workers running the async JSON APIs on an event loop)
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+# The async API views only pay off on an event loop; sync workers keep the
+# sync views, which are faster there
+if SERVER_MODE == 'asgi':
+    ROOT_URLCONF = 'rithm.asgi_urls'
 
 
 # Database
@@ -127,11 +166,37 @@ WSGI_APPLICATION = 'rithm.wsgi.application'
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+# Connection handling, all optional:
+#   DB_POOL=True               share a pool of PostgreSQL connections between
+#                              the threads of each worker process
+#   DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT (seconds to wait
+#   for a free connection) / DB_POOL_MAX_LIFETIME / DB_POOL_MAX_IDLE
+#   DB_CONN_MAX_AGE            seconds a worker keeps its own connection open
+#                              without a pool (600; 0 under ASGI)
+#   DB_CONN_HEALTH_CHECKS      ping a reused connection before using it
+#   SQLITE_JOURNAL_MODE        e.g. WAL; unset leaves the database file's mode
+#   SQLITE_SYNCHRONOUS / SQLITE_TIMEOUT
+DB_POOL = os.environ.get('DB_POOL', 'False').lower() in ('true', '1', 'yes')
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes')
+if DB_POOL:
+    # The pool keeps the connections; Django returns them after each request
+    DB_CONN_MAX_AGE = 0
+elif SERVER_MODE == 'asgi':
+    # Under ASGI each request's queries run on a fresh worker thread, so a
+    # persistent connection would be left open per thread instead of reused
+    DB_CONN_MAX_AGE = 0
+else:
+    DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
 if DATABASE_URL:
     # Production: PostgreSQL
     import dj_database_url
     DATABASES = {
-        'default': dj_database_url.config(default=DATABASE_URL, conn_max_age=600)
+        'default': dj_database_url.config(
+            default=DATABASE_URL,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
     }
 else:
     # Development: SQLite
@@ -139,9 +204,46 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            # A file (not in-memory) test database so threaded tests get
+            # real locking instead of shared-cache "table is locked" errors
+            'TEST': {
+                'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+            },
         }
     }
 
+# The rithm backends add pooling and SQLite init commands to Django's
+_db = DATABASES['default']
+if _db['ENGINE'] == 'django.db.backends.postgresql':
+    _db['ENGINE'] = 'rithm.db.backends.postgresql'
+    if DB_POOL:
+        _db.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 0)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+        }
+elif _db['ENGINE'] == 'django.db.backends.sqlite3':
+    _db['ENGINE'] = 'rithm.db.backends.sqlite3'
+    # journal_mode is stored in the database file, so it is only changed on
+    # request: SQLITE_JOURNAL_MODE=WAL lets readers carry on while one
+    # connection writes. synchronous=NORMAL only syncs at checkpoints, which
+    # is safe in WAL mode, so it is the default only there
+    _journal_mode = os.environ.get('SQLITE_JOURNAL_MODE', '')
+    _synchronous = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL' if _journal_mode.lower() == 'wal' else '')
+    _pragmas = [
+        f'PRAGMA {name}={value}'
+        for name, value in (('journal_mode', _journal_mode), ('synchronous', _synchronous))
+        if value
+    ]
+    _options = _db.setdefault('OPTIONS', {})
+    if _pragmas:
+        _options['init_command'] = '; '.join(_pragmas)
+    # Seconds a writer waits for the lock before "database is locked"
+    _options['timeout'] = float(os.environ.get('SQLITE_TIMEOUT', 20))
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -190,12 +292,94 @@ STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static'),
 )
 
-# WhiteNoise for serving static files in production
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise for serving static files in production. collectstatic hashes and
+# compresses the per-app CSS/JS bundles (see rithm/storage.py)
+STATICFILES_STORAGE = 'rithm.storage.StaticFilesStorage'
+
+# A static file missing from the collectstatic manifest raises instead of
+# getting an unhashed URL; only development falls back to the plain name
+STATIC_MANIFEST_STRICT = os.environ.get('STATIC_MANIFEST_STRICT', str(not DEBUG)).lower() in ('true', '1', 'yes')
+
+# Large images that collectstatic first resizes to these widths as AVIF and
+# WebP for {% responsive_image %} (rithm/images.py; needs Pillow)
+RESPONSIVE_IMAGES = [
+    'landing_page/background.jpg',
+    'landing_page/goal.png',
+    'landing_page/note.png',
+    'landing_page/pitch.png',
+]
+RESPONSIVE_IMAGE_WIDTHS = [480, 960, 1440, 1920]
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# CACHE_BACKEND selects where cached data lives: 'locmem' (default, private to
+# each process), 'file' or 'db' (shared by every gunicorn worker; run
+# `python manage.py createcachetable` for 'db').
+_cache_backend = os.environ.get('CACHE_BACKEND', 'locmem').lower()
+
+if _cache_backend == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'rithm_cache'),
+        }
+    }
+elif _cache_backend == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', '/tmp/rithm_cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'rithm',
+        }
+    }
+
+# Page and template fragment caching (see rithm/page_cache.py). Entries are
+# keyed on DEPLOY_VERSION, so each release starts with a cold cache instead
+# of serving markup from the previous one. Set the timeout to 0 to disable.
+TEMPLATE_CACHE_TIMEOUT = int(os.environ.get('TEMPLATE_CACHE_TIMEOUT', 0 if DEBUG else 3600))
+
+
+def _git_revision():
+    """The checked-out commit, read from .git (there may be no git binary)."""
+    git_dir = os.path.join(BASE_DIR, '.git')
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as fh:
+            head = fh.read().strip()
+        if head.startswith('ref: '):
+            with open(os.path.join(git_dir, head[5:])) as fh:
+                head = fh.read().strip()
+    except OSError:
+        return None
+    return head
+
+
+DEPLOY_VERSION = (
+    os.environ.get('DEPLOY_VERSION')
+    or os.environ.get('RAILWAY_GIT_COMMIT_SHA')
+    or os.environ.get('SOURCE_VERSION')
+    or _git_revision()
+    # Last resort: every process start counts as a new deploy
+    or str(int(time.time()))
+)[:12]
+
+# Leaderboards
+# Seconds a cached leaderboard is served before it is rebuilt; submitting a
+# score invalidates the affected boards immediately.
+LEADERBOARD_CACHE_TIMEOUT = int(os.environ.get('LEADERBOARD_CACHE_TIMEOUT', 60))
+
+# Raw Score rows older than this many days are rolled up into daily totals by
+# `python manage.py rollup_scores` (run it from cron). Set to 0 to keep
+# every raw row.
+SCORE_RETENTION_DAYS = int(os.environ.get('SCORE_RETENTION_DAYS', 90)) or None
+
 # Email Settings
 # For production, set these environment variables:
 # EMAIL_HOST, EMAIL_PORT, EMAIL_HOST_USER, EMAIL_HOST_PASSWORD, EMAIL_USE_TLS/EMAIL_USE_SSL
@@ -210,4 +394,10 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'R.I.T.H.M <noreply@ri
 
 # Use SMTP backend in production if credentials are provided
 if EMAIL_HOST_USER and EMAIL_HOST_PASSWORD:
-    EMAIL_BACKEND = 'django.core.mail.backends.smtp.SMTPBackend'
+    EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+# Outgoing mail is queued in the database (accounts.outbox) and sent outside
+# the request. 'thread' sends from a background thread in the web process;
+# 'worker' leaves it to `python manage.py send_queued_email --loop` running
+# as a separate process.
+EMAIL_OUTBOX_MODE = os.environ.get('EMAIL_OUTBOX_MODE', 'thread').lower()
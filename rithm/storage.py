@@ -0,0 +1,28 @@
+"""
+Static files storage.
+
+``collectstatic`` is the build step for the CSS and JS bundles under each
+app's ``static/`` directory: the manifest storage copies them with content
+hashes in their names (``css/index.3f2a9c1b8e4d.css``) and WhiteNoise gzips
+and brotli-compresses them and serves hashed names with far-future
+``immutable`` cache headers. A changed file gets a new name, so browsers
+never need to revalidate.
+"""
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Hashed, compressed storage that tolerates a missing manifest in development."""
+
+    def stored_name(self, name):
+        # Without collectstatic (tests, a fresh checkout with DEBUG on) there
+        # is no manifest or collected file to hash; serve the plain name,
+        # which the staticfiles finders can still resolve. In production an
+        # unhashed URL would be cached as immutable, so fail instead
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.STATIC_MANIFEST_STRICT:
+                raise
+            return name
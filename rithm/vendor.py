@@ -0,0 +1,383 @@
+"""
+Self-hosted copies of the third-party CSS, JS and fonts.
+
+The ``vendor_assets`` command downloads each pinned upstream file, checks it
+against its Subresource Integrity hash where one is pinned, slims it down to
+what the site uses and writes the result under ``static/vendor/`` together
+with ``vendor.json``, a record of what was built. From there collectstatic
+hashes and compresses the files like every other bundle:
+
+* Bootstrap's CSS is purged to the classes that appear in our templates,
+  scripts and views.
+* Font Awesome keeps only the icons we reference, and its webfonts are
+  subset to those glyphs as woff2.
+* Google Fonts keeps the latin subset, as woff2, of the weights we load.
+
+The ``{% vendor %}`` tag (landing_page/templatetags/vendor_tags.py) links
+the vendored files, falling back to the CDN for anything not built yet.
+
+Subsetting fonts needs fontTools and brotli (``pip install fonttools
+brotli``); without them the full webfonts are copied.
+
+Follow-up: only bootstrap and fontawesome are built into static/vendor/
+so far. Two assets still load from third-party origins until
+``manage.py vendor_assets fonts tone`` is run and the result committed:
+
+* fonts - fonts.googleapis.com and fonts.gstatic.com, on every page.
+* tone - cdnjs.cloudflare.com (Tone.js), on the synth page.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import urllib.request
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.messages.constants import DEFAULT_TAGS
+
+logger = logging.getLogger(__name__)
+
+VENDOR_DIR = 'vendor'
+MANIFEST = 'vendor.json'
+
+# Google Fonts picks the font format from the user agent; this gets woff2
+BROWSER_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+FONTAWESOME_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4'
+GOOGLE_FONTS_CSS = (
+    'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700'
+    '&family=Space+Grotesk:wght@400;500;600;700&display=swap'
+)
+
+# What {% vendor %} renders for an asset that hasn't been vendored
+ASSETS = {
+    'fonts': {
+        'cdn': (
+            '<link rel="preconnect" href="https://fonts.googleapis.com">\n'
+            '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+            f'<link href="{GOOGLE_FONTS_CSS.replace("&", "&amp;")}" rel="stylesheet">'
+        ),
+    },
+    'bootstrap': {
+        'url': 'https://stackpath.bootstrapcdn.com/bootstrap/4.4.1/css/bootstrap.min.css',
+        'integrity': 'sha384-Vkoo8x4CGsO3+Hhxv8T/Q5PaXtkKtu6ug5TOeNV6gBiFeWPGFN9MuhOf23Q9Ifjh',
+        'cdn': (
+            '<link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.4.1/css/bootstrap.min.css"'
+            ' integrity="sha384-Vkoo8x4CGsO3+Hhxv8T/Q5PaXtkKtu6ug5TOeNV6gBiFeWPGFN9MuhOf23Q9Ifjh"'
+            ' crossorigin="anonymous">'
+        ),
+    },
+    'fontawesome': {
+        'url': f'{FONTAWESOME_CDN}/css/all.min.css',
+        'cdn': f'<link rel="stylesheet" href="{FONTAWESOME_CDN}/css/all.min.css">',
+    },
+    'tone': {
+        'url': 'https://cdnjs.cloudflare.com/ajax/libs/tone/14.8.49/Tone.js',
+        'cdn': '<script src="https://cdnjs.cloudflare.com/ajax/libs/tone/14.8.49/Tone.js"></script>',
+    },
+}
+
+# Class names that only ever appear built from a variable, e.g. alert-{{ message.tags }}
+SAFELIST = {'alert-' + tag for tag in DEFAULT_TAGS.values()} | {'alert-danger', 'show', 'collapsed'}
+
+TOKEN = re.compile(r'[A-Za-z][\w-]*')
+NOT_PSEUDO = re.compile(r':not\([^)]*\)')
+CLASS_SELECTOR = re.compile(r'\.((?:\\.|[\w-])+)')
+KEYFRAMES = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)')
+ICON_CONTENT = re.compile(r'content:\s*"\\(f[0-9a-f]{3})"')
+FONT_URL = re.compile(r'url\(([^)]+)\)')
+
+
+class VendorError(Exception):
+    pass
+
+
+def integrity(data):
+    """The Subresource Integrity hash of ``data``."""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+class Fetcher:
+    """Download upstream files, or read them from a local mirror directory."""
+
+    def __init__(self, source_dir=None):
+        self.source_dir = source_dir
+
+    def __call__(self, url, expected=None, user_agent=None):
+        if self.source_dir:
+            path = os.path.join(self.source_dir, url.rsplit('/', 1)[-1].split('?')[0])
+            try:
+                with open(path, 'rb') as fh:
+                    data = fh.read()
+            except OSError as e:
+                raise VendorError(f'{url}: not in {self.source_dir} ({e})')
+        else:
+            request = urllib.request.Request(url, headers={'User-Agent': user_agent or 'rithm-vendor'})
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    data = response.read()
+            except OSError as e:
+                raise VendorError(f'{url}: {e}')
+        if expected and integrity(data) != expected:
+            raise VendorError(f'{url}: integrity mismatch, expected {expected}, got {integrity(data)}')
+        return data
+
+
+def _project_dirs():
+    """Template, static and code directories of the project's own apps."""
+    base = Path(settings.BASE_DIR)
+    dirs = [Path(d) for d in settings.TEMPLATES[0]['DIRS']] + [Path(d) for d in settings.STATICFILES_DIRS]
+    dirs += [Path(config.path) for config in apps.get_app_configs() if Path(config.path).is_relative_to(base)]
+    return dirs
+
+
+def used_tokens():
+    """Every word in our templates, scripts and views that could be a class name."""
+    tokens = set(SAFELIST)
+    seen = set()
+    for directory in _project_dirs():
+        for pattern in ('*.html', '*.js', '*.py'):
+            for path in directory.rglob(pattern):
+                if path in seen or VENDOR_DIR in path.parts or 'migrations' in path.parts:
+                    continue
+                seen.add(path)
+                tokens.update(TOKEN.findall(path.read_text(errors='ignore')))
+    return tokens
+
+
+def _blocks(css):
+    """Split a stylesheet into top-level ``(prelude, body)`` pairs; body is None for ``@import;``."""
+    blocks = []
+    i = 0
+    length = len(css)
+    while i < length:
+        if css[i].isspace():
+            i += 1
+            continue
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        start = i
+        while i < length and css[i] not in '{;':
+            if css[i] in '"\'':
+                i = css.index(css[i], i + 1)
+            i += 1
+        prelude = css[start:i].strip()
+        if i >= length:
+            break
+        if css[i] == ';':
+            if prelude:
+                blocks.append((prelude, None))
+            i += 1
+            continue
+        depth = 0
+        body_start = i + 1
+        while i < length:
+            char = css[i]
+            if char in '"\'':
+                i = css.index(char, i + 1)
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+        blocks.append((prelude, css[body_start:i]))
+        i += 1
+    return blocks
+
+
+def _selector_used(selector, tokens):
+    classes = CLASS_SELECTOR.findall(NOT_PSEUDO.sub('', selector))
+    return all(name.replace('\\', '') in tokens for name in classes)
+
+
+def purge_css(css, tokens):
+    """Drop the rules whose selectors need a class that is never used."""
+    out = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            out.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports')):
+            inner = purge_css(body, tokens)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            out.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [s for s in prelude.split(',') if _selector_used(s, tokens)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body}}}")
+    purged = ''.join(out)
+    # Keyframes nobody animates with any more
+    for name in set(KEYFRAMES.findall(purged)):
+        if not re.search(r'animation(?:-name)?:[^;}]*\b' + re.escape(name) + r'\b', purged):
+            purged = re.sub(r'@(?:-webkit-)?keyframes\s+' + re.escape(name) + r'\{(?:[^{}]*\{[^{}]*\})*[^{}]*\}', '', purged)
+    return purged
+
+
+def _fonttools():
+    """fontTools' subset and TTFont, or None if fontTools or brotli (for woff2) is missing."""
+    try:
+        import brotli  # noqa: F401
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        return None
+    return subset, TTFont
+
+
+def subset_font(data, codepoints):
+    """``data`` subset to ``codepoints`` as woff2, or unchanged without fontTools."""
+    tools = _fonttools()
+    if tools is None:
+        logger.warning('fontTools or brotli is not installed; copying the full font')
+        return data
+    subset, TTFont = tools
+    font = TTFont(BytesIO(data))
+    options = subset.Options()
+    options.flavor = 'woff2'
+    # FontForge's timestamp table; fontTools can't subset it
+    options.drop_tables += ['FFTM']
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    out = BytesIO()
+    font.save(out)
+    return out.getvalue()
+
+
+def font_codepoints(data):
+    """The characters a font has glyphs for, or None without fontTools."""
+    tools = _fonttools()
+    if tools is None:
+        return None
+    return set(tools[1](BytesIO(data)).getBestCmap())
+
+
+def build_bootstrap(fetch, tokens):
+    asset = ASSETS['bootstrap']
+    css = fetch(asset['url'], asset['integrity']).decode()
+    return {'bootstrap/bootstrap.css': purge_css(css, tokens).encode()}, asset['url']
+
+
+def build_fontawesome(fetch, tokens):
+    css = fetch(ASSETS['fontawesome']['url']).decode()
+    css = purge_css(css, tokens)
+    codepoints = {int(code, 16) for code in ICON_CONTENT.findall(css)}
+
+    files = {}
+    faces = []
+    for prelude, body in _blocks(css):
+        if prelude != '@font-face':
+            continue
+        woff2 = next(url.strip('"\'') for url in FONT_URL.findall(body) if url.strip('"\'').endswith('.woff2'))
+        name = woff2.rsplit('/', 1)[-1]
+        font = fetch(f'{FONTAWESOME_CDN}/webfonts/{name}')
+        glyphs = font_codepoints(font)
+        if glyphs is not None and not glyphs & codepoints:
+            # A style none of our icons use, e.g. the brands font
+            faces.append((body, None))
+            continue
+        files[f'fontawesome/webfonts/{name}'] = subset_font(font, codepoints)
+        faces.append((body, name))
+
+    for body, name in faces:
+        old = f'@font-face{{{body}}}'
+        if name is None:
+            css = css.replace(old, '')
+        else:
+            # Every browser we support reads woff2
+            src = f'src:url(../webfonts/{name}) format("woff2")'
+            new_body = re.sub(r'src:[^;}]*(?:;src:[^;}]*)*', src, body, count=1)
+            css = css.replace(old, f'@font-face{{{new_body}}}')
+    files['fontawesome/css/icons.css'] = css.encode()
+    return files, ASSETS['fontawesome']['url']
+
+
+def build_fonts(fetch, tokens):
+    css = fetch(GOOGLE_FONTS_CSS, user_agent=BROWSER_USER_AGENT).decode()
+    files = {}
+    names = {}
+    faces = []
+    # Google lists a face per unicode range, each after a /* subset */ comment
+    for subset_name, face in re.findall(r'/\*\s*([\w-]+)\s*\*/\s*(@font-face\s*\{[^}]*\})', css):
+        if subset_name != 'latin':
+            continue
+        url = FONT_URL.search(face).group(1).strip('"\'')
+        if url not in names:
+            family = re.search(r"font-family:\s*'([^']+)'", face).group(1)
+            weight = re.search(r'font-weight:\s*(\d+)', face).group(1)
+            names[url] = f"fonts/{family.lower().replace(' ', '-')}-{weight}.woff2"
+            files[names[url]] = fetch(url)
+        faces.append(face.replace(url, names[url].split('/', 1)[1]))
+    if not faces:
+        raise VendorError('No latin faces in the Google Fonts stylesheet')
+    files['fonts/fonts.css'] = '\n'.join(faces).encode()
+    return files, GOOGLE_FONTS_CSS
+
+
+def build_tone(fetch, tokens):
+    url = ASSETS['tone']['url']
+    return {'tone/Tone.js': fetch(url, ASSETS['tone'].get('integrity'))}, url
+
+
+BUILDERS = {
+    'fonts': build_fonts,
+    'bootstrap': build_bootstrap,
+    'fontawesome': build_fontawesome,
+    'tone': build_tone,
+}
+
+
+def vendor_root():
+    return Path(settings.BASE_DIR, 'static', VENDOR_DIR)
+
+
+def build(names, fetch):
+    """Build ``names`` into static/vendor/ and record them in vendor.json."""
+    tokens = used_tokens()
+    # Fetch everything first so a failed download leaves the old copies alone
+    built = {name: BUILDERS[name](fetch, tokens) for name in names}
+
+    root = vendor_root()
+    record = dict(read_manifest())
+    for name, (files, source) in built.items():
+        for path in record.get(name, {}).get('files', {}):
+            Path(root.parent, path).unlink(missing_ok=True)
+        for path, data in files.items():
+            target = root / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+        record[name] = {
+            'source': source,
+            'css': [f'{VENDOR_DIR}/{path}' for path in files if path.endswith('.css')],
+            'js': [f'{VENDOR_DIR}/{path}' for path in files if path.endswith('.js')],
+            'files': {f'{VENDOR_DIR}/{path}': integrity(data) for path, data in files.items()},
+        }
+    with open(root / MANIFEST, 'w') as fh:
+        json.dump(record, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+    read_manifest.cache_clear()
+    return record
+
+
+@lru_cache(maxsize=None)
+def read_manifest():
+    """What has been vendored, from static/vendor/vendor.json."""
+    try:
+        with open(vendor_root() / MANIFEST) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
@@ -0,0 +1,100 @@
+// Theme Toggle - Detect system preference and allow manual override
+(function() {
+  const themeToggle = document.getElementById('theme-toggle');
+  const html = document.documentElement;
+
+  // Get stored theme or detect system preference
+  function getPreferredTheme() {
+    const stored = localStorage.getItem('theme');
+    if (stored) return stored;
+
+    // Check system preference
+    if (window.matchMedia && window.matchMedia('(prefers-color-scheme: light)').matches) {
+      return 'light';
+    }
+    return 'dark';
+  }
+
+  // Apply theme
+  function setTheme(theme) {
+    if (theme === 'light') {
+      html.setAttribute('data-theme', 'light');
+    } else {
+      html.removeAttribute('data-theme');
+    }
+  }
+
+  // Initialize theme
+  setTheme(getPreferredTheme());
+
+  // Toggle button click handler
+  if (themeToggle) {
+    themeToggle.addEventListener('click', function() {
+      const currentTheme = html.getAttribute('data-theme');
+      const newTheme = currentTheme === 'light' ? 'dark' : 'light';
+
+      setTheme(newTheme);
+      localStorage.setItem('theme', newTheme);
+    });
+  }
+
+  // Listen for system preference changes
+  if (window.matchMedia) {
+    window.matchMedia('(prefers-color-scheme: light)').addEventListener('change', function(e) {
+      // Only auto-switch if user hasn't manually set a preference
+      if (!localStorage.getItem('theme')) {
+        setTheme(e.matches ? 'light' : 'dark');
+      }
+    });
+  }
+})();
+
+// The two Bootstrap plugins the site uses, without jQuery: the navbar
+// toggler (data-toggle="collapse") and dismissible alerts
+document.addEventListener('click', function(event) {
+  const toggler = event.target.closest('[data-toggle="collapse"]');
+  if (toggler) {
+    const target = document.querySelector(toggler.getAttribute('data-target'));
+    if (target) {
+      const open = target.classList.toggle('show');
+      toggler.classList.toggle('collapsed', !open);
+      toggler.setAttribute('aria-expanded', open);
+    }
+    return;
+  }
+  const dismiss = event.target.closest('[data-dismiss="alert"]');
+  if (dismiss) {
+    const alert = dismiss.closest('.alert');
+    if (alert) alert.remove();
+  }
+});
+
+// Newsletter form handling
+const newsletterForm = document.getElementById('newsletter-form');
+if (newsletterForm) {
+  newsletterForm.addEventListener('submit', function(e) {
+    e.preventDefault();
+    const messageDiv = this.querySelector('.newsletter-message');
+    const emailInput = this.querySelector('input[type="email"]');
+    const submitBtn = this.querySelector('button[type="submit"]');
+
+    // Simple validation
+    if (emailInput.value && emailInput.checkValidity()) {
+      // Simulate subscription (replace with actual API call later)
+      submitBtn.textContent = 'Subscribing...';
+      submitBtn.disabled = true;
+
+      setTimeout(() => {
+        messageDiv.textContent = 'Thanks for subscribing! We\'ll keep you updated.';
+        messageDiv.style.display = 'block';
+        emailInput.value = '';
+        submitBtn.textContent = 'Subscribe';
+        submitBtn.disabled = false;
+
+        setTimeout(() => {
+          messageDiv.style.display = 'none';
+        }, 4000);
+      }, 1000);
+    }
+  });
+}
@@ -1,7 +1,10 @@
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
 from django.views.generic import ListView
+from rithm.page_cache import cache_anonymous_page
 
 
+@method_decorator(cache_anonymous_page, name='dispatch')
 class IndexView(ListView):
     # Create your views here.
     template_name = 'synth/index.html'
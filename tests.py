@@ -4,11 +4,19 @@ Rithm Test Suite
 Tests for the music theory education platform.
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse, resolve
+from rithm.instrumentation import QueryBudgetMixin
 import os
 
 
+def read_static(path):
+    """Contents of a static file, found the way collectstatic would."""
+    from django.contrib.staticfiles import finders
+    with open(finders.find(path)) as fh:
+        return fh.read()
+
+
 class URLRoutingTests(TestCase):
     """Test that all URLs resolve correctly."""
     
@@ -94,10 +102,28 @@ class NoteIdentificationTests(TestCase):
         self.assertContains(self.response, 'id="accuracy"')
     
     def test_note_identification_contains_javascript(self):
-        """Page should contain game JavaScript."""
-        self.assertContains(self.response, 'setDifficulty')
-        self.assertContains(self.response, 'checkAnswer')
-        self.assertContains(self.response, 'nextNote')
+        """Page should load the game JavaScript."""
+        self.assertContains(self.response, 'note_identification/js/index.js')
+        script = read_static('note_identification/js/index.js')
+        self.assertIn('setDifficulty', script)
+        self.assertIn('checkAnswer', script)
+        self.assertIn('nextNote', script)
+    
+    def test_note_display_uses_sprite_sheets(self):
+        """Notes should come from the preloaded sprite sheets, not one image each."""
+        self.assertContains(self.response, 'class="note-sprite"')
+        self.assertContains(self.response, 'rel="preload" as="image" href="/static/note_identification/sprites/naturals.png"')
+        self.assertNotContains(self.response, 'note_identification/A.png')
+    
+    def test_sprite_sheets_cover_every_note(self):
+        """Every note the game can ask for should have a sprite position."""
+        import re
+        script = read_static('note_identification/js/index.js')
+        note_sets = re.search(r'const noteSets = \{(.*?)\};', script, re.S).group(1)
+        notes = set(re.findall(r"'([^']+)'", note_sets))
+        sprites = set(re.findall(r'\[data-note="([^"]+)"\]', read_static('note_identification/sprites/notes.css')))
+        self.assertEqual(len(notes), 17)
+        self.assertEqual(notes - sprites, set())
 
 
 class SynthesizerTests(TestCase):
@@ -125,8 +151,10 @@ class SynthesizerTests(TestCase):
     
     def test_synth_contains_synth_types(self):
         """Synth page should have multiple synth types."""
-        self.assertContains(self.response, 'poly_synth')
-        self.assertContains(self.response, 'FM_synth')
+        self.assertContains(self.response, 'synth/js/keyboard.js')
+        script = read_static('synth/js/keyboard.js')
+        self.assertIn('poly_synth', script)
+        self.assertIn('FM_synth', script)
 
 
 class PitchIdentificationTests(TestCase):
@@ -163,6 +191,55 @@ class StaticFilesTests(TestCase):
                     os.path.exists(note_file),
                     f"Note image {note}.png should exist"
                 )
+    
+    def test_templates_have_no_large_inline_blocks(self):
+        """CSS and JS belong in static bundles, not inline in templates."""
+        import re
+        from pathlib import Path
+        from django.conf import settings
+        # Small per-user config scripts may stay inline; emails need inline CSS
+        limit = 512
+        inline = re.compile(r'<(style|script)(?![^>]*\bsrc=)([^>]*)>(.*?)</\1>', re.S)
+        offenders = []
+        for template in Path(settings.BASE_DIR, 'templates').rglob('*.html'):
+            if 'email' in template.parts:
+                continue
+            for match in inline.finditer(template.read_text()):
+                if 'ld+json' not in match.group(2) and len(match.group(3)) > limit:
+                    offenders.append(f'{template.name}: {len(match.group(3))} byte <{match.group(1)}>')
+        self.assertEqual(offenders, [])
+    
+    def test_pages_link_bundles(self):
+        """Pages should load the shared and per-page bundles."""
+        response = self.client.get('/chord_identification/')
+        for bundle in ['rithm/css/base.css', 'rithm/js/base.js', 'accounts/js/stats.js',
+                       'chord_identification/css/index.css', 'chord_identification/js/index.js']:
+            self.assertContains(response, f'/static/{bundle}')
+    
+    def test_collectstatic_hashes_bundles(self):
+        """collectstatic should write content-hashed, compressed bundles."""
+        import tempfile
+        from io import StringIO
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from django.core.management import call_command
+        # Changing STATIC_ROOT makes Django rebuild staticfiles_storage
+        with tempfile.TemporaryDirectory() as root, self.settings(STATIC_ROOT=root):
+            call_command('collectstatic', interactive=False, skip_images=True, stdout=StringIO())
+            url = staticfiles_storage.url('rithm/css/base.css')
+            self.assertRegex(url, r'^/static/rithm/css/base\.[0-9a-f]{12}\.css$')
+            self.assertTrue(os.path.exists(os.path.join(root, url[len('/static/'):]) + '.gz'))
+    
+    def test_missing_manifest_entry_fails_outside_debug(self):
+        """Only development should fall back to unhashed names for files collectstatic missed."""
+        import tempfile
+        from rithm.storage import StaticFilesStorage
+        with tempfile.TemporaryDirectory() as root:
+            storage = StaticFilesStorage(location=root)
+            with self.settings(STATIC_MANIFEST_STRICT=True):
+                with self.assertRaises(ValueError):
+                    storage.url('rithm/css/missing.css')
+            with self.settings(STATIC_MANIFEST_STRICT=False):
+                self.assertEqual(storage.url('rithm/css/missing.css'), '/static/rithm/css/missing.css')
 
 
 class BaseTemplateTests(TestCase):
@@ -252,6 +329,24 @@ class AuthenticationTests(TestCase):
         })
         self.assertEqual(response.status_code, 302)  # Redirect after success
     
+    def test_login_does_not_touch_profile(self):
+        """Logging in should not read or rewrite the user's profile."""
+        from django.contrib.auth.models import User
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        User.objects.create_user('testuser', password='testpass123!')
+        
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post('/accounts/login/', {
+                'username': 'testuser',
+                'password': 'testpass123!'
+            })
+        self.assertEqual(response.status_code, 302)
+        sql = [query['sql'] for query in captured.captured_queries]
+        self.assertFalse([q for q in sql if 'accounts_userprofile' in q])
+        # One user lookup, session insert and update, last_login update
+        self.assertLessEqual(len(sql), 9)
+    
     def test_profile_requires_login(self):
         """Profile page should require authentication."""
         response = self.client.get('/accounts/profile/')
@@ -399,12 +494,29 @@ class UserProfileTests(TestCase):
         """Profile should be auto-created when user is created."""
         self.assertTrue(hasattr(self.user, 'profile'))
     
-    def test_profile_default_values(self):
-        """Profile should have correct default values."""
-        profile = self.user.profile
-        self.assertEqual(profile.note_total_correct, 0)
-        self.assertEqual(profile.note_best_streak, 0)
-        self.assertEqual(profile.note_difficulty, 'beginner')
+    def test_profile_created_lazily(self):
+        """Users without a profile (e.g. bulk-created) get one on first access."""
+        from accounts.models import UserProfile
+        UserProfile.objects.filter(user=self.user).delete()
+        response = self.client.get('/accounts/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+    
+    def test_user_save_does_not_write_profile(self):
+        """Saving a user should not also save their profile."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as captured:
+            self.user.save()
+        self.assertEqual(len(captured.captured_queries), 1)
+    
+    def test_stats_default_values(self):
+        """Unplayed games should report zeroed stats."""
+        from accounts.models import GameStats
+        stats = GameStats.for_user(self.user)['note']
+        self.assertEqual(stats.total_correct, 0)
+        self.assertEqual(stats.best_streak, 0)
+        self.assertEqual(stats.difficulty, 'beginner')
     
     def test_get_stats_api(self):
         """Should be able to get stats via API."""
@@ -431,9 +543,9 @@ class UserProfileTests(TestCase):
         self.assertEqual(response.status_code, 200)
         
         # Verify stats were updated
-        self.user.profile.refresh_from_db()
-        self.assertEqual(self.user.profile.note_total_correct, 10)
-        self.assertEqual(self.user.profile.note_best_streak, 5)
+        stats = self.user.game_stats.get(game='note')
+        self.assertEqual(stats.total_correct, 10)
+        self.assertEqual(stats.best_streak, 5)
     
     def test_stats_api_unauthenticated(self):
         """Stats API should reject unauthenticated requests for updates."""
@@ -475,8 +587,7 @@ class UserProfileTests(TestCase):
         )
         
         # Should still be 10
-        self.user.profile.refresh_from_db()
-        self.assertEqual(self.user.profile.note_best_streak, 10)
+        self.assertEqual(self.user.game_stats.get(game='note').best_streak, 10)
     
     def test_difficulty_saved(self):
         """Difficulty preference should be saved."""
@@ -488,19 +599,1119 @@ class UserProfileTests(TestCase):
             content_type='application/json'
         )
         
-        self.user.profile.refresh_from_db()
-        self.assertEqual(self.user.profile.note_difficulty, 'advanced')
+        self.assertEqual(self.user.game_stats.get(game='note').difficulty, 'advanced')
     
     def test_accuracy_calculation(self):
         """Accuracy should be calculated correctly."""
-        profile = self.user.profile
-        profile.note_total_correct = 7
-        profile.note_total_attempts = 10
-        profile.save()
+        from accounts.models import GameStats
+        stats = GameStats.objects.create(
+            user=self.user, game='note', total_correct=7, total_attempts=10
+        )
         
-        self.assertEqual(profile.note_accuracy, 70)
+        self.assertEqual(stats.accuracy, 70)
     
     def test_accuracy_zero_attempts(self):
         """Accuracy should be 0 with no attempts."""
-        profile = self.user.profile
-        self.assertEqual(profile.note_accuracy, 0)
+        from accounts.models import GameStats
+        self.assertEqual(GameStats(user=self.user, game='note').accuracy, 0)
+    
+    def test_generic_stats_endpoint(self):
+        """One endpoint should read and update any game's stats."""
+        import json
+        response = self.client.post(
+            '/accounts/api/stats/pitch/',
+            data=json.dumps({'correct': 8, 'total': 10, 'streak': 2, 'bestStreak': 4}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        
+        data = json.loads(self.client.get('/accounts/api/stats/pitch/').content)
+        self.assertEqual(data['stats']['correct'], 8)
+        self.assertEqual(data['stats']['accuracy'], 80)
+        self.assertEqual(data['stats']['bestStreak'], 4)
+    
+    def test_update_only_touches_played_game(self):
+        """Updating one game should leave the other games' rows alone."""
+        import json
+        for game in ['note', 'chord']:
+            self.client.post(
+                f'/accounts/api/stats/{game}/',
+                data=json.dumps({'correct': 3, 'total': 5}),
+                content_type='application/json'
+            )
+        chord_updated = self.user.game_stats.get(game='chord').updated_at
+        
+        self.client.post(
+            '/accounts/api/stats/note/',
+            data=json.dumps({'correct': 4, 'total': 6}),
+            content_type='application/json'
+        )
+        chord = self.user.game_stats.get(game='chord')
+        self.assertEqual(chord.total_correct, 3)
+        self.assertEqual(chord.updated_at, chord_updated)
+        self.assertEqual(self.user.game_stats.get(game='note').total_correct, 4)
+    
+    def test_stats_revalidation(self):
+        """A repeat poll should get a 304 until the stats change."""
+        import json
+        response = self.client.get('/accounts/api/note-stats/')
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        
+        response = self.client.get('/accounts/api/note-stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        
+        # Each game has its own ETag
+        response = self.client.get('/accounts/api/chord-stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        
+        self.client.post(
+            '/accounts/api/note-stats/update/',
+            data=json.dumps({'correct': 1, 'total': 2}),
+            content_type='application/json'
+        )
+        response = self.client.get('/accounts/api/note-stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['stats']['correct'], 1)
+    
+    def test_stats_etag_sees_writes_from_other_workers(self):
+        """A write made outside this process should still change the ETag."""
+        from accounts.models import GameStats
+        GameStats.objects.record(self.user, 'note', increments={'total_correct': 1, 'total_attempts': 1})
+        etag = self.client.get('/accounts/api/note-stats/')['ETag']
+        
+        # Straight to the database, as another gunicorn worker would
+        GameStats.objects.record(self.user, 'note', increments={'total_correct': 1, 'total_attempts': 1})
+        response = self.client.get('/accounts/api/note-stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stats']['correct'], 2)
+    
+    def test_update_is_one_statement(self):
+        """An update should be a single upsert after session/user lookups."""
+        import json
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.get('/accounts/api/stats/note/')
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(
+                '/accounts/api/stats/note/',
+                data=json.dumps({'correct': 3, 'total': 4, 'bestStreak': 2}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        writes = [q['sql'] for q in captured.captured_queries if not q['sql'].startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(json.loads(response.content)['stats']['bestStreak'], 2)
+    
+    def test_stale_best_streak_does_not_clobber(self):
+        """A lower best streak from another tab should not overwrite a higher one."""
+        from accounts.models import GameStats
+        GameStats.objects.record(self.user, 'note', best_streak=12)
+        stats = GameStats.objects.record(self.user, 'note', best_streak=4, current_streak=4)
+        self.assertEqual(stats.best_streak, 12)
+        self.assertEqual(stats.current_streak, 4)
+        self.assertEqual(GameStats.objects.get(user=self.user, game='note').best_streak, 12)
+    
+    def test_record_increments(self):
+        """Increments should add to the stored counters in the database."""
+        from accounts.models import GameStats
+        GameStats.objects.record(self.user, 'chord', increments={'total_correct': 3, 'total_attempts': 5})
+        stats = GameStats.objects.record(self.user, 'chord', increments={'total_correct': 2, 'total_attempts': 2})
+        self.assertEqual((stats.total_correct, stats.total_attempts), (5, 7))
+        self.assertEqual(stats.difficulty, 'beginner')
+    
+    def test_locked_fallback_matches_upsert(self):
+        """The fallback for backends without ON CONFLICT should behave the same."""
+        from accounts.models import GameStats
+        GameStats.objects._locked_record(self.user, 'pitch', {}, {'best_streak': 9, 'total_correct': 1})
+        stats = GameStats.objects._locked_record(
+            self.user, 'pitch', {'total_correct': 2}, {'best_streak': 3}
+        )
+        self.assertEqual((stats.total_correct, stats.best_streak), (3, 9))
+    
+    def test_invalid_value_rejected(self):
+        """Non-numeric counters should be rejected."""
+        import json
+        response = self.client.post(
+            '/accounts/api/stats/note/',
+            data=json.dumps({'correct': 'lots'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_unknown_game_rejected(self):
+        """Stats endpoint should 404 for games that don't exist."""
+        response = self.client.get('/accounts/api/stats/kazoo/')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_profile_page_shows_game_stats(self):
+        """Profile page should render the per-game stats rows."""
+        from accounts.models import GameStats
+        GameStats.objects.create(user=self.user, game='interval', total_correct=42, total_attempts=50)
+        response = self.client.get('/accounts/profile/')
+        self.assertContains(response, '42')
+        self.assertContains(response, '84%')
+
+
+class StatsSyncTests(TestCase):
+    """Tests for the batched stats delta sync endpoint."""
+    
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('syncer')
+        self.client.force_login(self.user)
+    
+    def _sync(self, seq, games, client='tab-1'):
+        import json
+        return self.client.post(
+            '/accounts/api/stats/sync/',
+            data=json.dumps({'client': client, 'seq': seq, 'games': games}),
+            content_type='application/json'
+        )
+    
+    def test_deltas_for_several_games_in_one_request(self):
+        """One batch should add to the totals of every game it mentions."""
+        import json
+        from accounts.models import GameStats
+        GameStats.objects.record(self.user, 'note', total_correct=10, total_attempts=20)
+        response = self._sync(1, {
+            'note': {'correct': 3, 'total': 4, 'streak': 2, 'bestStreak': 6},
+            'chord': {'correct': 1, 'total': 1, 'difficulty': 'advanced'},
+        })
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertTrue(data['applied'])
+        self.assertEqual(data['stats']['note']['correct'], 13)
+        self.assertEqual(data['stats']['note']['total'], 24)
+        self.assertEqual(data['stats']['note']['bestStreak'], 6)
+        self.assertEqual(data['stats']['chord']['difficulty'], 'advanced')
+    
+    def test_sync_changes_stats_etag(self):
+        """An applied batch should make earlier stats ETags stale; a replayed one shouldn't."""
+        etag = self.client.get('/accounts/api/stats/note/')['ETag']
+        self._sync(1, {'note': {'correct': 1, 'total': 1}})
+        response = self.client.get('/accounts/api/stats/note/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        
+        etag = response['ETag']
+        self._sync(1, {'note': {'correct': 1, 'total': 1}})
+        response = self.client.get('/accounts/api/stats/note/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_resent_batch_is_not_applied_twice(self):
+        """A batch resent after a lost response should be acknowledged, not re-added."""
+        import json
+        self._sync(1, {'note': {'correct': 2, 'total': 3}})
+        response = self._sync(1, {'note': {'correct': 2, 'total': 3}})
+        data = json.loads(response.content)
+        self.assertTrue(data['success'])
+        self.assertFalse(data['applied'])
+        self.assertEqual(data['stats']['note']['total'], 3)
+        
+        self._sync(2, {'note': {'correct': 1, 'total': 1}})
+        self.assertEqual(self.user.game_stats.get(game='note').total_attempts, 4)
+    
+    def test_sequences_are_per_client(self):
+        """Two tabs numbering their own batches should both be applied."""
+        self._sync(1, {'note': {'correct': 1, 'total': 1}}, client='tab-1')
+        self._sync(1, {'note': {'correct': 1, 'total': 2}}, client='tab-2')
+        self.assertEqual(self.user.game_stats.get(game='note').total_attempts, 3)
+    
+    def test_beacon_form_post(self):
+        """sendBeacon posts a form with the batch in a payload field."""
+        import json
+        response = self.client.post('/accounts/api/stats/sync/', {
+            'payload': json.dumps({'client': 'tab-1', 'seq': 1, 'games': {'pitch': {'correct': 1, 'total': 2}}})
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.game_stats.get(game='pitch').total_correct, 1)
+    
+    def test_invalid_batches_rejected(self):
+        """Bad games, negative or inconsistent deltas and bad sequence numbers fail."""
+        for seq, games in [
+            (1, {'kazoo': {'correct': 1, 'total': 1}}),
+            (1, {'note': {'correct': -1, 'total': 1}}),
+            (1, {'note': {'correct': 5, 'total': 1}}),
+            (1, {'note': {'difficulty': 'impossible'}}),
+            (0, {'note': {'correct': 1, 'total': 1}}),
+            (1, {}),
+        ]:
+            self.assertEqual(self._sync(seq, games).status_code, 400, games)
+        self.assertFalse(self.user.game_stats.exists())
+    
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self._sync(1, {'note': {'correct': 1, 'total': 1}}).status_code, 401)
+    
+    def test_game_pages_load_sync_module(self):
+        """Game pages should buffer answers through StatsSync."""
+        response = self.client.get('/interval_training/')
+        self.assertContains(response, 'accounts/js/stats.js')
+        self.assertIn('window.StatsSync', read_static('accounts/js/stats.js'))
+        self.assertIn("StatsSync.answer('interval'", read_static('interval_training/js/index.js'))
+    
+    def test_reset_batch_clears_persisted_totals(self):
+        """A reset should zero the stored totals before adding the batch's answers."""
+        import json
+        from accounts.models import GameStats
+        GameStats.objects.record(self.user, 'note', total_correct=10, total_attempts=20, best_streak=7)
+        response = self._sync(1, {'note': {'reset': True, 'correct': 1, 'total': 2, 'streak': 0}})
+        data = json.loads(response.content)
+        self.assertTrue(data['applied'])
+        self.assertEqual(data['stats']['note']['correct'], 1)
+        self.assertEqual(data['stats']['note']['total'], 2)
+        self.assertEqual(data['stats']['note']['bestStreak'], 7)
+        
+        # The reset is what the next page load sees, and later batches add to it
+        self._sync(2, {'note': {'correct': 1, 'total': 1}})
+        stats = GameStats.objects.get(user=self.user, game='note')
+        self.assertEqual((stats.total_correct, stats.total_attempts), (2, 3))
+        
+        self._sync(3, {'note': {'reset': True}})
+        stats.refresh_from_db()
+        self.assertEqual((stats.total_correct, stats.total_attempts), (0, 0))
+    
+    def test_reset_must_be_a_boolean(self):
+        response = self._sync(1, {'note': {'reset': 'yes'}})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_game_resets_are_synced(self):
+        """Resetting a game's totals should queue a reset, not only clear the page."""
+        self.assertIn('reset: function (game)', read_static('accounts/js/stats.js'))
+        for game, script in [('note', 'note_identification/js/index.js'),
+                             ('interval', 'interval_training/js/index.js'),
+                             ('chord', 'chord_identification/js/index.js')]:
+            self.assertIn(f"StatsSync.reset('{game}')", read_static(script), script)
+    
+    def test_sync_module_shares_state_between_tabs(self):
+        """Tabs should re-read the shared store under a lock and only drop batches the server rejects as invalid."""
+        script = read_static('accounts/js/stats.js')
+        self.assertIn('navigator.locks.request', script)
+        self.assertIn('response.ok || response.status === 400', script)
+
+
+class BootstrapTests(TestCase):
+    """Tests for the single page-load stats payload."""
+    
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user('booted')
+        self.client.force_login(self.user)
+    
+    def _score(self, user, correct, game='note'):
+        from leaderboard.models import Score, WeeklyScore
+        from leaderboard.views import get_week_start
+        Score.objects.create(user=user, game=game, correct=correct, total=20, best_streak=4)
+        WeeklyScore.objects.increment(
+            correct, 20, 4, user_id=user.pk, game=game, difficulty='beginner', week_start=get_week_start()
+        )
+    
+    def test_returns_every_game(self):
+        """Stats for all games should come back, including unplayed ones."""
+        import json
+        data = json.loads(self.client.get('/accounts/api/bootstrap/').content)
+        self.assertTrue(data['authenticated'])
+        self.assertEqual(set(data['stats']), {'note', 'interval', 'chord', 'pitch'})
+        self.assertEqual(data['stats']['pitch']['total'], 0)
+    
+    def test_ranks_and_weekly_progress(self):
+        """Ranks and this week's totals should be included per board."""
+        import json
+        from django.contrib.auth.models import User
+        self._score(User.objects.create_user('leader'), 18)
+        self._score(self.user, 12)
+        
+        data = json.loads(self.client.get('/accounts/api/bootstrap/').content)
+        self.assertEqual(data['ranks']['note']['beginner'], {'alltime': 2, 'weekly': 2})
+        self.assertEqual(data['weekly']['note']['beginner']['correct'], 12)
+        self.assertEqual(data['weekly']['note']['beginner']['sessions'], 1)
+        self.assertEqual(data['ranks']['chord'], {})
+    
+    def test_query_count_does_not_grow_with_boards(self):
+        """Ranks on every board should come from one query per table."""
+        from django.contrib.auth.models import User
+        from accounts.bootstrap import build_bootstrap
+        leader = User.objects.create_user('leader')
+        for game in ['note', 'interval', 'chord', 'pitch']:
+            self._score(leader, 18, game)
+            self._score(self.user, 12, game)
+        with self.assertNumQueries(3):
+            data = build_bootstrap(self.user)
+        self.assertEqual(data['ranks']['pitch']['beginner'], {'alltime': 2, 'weekly': 2})
+    
+    def test_etag_revalidation(self):
+        """An unchanged payload should answer If-None-Match with 304."""
+        import json
+        response = self.client.get('/accounts/api/bootstrap/')
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        
+        response = self.client.get('/accounts/api/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.client.post(
+            '/accounts/api/stats/note/',
+            data=json.dumps({'correct': 1, 'total': 2}),
+            content_type='application/json'
+        )
+        response = self.client.get('/accounts/api/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_anonymous(self):
+        import json
+        self.client.logout()
+        data = json.loads(self.client.get('/accounts/api/bootstrap/').content)
+        self.assertFalse(data['authenticated'])
+    
+    def test_embedded_in_game_pages(self):
+        """Game pages should embed the payload so no second request is needed."""
+        response = self.client.get('/interval_training/')
+        self.assertContains(response, 'id="stats-bootstrap"')
+        
+        self.client.logout()
+        response = self.client.get('/interval_training/')
+        self.assertNotContains(response, 'id="stats-bootstrap"')
+
+
+class EmailOutboxTests(TestCase):
+    """Tests for queueing verification email instead of sending it inline."""
+    
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('pending', email='pending@example.com', is_active=False)
+    
+    def test_resend_only_queues(self):
+        """Resending verification should queue the email, not send it in the request."""
+        from django.core import mail
+        from accounts.models import OutgoingEmail
+        response = self.client.post('/accounts/resend-verification/', {'email': 'pending@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, 'pending@example.com')
+        self.assertIn('/accounts/verify/', email.body)
+    
+    def test_send_pending_uses_one_connection(self):
+        """A batch should go out over a single backend connection."""
+        from unittest import mock
+        from django.core import mail
+        from accounts import outbox
+        from accounts.models import OutgoingEmail
+        for i in range(3):
+            outbox.enqueue('Hello', 'Body', f'user{i}@example.com', html_body='<p>Body</p>')
+        
+        with mock.patch.object(outbox, 'get_connection', wraps=outbox.get_connection) as get_connection:
+            self.assertEqual(outbox.send_pending(), (3, 0))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).count(), 3)
+    
+    def test_failures_back_off_then_give_up(self):
+        """Failed sends should be retried later and eventually marked failed."""
+        from unittest import mock
+        from django.utils import timezone
+        from accounts import outbox
+        from accounts.models import OutgoingEmail
+        email = outbox.enqueue('Hello', 'Body', 'user@example.com')
+        
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('refused')):
+            self.assertEqual(outbox.send_pending(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutgoingEmail.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.send_after, timezone.now())
+            # Not due yet, so nothing is retried
+            self.assertEqual(outbox.send_pending(), (0, 0))
+            
+            with self.assertLogs('accounts.outbox', level='ERROR'):
+                for _ in range(outbox.MAX_ATTEMPTS - 1):
+                    OutgoingEmail.objects.filter(pk=email.pk).update(send_after=timezone.now())
+                    outbox.send_pending()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.last_error, 'refused')
+    
+    def test_thread_mode_wakes_sender_after_commit(self):
+        """Thread mode should schedule a send once the row is committed."""
+        from accounts import outbox
+        with self.captureOnCommitCallbacks() as callbacks:
+            outbox.enqueue('Hello', 'Body', 'user@example.com')
+        self.assertEqual(len(callbacks), 1)
+        
+        with self.settings(EMAIL_OUTBOX_MODE='worker'):
+            with self.captureOnCommitCallbacks() as callbacks:
+                outbox.enqueue('Hello', 'Body', 'user@example.com')
+        self.assertEqual(callbacks, [])
+    
+    def test_failed_email_schedules_its_retry(self):
+        """A failure should set a timer for when its backoff ends, not wait for the next enqueue."""
+        from unittest import mock
+        from accounts import outbox
+        outbox.enqueue('Hello', 'Body', 'user@example.com')
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('refused')):
+            outbox.send_pending()
+        with mock.patch.object(outbox.threading, 'Timer') as timer, \
+                mock.patch.object(outbox, '_timer', None), mock.patch.object(outbox, '_timer_due', None):
+            outbox._schedule_next()
+            delay, callback = timer.call_args.args
+            self.assertAlmostEqual(delay, outbox.BACKOFF_SECONDS, delta=5)
+            self.assertIs(callback, outbox._wake_sender)
+            timer.return_value.start.assert_called_once()
+            
+            # Nothing pending, nothing scheduled
+            timer.reset_mock()
+            outbox.OutgoingEmail.objects.update(status=outbox.OutgoingEmail.SENT)
+            outbox._timer = None
+            outbox._schedule_next()
+            timer.assert_not_called()
+    
+    def test_worker_command(self):
+        from io import StringIO
+        from django.core import mail
+        from django.core.management import call_command
+        from accounts import outbox
+        outbox.enqueue('Hello', 'Body', 'user@example.com')
+        out = StringIO()
+        call_command('send_queued_email', stdout=out)
+        self.assertIn('Sent 1 email(s)', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class UnverifiedCleanupTests(TestCase):
+    """Tests for deleting expired unverified accounts."""
+    
+    def setUp(self):
+        from datetime import timedelta
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from accounts.models import EmailVerification
+        old = timezone.now() - timedelta(hours=30)
+        
+        def account(name, active, created_at=None, verified=False):
+            user = User.objects.create_user(name, email=f'{name}@example.com', is_active=active)
+            token = EmailVerification.objects.create(user=user)
+            updates = {'verified_at': timezone.now()} if verified else {}
+            if created_at:
+                updates['created_at'] = created_at
+            EmailVerification.objects.filter(pk=token.pk).update(**updates)
+            return user
+        
+        self.expired = [account(f'expired{i}', False, old) for i in range(3)]
+        self.fresh = account('fresh', False)
+        self.verified = account('verified', True, old, verified=True)
+        self.activated = account('activated', True, old)
+    
+    def _cleanup(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('cleanup_unverified_accounts', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_deletes_expired_unverified_users(self):
+        """Only inactive users with an expired token should be removed."""
+        from django.contrib.auth.models import User
+        from accounts.models import EmailVerification
+        output = self._cleanup('--batch-size', '2')
+        self.assertIn('Deleted 3 unverified users and 1 expired tokens', output)
+        self.assertEqual(
+            set(User.objects.values_list('username', flat=True)),
+            {'fresh', 'verified', 'activated'}
+        )
+        # The active user keeps their account but loses the stale token
+        self.assertFalse(EmailVerification.objects.filter(user=self.activated).exists())
+        self.assertTrue(EmailVerification.objects.filter(user=self.verified).exists())
+    
+    def test_dry_run(self):
+        from django.contrib.auth.models import User
+        output = self._cleanup('--dry-run')
+        self.assertIn('Would delete 3 unverified users', output)
+        self.assertIn('Would delete 1 expired tokens', output)
+        self.assertEqual(User.objects.count(), 6)
+    
+    def test_email_active_index(self):
+        """auth_user should have an index covering the resend lookup."""
+        from django.db import connection
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'auth_user')
+        self.assertIn(
+            ['email', 'is_active'],
+            [c['columns'] for c in constraints.values() if c['index']]
+        )
+
+
+@override_settings(REQUEST_METRICS_HEADER=True)
+class RequestMetricsTests(TestCase):
+    """Tests for the request instrumentation middleware."""
+    
+    def test_server_timing_header(self):
+        """Responses should carry Server-Timing with db, template and total."""
+        response = self.client.get('/leaderboard/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+    
+    def test_query_count_reported(self):
+        """The db entry should report how many queries ran: board state, then the board."""
+        from django.contrib.auth.models import User
+        from leaderboard.models import Score
+        Score.objects.create(user=User.objects.create_user('timed'), game='note', correct=5, total=10)
+        from django.core.cache import cache
+        cache.clear()
+        response = self.client.get('/leaderboard/api/rankings/?game=note')
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+    
+    def test_structured_log_line(self):
+        """Each request should be logged as one JSON line."""
+        import json
+        with self.assertLogs('rithm.requests', level='INFO') as logs:
+            self.client.get('/leaderboard/api/rankings/')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], '/leaderboard/api/rankings/')
+        self.assertEqual(entry['view'], 'api-leaderboard')
+        self.assertEqual(entry['status'], 200)
+        for key in ['queries', 'db_ms', 'template_ms', 'total_ms', 'bytes']:
+            self.assertIn(key, entry)
+    
+    def test_can_be_disabled(self):
+        """REQUEST_METRICS_ENABLED=False should skip instrumentation."""
+        with self.settings(REQUEST_METRICS_ENABLED=False):
+            response = self.client.get('/leaderboard/api/rankings/')
+        self.assertNotIn('Server-Timing', response)
+    
+    def test_header_only_for_staff_by_default(self):
+        """Without REQUEST_METRICS_HEADER only staff should see Server-Timing; the log line stays."""
+        from django.contrib.auth.models import User
+        with self.settings(REQUEST_METRICS_HEADER=False):
+            with self.assertLogs('rithm.requests', level='INFO'):
+                response = self.client.get('/leaderboard/')
+            self.assertNotIn('Server-Timing', response)
+            
+            self.client.force_login(User.objects.create_user('visitor'))
+            self.assertNotIn('Server-Timing', self.client.get('/leaderboard/'))
+            
+            self.client.force_login(User.objects.create_user('staffer', is_staff=True))
+            self.assertIn('Server-Timing', self.client.get('/leaderboard/'))
+
+
+@override_settings(ROOT_URLCONF='rithm.asgi_urls')
+class AsyncViewTests(TestCase):
+    """The JSON APIs served through the ASGI handler with SERVER_MODE=asgi."""
+    
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user('asyncer')
+    
+    async def _login(self):
+        from asgiref.sync import sync_to_async
+        await sync_to_async(self.async_client.force_login)(self.user)
+    
+    def test_asgi_application(self):
+        """rithm.asgi should expose Django's ASGI handler."""
+        from django.core.handlers.asgi import ASGIHandler
+        from rithm.asgi import application
+        self.assertIsInstance(application, ASGIHandler)
+    
+    def test_only_asgi_mode_routes_to_async_views(self):
+        """The default urlconf should keep the sync views; the ASGI one swaps in async ones."""
+        import asyncio
+        from django.urls import resolve
+        for path in ('/accounts/api/stats/note/', '/accounts/api/stats/sync/',
+                     '/accounts/api/bootstrap/', '/leaderboard/api/submit/',
+                     '/leaderboard/api/rankings/'):
+            with self.subTest(path=path):
+                self.assertFalse(asyncio.iscoroutinefunction(resolve(path, 'rithm.urls').func))
+                self.assertTrue(asyncio.iscoroutinefunction(resolve(path, 'rithm.asgi_urls').func))
+    
+    async def test_stats_round_trip(self):
+        """Stats should update and read back under ASGI."""
+        await self._login()
+        response = await self.async_client.post(
+            '/accounts/api/stats/note/',
+            data={'correct': 7, 'total': 9, 'bestStreak': 4},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get('/accounts/api/stats/note/')
+        data = response.json()
+        self.assertTrue(data['authenticated'])
+        self.assertEqual(data['stats']['total'], 9)
+        self.assertEqual(data['stats']['bestStreak'], 4)
+    
+    async def test_anonymous_stats(self):
+        """Anonymous users should get the unauthenticated stats payload."""
+        response = await self.async_client.get('/accounts/api/stats/note/')
+        self.assertEqual(response.json(), {'authenticated': False})
+    
+    async def test_async_views_reject_wrong_method(self):
+        """The async method decorators should answer 405 like Django's."""
+        response = await self.async_client.get('/accounts/api/stats/sync/')
+        self.assertEqual(response.status_code, 405)
+        response = await self.async_client.put('/accounts/api/stats/note/')
+        self.assertEqual(response.status_code, 405)
+    
+    async def test_bootstrap(self):
+        """The bootstrap payload should be served under ASGI."""
+        await self._login()
+        response = await self.async_client.get('/accounts/api/bootstrap/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'asyncer')
+    
+    async def test_metrics_count_queries_in_async_views(self):
+        """Queries run for async views should still reach Server-Timing."""
+        await self._login()
+        with self.settings(REQUEST_METRICS_HEADER=True):
+            response = await self.async_client.get('/accounts/api/stats/note/')
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+
+class FakeConnection:
+    """Stands in for a DB-API connection in the pool tests."""
+    
+    def __init__(self):
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(TestCase):
+    """Tests for the lightweight connection pool."""
+    
+    def _pool(self, **kwargs):
+        from rithm.db.pool import ConnectionPool
+        return ConnectionPool(FakeConnection, **kwargs)
+    
+    def test_connections_are_reused(self):
+        """A returned connection should be handed out again."""
+        pool = self._pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(pool.opened, 1)
+    
+    def test_max_size_times_out(self):
+        """Checking out more than max_size should wait, then fail."""
+        from rithm.db.pool import PoolTimeout
+        pool = self._pool(max_size=2, timeout=0.05)
+        pool.getconn()
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+    
+    def test_waiter_gets_returned_connection(self):
+        """A thread waiting on a full pool should get the next connection back."""
+        import threading
+        pool = self._pool(max_size=1, timeout=5)
+        conn = pool.getconn()
+        timer = threading.Timer(0.05, pool.putconn, args=[conn])
+        timer.start()
+        self.assertIs(pool.getconn(), conn)
+        timer.join()
+    
+    def test_failed_reset_discards(self):
+        """A connection the reset hook rejects should be closed, not reused."""
+        pool = self._pool(reset=lambda conn: False)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.size, 0)
+        self.assertIsNot(pool.getconn(), conn)
+    
+    def test_failed_check_opens_new(self):
+        """A connection failing the health check should be replaced on checkout."""
+        pool = self._pool(check=lambda conn: False)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertTrue(conn.closed)
+    
+    def test_max_lifetime(self):
+        """Connections older than max_lifetime should be retired."""
+        pool = self._pool(max_lifetime=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertTrue(conn.closed)
+    
+    def test_idle_connections_trimmed_to_min_size(self):
+        """Idle connections beyond min_size should be closed after max_idle."""
+        pool = self._pool(min_size=1, max_idle=0)
+        first, second = pool.getconn(), pool.getconn()
+        pool.putconn(first)
+        pool.putconn(second)
+        self.assertEqual(pool.size, 1)
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+
+
+class DatabaseBackendTests(TestCase):
+    """Tests for the rithm database backends."""
+    
+    def _postgres(self, **settings_dict):
+        from rithm.db.backends.postgresql.base import DatabaseWrapper
+        return DatabaseWrapper(dict({
+            'ENGINE': 'rithm.db.backends.postgresql', 'NAME': 'rithm', 'USER': '', 'PASSWORD': '',
+            'HOST': '', 'PORT': '', 'OPTIONS': {'pool': True}, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+            'TIME_ZONE': None, 'TEST': {},
+        }, **settings_dict))
+    
+    def test_sqlite_pragmas_applied(self):
+        """init_command pragmas should run on each new SQLite connection."""
+        import os
+        import tempfile
+        from django.db import connection
+        from rithm.db.backends.sqlite3.base import DatabaseWrapper
+        with tempfile.TemporaryDirectory() as tmp:
+            wrapper = DatabaseWrapper(dict(
+                connection.settings_dict,
+                NAME=os.path.join(tmp, 'wal.sqlite3'),
+                OPTIONS={'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL'},
+            ))
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)
+            finally:
+                wrapper.close()
+    
+    def test_journal_mode_left_alone_by_default(self):
+        """Without SQLITE_JOURNAL_MODE the database file's journal mode is not rewritten."""
+        from django.db import connection
+        self.assertNotIn('journal_mode', connection.settings_dict['OPTIONS'].get('init_command', ''))
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertNotEqual(cursor.fetchone()[0], 'wal')
+    
+    def test_init_command_not_passed_to_driver(self):
+        """init_command should be run by the backend, not given to sqlite3.connect."""
+        from django.db import connection
+        self.assertNotIn('init_command', connection.get_connection_params())
+    
+    def test_postgres_pool_option_not_passed_to_driver(self):
+        """The pool option should not reach psycopg2.connect."""
+        self.assertNotIn('pool', self._postgres().get_connection_params())
+    
+    def test_postgres_pool_needs_non_persistent_connections(self):
+        """Pooling with CONN_MAX_AGE should be refused, as in Django 5.1."""
+        from django.core.exceptions import ImproperlyConfigured
+        with self.assertRaises(ImproperlyConfigured):
+            self._postgres(CONN_MAX_AGE=600).pool
+    
+    def test_postgres_pool_created_once(self):
+        """Wrappers for the same database should share one pool."""
+        from rithm.db.backends.postgresql.base import close_pools
+        self.addCleanup(close_pools)
+        pool = self._postgres(OPTIONS={'pool': {'max_size': 3}}).pool
+        self.assertEqual(pool.max_size, 3)
+        self.assertIs(self._postgres(OPTIONS={'pool': {'max_size': 3}}).pool, pool)
+        self.assertIsNone(self._postgres(OPTIONS={}).pool)
+
+
+@override_settings(TEMPLATE_CACHE_TIMEOUT=60)
+class PageCacheTests(TestCase):
+    """Tests for the anonymous page cache and the template fragment caches."""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def test_anonymous_page_served_from_cache(self):
+        """A second anonymous visit should not render any template."""
+        first = self.client.get('/guide/')
+        self.assertTemplateUsed(first, 'landing_page/guide.html')
+        with self.assertNumQueries(0):
+            second = self.client.get('/guide/')
+        self.assertEqual(second.templates, [])
+        self.assertEqual(second.content, first.content)
+        self.assertIn('Cookie', second['Vary'])
+    
+    def test_logged_in_users_see_their_own_navbar(self):
+        """Cached fragments must not leak one user's navbar to another."""
+        from django.contrib.auth.models import User
+        self.client.get('/faq/')
+        for username in ['alice', 'bob']:
+            self.client.force_login(User.objects.create_user(username))
+            response = self.client.get('/faq/')
+            self.assertContains(response, username)
+            self.assertNotContains(response, 'fa-sign-in-alt')
+        self.client.logout()
+        self.assertNotContains(self.client.get('/faq/'), 'bob')
+    
+    def test_game_page_config_is_per_user(self):
+        """The stats sync config on game pages should carry the current user."""
+        from django.contrib.auth.models import User
+        for username in ['carol', 'dave']:
+            user = User.objects.create_user(username)
+            self.client.force_login(user)
+            response = self.client.get('/interval_training/')
+            self.assertContains(response, f"userId: '{user.id}'")
+            self.assertContains(response, 'interval_training/js/index.js')
+    
+    def test_query_string_bypasses_page_cache(self):
+        """Requests with a query string should always be rendered."""
+        self.client.get('/tips/')
+        response = self.client.get('/tips/?ref=newsletter')
+        self.assertTemplateUsed(response, 'landing_page/tips.html')
+    
+    def test_new_deploy_renders_again(self):
+        """Changing DEPLOY_VERSION should make earlier entries unreachable."""
+        self.client.get('/synth/')
+        with self.settings(DEPLOY_VERSION='next-release'):
+            response = self.client.get('/synth/')
+        self.assertTemplateUsed(response, 'synth/index.html')
+    
+    def test_error_page_renders_without_request(self):
+        """500.html is rendered without context processors and must not break."""
+        from django.template.loader import render_to_string
+        self.assertIn('R.I.T.H.M', render_to_string('500.html'))
+    
+    def test_disabled_with_zero_timeout(self):
+        """TEMPLATE_CACHE_TIMEOUT=0 should render every request."""
+        with self.settings(TEMPLATE_CACHE_TIMEOUT=0):
+            self.client.get('/metronome/')
+            response = self.client.get('/metronome/')
+        self.assertTemplateUsed(response, 'metronome/index.html')
+
+
+class VendorAssetTests(TestCase):
+    """Tests for the self-hosted third-party assets."""
+    
+    def test_purge_keeps_only_used_classes(self):
+        """Rules for unused classes, and keyframes nothing animates, should go."""
+        from rithm.vendor import purge_css
+        css = (
+            '/*! banner */a{color:red}.btn:not(.disabled){x:1}.modal,.btn-primary{y:2}'
+            '@media (min-width:576px){.col-sm-6{z:3}.modal{z:4}}'
+            '@keyframes spin{from{a:0}to{a:1}}@keyframes fade{from{a:0}to{a:1}}.spinner{animation:spin 1s}'
+        )
+        purged = purge_css(css, {'btn', 'btn-primary', 'col-sm-6', 'spinner'})
+        self.assertEqual(purged, (
+            'a{color:red}.btn:not(.disabled){x:1}.btn-primary{y:2}'
+            '@media (min-width:576px){.col-sm-6{z:3}}'
+            '@keyframes spin{from{a:0}to{a:1}}.spinner{animation:spin 1s}'
+        ))
+    
+    def test_icons_and_view_classes_are_used(self):
+        """Icons named in views and scripts should count as used."""
+        from rithm.vendor import used_tokens
+        tokens = used_tokens()
+        for name in ['fa-headphones', 'fa-wave-square', 'navbar-toggler', 'alert-success']:
+            self.assertIn(name, tokens)
+    
+    def test_fetch_checks_integrity(self):
+        """A download that doesn't match its pinned hash should be rejected."""
+        import tempfile
+        from rithm.vendor import Fetcher, VendorError, integrity
+        with tempfile.TemporaryDirectory() as source:
+            with open(os.path.join(source, 'lib.css'), 'wb') as fh:
+                fh.write(b'a{}')
+            fetch = Fetcher(source)
+            self.assertEqual(fetch('https://cdn.example/lib.css', integrity(b'a{}')), b'a{}')
+            with self.assertRaises(VendorError):
+                fetch('https://cdn.example/lib.css', integrity(b'b{}'))
+    
+    def test_vendored_files_match_record(self):
+        """Files in static/vendor/ should be exactly what vendor_assets built."""
+        from django.contrib.staticfiles import finders
+        from rithm.vendor import integrity, read_manifest
+        for asset in read_manifest().values():
+            for path, digest in asset['files'].items():
+                with open(finders.find(path), 'rb') as fh:
+                    self.assertEqual(integrity(fh.read()), digest, path)
+    
+    def test_pages_use_vendored_copies(self):
+        """Vendored assets should be served locally, without jQuery or Bootstrap's JS."""
+        response = self.client.get('/')
+        self.assertContains(response, '/static/vendor/bootstrap/bootstrap.css')
+        self.assertContains(response, '/static/vendor/fontawesome/css/icons.css')
+        for host in ['stackpath.bootstrapcdn.com', 'cdnjs.cloudflare.com', 'code.jquery.com', 'cdn.jsdelivr.net']:
+            self.assertNotContains(response, host)
+    
+    def test_falls_back_to_cdn_until_vendored(self):
+        """An asset that hasn't been built should still load, from the CDN."""
+        from unittest import mock
+        from django.template import Context, Template
+        with mock.patch('landing_page.templatetags.vendor_tags.read_manifest', return_value={}):
+            html = Template("{% load vendor_tags %}{% vendor 'bootstrap' %}").render(Context())
+        self.assertIn('https://stackpath.bootstrapcdn.com/bootstrap/4.4.1/css/bootstrap.min.css', html)
+        self.assertIn('integrity="sha384-', html)
+
+
+class ResponsiveImageTests(TestCase):
+    """Tests for the AVIF/WebP variants of large images."""
+    
+    ENTRY = {
+        'width': 3000, 'height': 2000, 'bytes': 500000,
+        'variants': [
+            {'path': f'responsive/hero-{w}.{fmt}', 'format': fmt, 'width': w, 'height': w * 2 // 3, 'bytes': w * size}
+            for w in [480, 960, 1920] for fmt, size in [('avif', 10), ('webp', 20)]
+        ],
+    }
+    
+    def test_pick_smallest_variant_that_fills_viewport(self):
+        """Browsers should get the narrowest variant at least as wide as the viewport."""
+        from rithm.images import pick
+        self.assertEqual(pick(self.ENTRY, 480)['path'], 'responsive/hero-480.avif')
+        self.assertEqual(pick(self.ENTRY, 1280)['path'], 'responsive/hero-1920.avif')
+        self.assertEqual(pick(self.ENTRY, 4000)['path'], 'responsive/hero-1920.avif')
+        self.assertEqual(pick(self.ENTRY, 1280, formats=['webp'])['path'], 'responsive/hero-1920.webp')
+    
+    def test_tag_renders_picture(self):
+        """Built images should render <picture> with AVIF first, sized to the original."""
+        from unittest import mock
+        from django.template import Context, Template
+        with mock.patch('landing_page.templatetags.image_tags.read_manifest', return_value={'hero.jpg': self.ENTRY}):
+            html = Template(
+                "{% load image_tags %}{% responsive_image 'hero.jpg' alt='Hero' sizes='50vw' class='hero' %}"
+            ).render(Context())
+        self.assertLess(html.index('type="image/avif"'), html.index('type="image/webp"'))
+        self.assertIn('srcset="/static/responsive/hero-480.avif 480w, /static/responsive/hero-960.avif 960w, '
+                      '/static/responsive/hero-1920.avif 1920w" sizes="50vw"', html)
+        self.assertIn('<img src="/static/hero.jpg" alt="Hero" class="hero" decoding="async" '
+                      'height="2000" width="3000">', html)
+    
+    def test_tag_falls_back_to_original(self):
+        """An image that hasn't been built should render a plain <img>."""
+        from unittest import mock
+        from django.template import Context, Template
+        with mock.patch('landing_page.templatetags.image_tags.read_manifest', return_value={}):
+            html = Template("{% load image_tags %}{% responsive_image 'hero.jpg' alt='Hero' %}").render(Context())
+        self.assertEqual(html, '<img src="/static/hero.jpg" alt="Hero" decoding="async">')
+    
+    def test_build_makes_smaller_variants(self):
+        """Every configured image should be built, and every variant smaller than its original."""
+        import tempfile
+        from pathlib import Path
+        from rithm import images
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            self.skipTest('Pillow is not installed')
+        sources = ['landing_page/note.png', 'landing_page/pitch.png']
+        with tempfile.TemporaryDirectory() as tmp, self.settings(BASE_DIR=tmp, RESPONSIVE_IMAGES=sources):
+            try:
+                record = images.build()
+                self.assertEqual(images.read_manifest(), record)
+            finally:
+                images.read_manifest.cache_clear()
+            self.assertEqual(set(record), set(sources))
+            for name, entry in record.items():
+                for variant in entry['variants']:
+                    path = Path(tmp, 'static', variant['path'])
+                    self.assertEqual(path.stat().st_size, variant['bytes'], variant['path'])
+                    self.assertLess(variant['bytes'], entry['bytes'], variant['path'])
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every URL in rithm/urls.py must stay within its query budget.
+    
+    Budgets are for a GET by a logged-in user, or for the POST in
+    POST_BODIES on write endpoints. Adding a URL without adding a budget
+    here fails the suite.
+    """
+    
+    QUERY_BUDGETS = {
+        '': 2,
+        'note_identification/': 5,
+        'pitch_identification/': 2,
+        'synth/': 2,
+        'guide/': 2,
+        'tips/': 2,
+        'faq/': 2,
+        'interval_training/': 5,
+        'chord_identification/': 5,
+        'metronome/': 2,
+        'leaderboard/': 3,
+        'leaderboard/api/submit/': 9,
+        'leaderboard/api/submit/batch/': 9,
+        'leaderboard/api/rankings/': 2,
+        'leaderboard/api/rankings/page/': 1,
+        'leaderboard/api/cache-stats/': 2,
+        'accounts/register/': 2,
+        'accounts/login/': 2,
+        'accounts/logout/': 4,
+        'accounts/profile/': 4,
+        'accounts/verify/<uuid:token>/': 1,
+        'accounts/resend-verification/': 2,
+        'accounts/api/bootstrap/': 5,
+        'accounts/api/stats/sync/': 11,
+        'accounts/api/stats/<str:game>/': 3,
+        'accounts/api/note-stats/': 3,
+        'accounts/api/note-stats/update/': 3,
+        'accounts/api/interval-stats/': 3,
+        'accounts/api/interval-stats/update/': 3,
+        'accounts/api/chord-stats/': 3,
+        'accounts/api/chord-stats/update/': 3,
+    }
+    
+    SAMPLE_PATHS = {
+        'accounts/verify/<uuid:token>/': 'accounts/verify/00000000-0000-0000-0000-000000000000/',
+        'accounts/api/stats/<str:game>/': 'accounts/api/stats/note/',
+    }
+    
+    # JSON bodies for the write endpoints, which only accept POST
+    POST_BODIES = {
+        'leaderboard/api/submit/': {'game': 'note', 'correct': 8, 'total': 10, 'bestStreak': 4},
+        'leaderboard/api/submit/batch/': {'sessions': [
+            {'game': 'note', 'correct': 8, 'total': 10},
+            {'game': 'chord', 'difficulty': 'advanced', 'correct': 3, 'total': 5},
+        ]},
+        'accounts/api/stats/sync/': {'client': 'tab-1', 'seq': 1, 'games': {
+            'note': {'correct': 3, 'total': 4, 'streak': 2, 'bestStreak': 6},
+            'chord': {'correct': 1, 'total': 1},
+        }},
+        'accounts/api/note-stats/update/': {'correct': 1, 'total': 2, 'streak': 1, 'bestStreak': 1},
+        'accounts/api/interval-stats/update/': {'correct': 1, 'total': 2, 'streak': 1, 'bestStreak': 1},
+        'accounts/api/chord-stats/update/': {'correct': 1, 'total': 2, 'streak': 1, 'bestStreak': 1},
+    }
+    
+    def _routes(self, patterns, prefix=''):
+        from django.urls import URLResolver
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                if route.startswith('admin/'):
+                    continue
+                yield from self._routes(pattern.url_patterns, route)
+            else:
+                yield route
+    
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user('budgeted')
+        self.client.force_login(self.user)
+    
+    def test_every_url_has_a_budget(self):
+        """New URLs must declare a query budget."""
+        from django.urls import get_resolver
+        routes = set(self._routes(get_resolver().url_patterns))
+        self.assertEqual(routes - set(self.QUERY_BUDGETS), set())
+    
+    def test_urls_within_budget(self):
+        """Every URL should answer without a server error and within its query budget."""
+        import json
+        for route, budget in self.QUERY_BUDGETS.items():
+            path = '/' + self.SAMPLE_PATHS.get(route, route)
+            with self.subTest(path=path):
+                self.client.force_login(self.user)
+                if route in self.POST_BODIES:
+                    response = self.assertQueryBudget(
+                        path, budget, method='post',
+                        data=json.dumps(self.POST_BODIES[route]), content_type='application/json'
+                    )
+                    self.assertEqual(response.status_code, 200, response.content)
+                else:
+                    response = self.assertQueryBudget(path, budget)
+                self.assertLess(response.status_code, 500)